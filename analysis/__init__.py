@@ -0,0 +1,9 @@
+"""
+NucDeck Mesh Analysis
+Metric registry and the shared metrics used by the STL analysis scripts
+"""
+
+from analysis.registry import METRICS, clear_memo, compute, jsonable, metric, resolve, to_json
+from analysis import metrics  # noqa: F401  (registers the built-in metrics)
+
+__all__ = ['METRICS', 'clear_memo', 'compute', 'jsonable', 'metric', 'resolve', 'to_json']
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+NucDeck Mesh Analysis CLI
+Compute registered metrics for an STL file and print or save them as JSON
+"""
+
+import argparse
+import json
+import time
+
+from analysis import METRICS, compute, resolve, to_json
+from mesh_cache import load_mesh
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NucDeck mesh metrics")
+    parser.add_argument("stl_file", nargs="?", help="STL file to analyze")
+    parser.add_argument("--metrics", nargs="+", help="Metrics to compute (default: all)")
+    parser.add_argument("--option", action="append", default=[], metavar="NAME=VALUE",
+                        help="Override a metric parameter (value parsed as JSON)")
+    parser.add_argument("--list", action="store_true", help="List available metrics")
+    parser.add_argument("--output", type=str, help="Write results as JSON instead of printing")
+
+    args = parser.parse_args()
+
+    if args.list or not args.stl_file:
+        for name, entry in METRICS.items():
+            requires = f" <- {', '.join(entry['requires'])}" if entry['requires'] else ""
+            print(f"  {name:<18} {entry['description']}{requires}")
+        return
+
+    options = {}
+    for option in args.option:
+        name, _, value = option.partition('=')
+        try:
+            options[name] = json.loads(value)
+        except ValueError:
+            options[name] = value
+
+    mesh = load_mesh(args.stl_file)
+    timings = {}
+    start = time.perf_counter()
+    results = compute(mesh, args.metrics, options, timings)
+    elapsed = time.perf_counter() - start
+
+    text = to_json(results)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+        print(f"{len(results)} metrics ({len(resolve(results))} evaluated) in {elapsed:.2f}s -> {args.output}")
+        for name, seconds in sorted(timings.items(), key=lambda item: -item[1]):
+            print(f"  {name:<18} {seconds * 1000:8.1f} ms")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
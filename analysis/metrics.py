@@ -0,0 +1,230 @@
+"""
+NucDeck Analysis Metrics
+Derived mesh quantities shared by the STL analysis scripts
+"""
+
+import os
+
+import numpy as np
+
+from analysis.registry import metric
+from height_map import DEFAULT_RESOLUTION, height_map, segment_features
+from planar_regions import segment_planes
+from slice_circles import detect_cylinders
+from thickness_map import thickness_map
+from voxel_grid import DEFAULT_PITCH, occupancy_grid
+
+
+# --- Basic properties -------------------------------------------------------
+
+@metric('properties')
+def properties(mesh):
+    """Counts, volume, area and validity flags"""
+    return {
+        'vertices': len(mesh.vertices),
+        'faces': len(mesh.faces),
+        'volume': float(mesh.volume),
+        'area': float(mesh.area),
+        'watertight': bool(mesh.is_watertight),
+        'winding_consistent': bool(mesh.is_winding_consistent),
+        'euler_number': int(mesh.euler_number),
+    }
+
+
+@metric('bounds')
+def bounds(mesh):
+    """Axis-aligned bounding box as [min, max]"""
+    return mesh.bounds.copy()
+
+
+@metric('dimensions', requires=['bounds'])
+def dimensions(mesh, bounds):
+    """Bounding box size (X, Y, Z)"""
+    return bounds[1] - bounds[0]
+
+
+@metric('geometric_center', requires=['bounds'])
+def geometric_center(mesh, bounds):
+    """Centre of the bounding box"""
+    return (bounds[0] + bounds[1]) / 2
+
+
+@metric('center_mass')
+def center_mass(mesh):
+    """Centre of mass"""
+    return mesh.center_mass.copy()
+
+
+@metric('convex_hull', serialize=False)
+def convex_hull(mesh):
+    """Convex hull mesh"""
+    return mesh.convex_hull
+
+
+@metric('volume_ratio', requires=['convex_hull', 'properties'])
+def volume_ratio(mesh, convex_hull, properties):
+    """Mesh volume over convex hull volume (low means large cavities)"""
+    hull_volume = convex_hull.volume
+    return float(properties['volume'] / hull_volume) if hull_volume > 0 else 0.0
+
+
+# --- Surface orientation ----------------------------------------------------
+
+@metric('face_orientation', params={'large_face_area': 1.0})
+def face_orientation(mesh, large_face_area):
+    """Face counts and areas by normal direction"""
+    nz = mesh.face_normals[:, 2]
+    areas = mesh.area_faces
+    large = areas > large_face_area
+    classes = {
+        'vertical': np.abs(nz) < 0.1,
+        'horizontal': np.abs(nz) > 0.9,
+        'up': nz > 0.8,
+        'down': nz < -0.8,
+        'walls': np.abs(nz) < 0.3,
+    }
+    return {
+        name: {'faces': int(mask.sum()), 'large_faces': int((mask & large).sum()),
+               'area': float(areas[mask].sum())}
+        for name, mask in classes.items()
+    }
+
+
+@metric('mounting_faces', params={'mounting_percentile': 90})
+def mounting_faces(mesh, mounting_percentile):
+    """Nearly horizontal faces in the top area percentile (candidate mounting surfaces)"""
+    areas = mesh.area_faces
+    candidates = (areas > np.percentile(areas, mounting_percentile)) & (np.abs(mesh.face_normals[:, 2]) > 0.8)
+    index = np.flatnonzero(candidates)
+    return {'count': len(index), 'faces': index, 'centers': mesh.triangles_center[index], 'areas': areas[index]}
+
+
+@metric('planar_patches', params={'flat_min_area': 100.0})
+def planar_patches(mesh, flat_min_area):
+    """Coplanar face patches of at least flat_min_area mm²"""
+    return segment_planes(mesh, min_area=flat_min_area)
+
+
+# --- Vertex distribution ----------------------------------------------------
+
+@metric('z_levels', params={'z_step': 0.1, 'z_window': 0.5})
+def z_levels(mesh, z_step, z_window):
+    """Vertex counts per Z level, exact and within a window, most detailed first"""
+    z = mesh.vertices[:, 2]
+    bins = np.round(z / z_step).astype(np.int64)
+    levels, counts = np.unique(bins, return_counts=True)
+
+    # Vertices within z_window of each level, from a cumulative count
+    cumulative = np.concatenate([[0], np.cumsum(counts)])
+    reach = int(round(z_window / z_step))
+    window = (cumulative[np.searchsorted(levels, levels + reach, side='right')]
+              - cumulative[np.searchsorted(levels, levels - reach, side='left')])
+
+    by_count = np.argsort(-counts, kind='stable')
+    by_window = np.argsort(-window, kind='stable')
+    return {
+        'unique': len(levels),
+        'range': [float(z.min()), float(z.max())] if len(z) else [0.0, 0.0],
+        'levels': levels * z_step,
+        'counts': counts,
+        'top': [{'z': float(levels[i] * z_step), 'vertices': int(counts[i])} for i in by_count[:10]],
+        'top_window': [{'z': float(levels[i] * z_step), 'vertices': int(window[i])} for i in by_window[:10]],
+    }
+
+
+@metric('vertex_density', requires=['bounds'], params={'density_grid': (19, 9), 'dense_vertices': 100})
+def vertex_density(mesh, bounds, density_grid, dense_vertices):
+    """XY grid cells holding more than dense_vertices vertices, with their Z span"""
+    vertices = mesh.vertices
+    nx, ny = density_grid
+    size = np.maximum(bounds[1, :2] - bounds[0, :2], 1e-9)
+    cell = np.minimum(((vertices[:, :2] - bounds[0, :2]) / size * [nx, ny]).astype(np.int64), [nx - 1, ny - 1])
+    flat = cell[:, 0] * ny + cell[:, 1]
+
+    counts = np.bincount(flat, minlength=nx * ny)
+    z_low = np.full(nx * ny, np.inf)
+    z_high = np.full(nx * ny, -np.inf)
+    np.minimum.at(z_low, flat, vertices[:, 2])
+    np.maximum.at(z_high, flat, vertices[:, 2])
+
+    regions = []
+    for index in np.flatnonzero(counts > dense_vertices):
+        i, j = divmod(int(index), ny)
+        center = bounds[0, :2] + (np.array([i, j]) + 0.5) / [nx, ny] * size
+        regions.append({'center': center, 'vertices': int(counts[index]),
+                        'z_span': float(z_high[index] - z_low[index])})
+    return regions
+
+
+# --- Thickness --------------------------------------------------------------
+
+@metric('thickness_map', serialize=False,
+        params={'thickness_samples': None, 'min_wall': 1.2, 'thickness_workers': None})
+def thickness_map_metric(mesh, thickness_samples, min_wall, thickness_workers):
+    """Inward ray-cast thickness for every sample"""
+    return thickness_map(mesh, thickness_samples, min_wall, workers=thickness_workers or os.cpu_count())
+
+
+@metric('wall_thickness', requires=['thickness_map'])
+def wall_thickness(mesh, thickness_map):
+    """Wall thickness percentiles and thin-wall regions"""
+    return {key: thickness_map[key] for key in
+            ('samples', 'coverage', 'min', 'mean', 'percentiles', 'min_wall', 'thin_regions')}
+
+
+@metric('axis_thickness', requires=['geometric_center'])
+def axis_thickness(mesh, geometric_center):
+    """Material crossed by rays from the bounding-box centre along ±X, ±Y, ±Z"""
+    directions = np.vstack([np.eye(3), -np.eye(3)])
+    origins = np.repeat(geometric_center[None], len(directions), axis=0)
+    locations, index_ray, _ = mesh.ray.intersects_location(ray_origins=origins, ray_directions=directions)
+
+    thicknesses = []
+    for ray in range(len(directions)):
+        hits = locations[index_ray == ray]
+        if len(hits) >= 2:
+            distance = np.sort(np.linalg.norm(hits - geometric_center, axis=1))
+            thicknesses.append(float(distance[1] - distance[0]))
+    return thicknesses
+
+
+# --- Volume queries ---------------------------------------------------------
+
+@metric('occupancy', serialize=False, params={'pitch': DEFAULT_PITCH})
+def occupancy(mesh, pitch):
+    """Cached voxel occupancy grid"""
+    return occupancy_grid(mesh, pitch)
+
+
+@metric('cavities', requires=['occupancy'])
+def cavities(mesh, occupancy):
+    """Voxelized volume, enclosed cavities and open pockets"""
+    grid = occupancy
+    return {
+        'pitch': grid.pitch,
+        'shape': list(grid.shape),
+        'solid_voxels': int(grid.solid.sum()),
+        'voxel_volume': grid.internal_volume(),
+        'enclosed': grid.regions(grid.enclosed_cavities()),
+        'pockets': grid.regions(grid.pockets(), min_voxels=int(np.ceil(1.0 / grid.voxel_volume))),
+    }
+
+
+# --- Feature detection ------------------------------------------------------
+
+@metric('height_map', serialize=False, params={'resolution': DEFAULT_RESOLUTION, 'view_axis': None})
+def height_map_metric(mesh, resolution, view_axis):
+    """First/last-hit height images along the view axis (default: thinnest)"""
+    return height_map(mesh, resolution, view_axis)
+
+
+@metric('holes', requires=['height_map'], params={'hole_min_depth': 1.0, 'hole_min_area': 1.0})
+def holes(mesh, height_map, hole_min_depth, hole_min_area):
+    """Through holes and pockets segmented from the height map"""
+    return segment_features(height_map, min_depth=hole_min_depth, min_area=hole_min_area)
+
+
+@metric('cylinders', params={'min_radius': 3.0, 'max_radius': 20.0, 'slice_spacing': 0.5})
+def cylinders(mesh, min_radius, max_radius, slice_spacing):
+    """Vertical cylindrical holes and posts merged across Z slices"""
+    return detect_cylinders(mesh, min_radius, max_radius, spacing=slice_spacing)
@@ -0,0 +1,162 @@
+"""
+NucDeck Analysis Metric Registry
+Metrics declare their dependencies and parameters; compute() evaluates only the needed DAG
+"""
+
+import copy
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import logging
+
+import numpy as np
+import trimesh
+
+from voxel_grid import mesh_key
+
+logger = logging.getLogger(__name__)
+
+# name -> {'func', 'requires', 'params', 'serialize', 'description'}
+METRICS: Dict[str, Dict] = {}
+
+# Meshes whose metric results are kept in memory, most recent last
+MAX_MEMO_MESHES = 8
+
+_memo: "OrderedDict[str, Dict[Tuple, Any]]" = OrderedDict()
+
+
+def metric(name: str, requires: Iterable[str] = (), params: Optional[Dict[str, Any]] = None,
+           serialize: bool = True):
+    """
+    Register a metric function.
+
+    The function is called as ``func(mesh, **dependencies, **params)``:
+    every name in ``requires`` is passed as the already computed value of
+    that metric, and every key of ``params`` with its default or the value
+    given to ``compute``. Metrics with ``serialize=False`` (meshes, grids,
+    large arrays) are available as dependencies but left out of JSON output.
+    """
+    def register(func: Callable) -> Callable:
+        if name in METRICS:
+            raise ValueError(f"Metric '{name}' is already registered")
+        METRICS[name] = {
+            'func': func,
+            'requires': tuple(requires),
+            'params': dict(params or {}),
+            'serialize': serialize,
+            'description': (func.__doc__ or '').strip().split('\n')[0],
+        }
+        return func
+    return register
+
+
+def resolve(names: Iterable[str]) -> List[str]:
+    """Requested metrics and everything they depend on, dependencies first"""
+    order: List[str] = []
+    state: Dict[str, str] = {}
+
+    def visit(name, path):
+        if name not in METRICS:
+            raise KeyError(f"Unknown metric '{name}'" + (f" (required by '{path[-1]}')" if path else ""))
+        if state.get(name) == 'done':
+            return
+        if state.get(name) == 'visiting':
+            raise ValueError(f"Metric dependency cycle: {' -> '.join(path + [name])}")
+        state[name] = 'visiting'
+        for dependency in METRICS[name]['requires']:
+            visit(dependency, path + [name])
+        state[name] = 'done'
+        order.append(name)
+
+    for name in names:
+        visit(name, [])
+    return order
+
+
+def _memo_key(name: str, options: Dict[str, Any]) -> Tuple:
+    """Metric name plus every parameter value that affects it, its own and its dependencies'"""
+    params = []
+    for dependency in resolve([name]):
+        for param, default in sorted(METRICS[dependency]['params'].items()):
+            params.append((dependency, param, options.get(param, default)))
+    return (name, tuple(params))
+
+
+def compute(mesh: trimesh.Trimesh, metrics: Optional[Iterable[str]] = None,
+            options: Optional[Dict[str, Any]] = None, timings: Optional[Dict[str, float]] = None,
+            memo: bool = True) -> Dict[str, Any]:
+    """
+    Evaluate ``metrics`` (default: every serializable metric) on a mesh.
+
+    Each metric in the dependency DAG is computed once. Results are memoized
+    per mesh content hash and per the parameter values they depend on, so a
+    later call on the same geometry only computes what is new. ``options``
+    overrides metric parameters by name; ``timings``, if given, receives the
+    seconds spent on every metric actually computed. Returns the requested
+    metrics only, as deep copies: callers may modify them without affecting
+    the memoized values later calls see.
+    """
+    if metrics is None:
+        metrics = [name for name, entry in METRICS.items() if entry['serialize']]
+    metrics = list(metrics)
+    options = dict(options or {})
+
+    unknown = set(options) - {p for entry in METRICS.values() for p in entry['params']}
+    if unknown:
+        raise KeyError(f"Unknown metric option(s): {', '.join(sorted(unknown))}")
+
+    if memo:
+        key = mesh_key(mesh)
+        store = _memo.setdefault(key, {})
+        _memo.move_to_end(key)
+        while len(_memo) > MAX_MEMO_MESHES:
+            _memo.popitem(last=False)
+    else:
+        store = {}
+
+    values: Dict[str, Any] = {}
+    for name in resolve(metrics):
+        entry = METRICS[name]
+        params = {p: options.get(p, entry['params'][p]) for p in entry['params']}
+        memo_key = _memo_key(name, options)
+
+        if memo_key not in store:
+            start = time.perf_counter()
+            dependencies = {dependency: values[dependency] for dependency in entry['requires']}
+            store[memo_key] = entry['func'](mesh, **dependencies, **params)
+            elapsed = time.perf_counter() - start
+            logger.debug(f"metric {name}: {elapsed * 1000:.1f} ms")
+            if timings is not None:
+                timings[name] = elapsed
+        values[name] = store[memo_key]
+
+    return {name: copy.deepcopy(values[name]) for name in metrics}
+
+
+def clear_memo():
+    """Forget every memoized result"""
+    _memo.clear()
+
+
+def jsonable(value: Any) -> Any:
+    """Convert numpy values (recursively) into plain JSON types"""
+    if isinstance(value, dict):
+        return {str(k): jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [jsonable(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return jsonable(value.tolist())
+    if isinstance(value, np.bool_):
+        return bool(value)
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, (np.floating, float)):
+        return None if not np.isfinite(value) else float(value)
+    return value
+
+
+def to_json(results: Dict[str, Any], indent: Optional[int] = 2) -> str:
+    """JSON text for the serializable metrics in ``results``"""
+    return json.dumps({name: jsonable(value) for name, value in results.items()
+                       if METRICS.get(name, {}).get('serialize', True)}, indent=indent)
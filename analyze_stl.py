@@ -4,11 +4,14 @@ STL Analysis Script for NucDeck Housing Components
 Analyzes front and back cover STL files to determine dimensions and internal features
 """
 
-import trimesh
 import numpy as np
 import os
 import sys
 
+from analysis import compute
+from mesh_cache import load_mesh
+from thickness_map import print_thickness_summary
+
 def analyze_stl_file(filepath):
     """
     Analyze an STL file and return comprehensive information about its geometry
@@ -19,22 +22,25 @@ def analyze_stl_file(filepath):
     
     try:
         # Load the mesh
-        mesh = trimesh.load(filepath)
+        mesh = load_mesh(filepath)
+        results = compute(mesh, ['properties', 'bounds', 'dimensions', 'center_mass', 'geometric_center',
+                                 'face_orientation'])
+        props = results['properties']
         
         # Basic mesh info
         print(f"\n=== Analysis for: {os.path.basename(filepath)} ===")
-        print(f"Vertices: {len(mesh.vertices)}")
-        print(f"Faces: {len(mesh.faces)}")
-        print(f"Volume: {mesh.volume:.2f} mm³")
-        print(f"Surface Area: {mesh.area:.2f} mm²")
-        print(f"Is Watertight: {mesh.is_watertight}")
-        print(f"Is Winding Consistent: {mesh.is_winding_consistent}")
+        print(f"Vertices: {props['vertices']}")
+        print(f"Faces: {props['faces']}")
+        print(f"Volume: {props['volume']:.2f} mm³")
+        print(f"Surface Area: {props['area']:.2f} mm²")
+        print(f"Is Watertight: {props['watertight']}")
+        print(f"Is Winding Consistent: {props['winding_consistent']}")
         
         # Bounding box analysis
-        bounds = mesh.bounds
+        bounds = results['bounds']
         min_bounds = bounds[0]
         max_bounds = bounds[1]
-        dimensions = max_bounds - min_bounds
+        dimensions = results['dimensions']
         
         print(f"\n--- Bounding Box ---")
         print(f"Min coordinates (X, Y, Z): ({min_bounds[0]:.2f}, {min_bounds[1]:.2f}, {min_bounds[2]:.2f}) mm")
@@ -42,53 +48,39 @@ def analyze_stl_file(filepath):
         print(f"Dimensions (Width, Depth, Height): ({dimensions[0]:.2f}, {dimensions[1]:.2f}, {dimensions[2]:.2f}) mm")
         
         # Center of mass
-        center = mesh.center_mass
+        center = results['center_mass']
         print(f"Center of mass: ({center[0]:.2f}, {center[1]:.2f}, {center[2]:.2f}) mm")
         
         # Geometric center
-        geometric_center = (min_bounds + max_bounds) / 2
+        geometric_center = results['geometric_center']
         print(f"Geometric center: ({geometric_center[0]:.2f}, {geometric_center[1]:.2f}, {geometric_center[2]:.2f}) mm")
         
         # Check for internal features by analyzing mesh complexity
         print(f"\n--- Internal Feature Analysis ---")
         
         # Check if mesh has holes or complex internal geometry
-        genus = mesh.euler_number  # Euler characteristic can indicate holes
-        print(f"Euler characteristic: {genus}")
+        print(f"Euler characteristic: {props['euler_number']}")
         
-        # Analyze thickness by checking wall thickness at various points
+        # Wall thickness from one inward ray per face
+        thickness = None
         try:
-            # Sample points on the surface and check distances
-            surface_points = mesh.sample(1000)  # Sample 1000 points on surface
-            
-            # Calculate distances from surface points to the mesh
-            distances = []
-            for point in surface_points[:100]:  # Check first 100 points for performance
-                # Find the closest point on the mesh to this surface point
-                closest, distance, face_id = mesh.nearest.on_surface([point])
-                distances.append(distance)
-            
-            avg_wall_thickness = np.mean(distances) * 2  # Approximate wall thickness
-            print(f"Estimated average wall thickness: {avg_wall_thickness:.2f} mm")
+            thickness = compute(mesh, ['wall_thickness'])['wall_thickness']
+            print_thickness_summary(thickness)
             
         except Exception as e:
             print(f"Could not estimate wall thickness: {e}")
         
         # Check for overhangs and complex features
         # Analyze normal vectors to understand surface orientation
-        face_normals = mesh.face_normals
-        vertical_faces = np.abs(face_normals[:, 2]) < 0.1  # Nearly vertical faces
-        horizontal_faces = np.abs(face_normals[:, 2]) > 0.9  # Nearly horizontal faces
-        
-        print(f"Vertical faces (potential walls): {np.sum(vertical_faces)}")
-        print(f"Horizontal faces (potential floors/ceilings): {np.sum(horizontal_faces)}")
+        orientation = results['face_orientation']
+        print(f"Vertical faces (potential walls): {orientation['vertical']['faces']}")
+        print(f"Horizontal faces (potential floors/ceilings): {orientation['horizontal']['faces']}")
         
         # Check for potential mounting features by looking for small holes or protrusions
         try:
             # Look for cylindrical features (holes, posts, etc.)
             # This is a simplified analysis - in practice, you'd need more sophisticated feature detection
-            convex_hull_volume = mesh.convex_hull.volume
-            volume_ratio = mesh.volume / convex_hull_volume
+            volume_ratio = compute(mesh, ['volume_ratio'])['volume_ratio']
             print(f"Volume to convex hull ratio: {volume_ratio:.3f}")
             if volume_ratio < 0.8:
                 print("  -> Indicates potential internal cavities or complex features")
@@ -102,13 +94,15 @@ def analyze_stl_file(filepath):
             'filepath': filepath,
             'dimensions': dimensions,
             'bounds': bounds,
-            'volume': mesh.volume,
-            'area': mesh.area,
+            'volume': props['volume'],
+            'area': props['area'],
             'center_mass': center,
             'geometric_center': geometric_center,
-            'is_watertight': mesh.is_watertight,
-            'vertices': len(mesh.vertices),
-            'faces': len(mesh.faces)
+            'is_watertight': props['watertight'],
+            'vertices': props['vertices'],
+            'faces': props['faces'],
+            'wall_thickness': thickness['percentiles'] if thickness else None,
+            'thin_regions': thickness['thin_regions'] if thickness else None
         }
         
     except Exception as e:
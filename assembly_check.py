@@ -0,0 +1,539 @@
+#!/usr/bin/env python3
+"""
+NucDeck Assembly Interference Checker
+Broad-phase box pruning and batched triangle-level contact and clearance queries between placed parts
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+import logging
+
+import numpy as np
+import trimesh
+
+from thickness_map import expand_boxes, triangle_planes
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SCAD = Path(__file__).resolve().parent / "OpenSCAD" / "nucdeck_assembly.scad"
+
+# Required gap between parts (mm); matches materials.tolerance in config.yaml
+DEFAULT_CLEARANCE = 0.2
+
+# Pairs closer than this (mm) get their exact gap reported
+DEFAULT_REACH = 2.0
+
+# Gaps below this (mm) are faces resting on each other, not a clearance
+CONTACT_TOLERANCE = 1e-3
+
+# Edge end points closer than this to a plane count as lying in it, so
+# coplanar mating faces are reported as contact rather than interference.
+# Parts that went through manifold come back float32-rounded, so the
+# tolerance grows with coordinate magnitude (relative) above a floor (mm)
+PLANE_EPSILON = 1e-6
+PLANE_RELATIVE_EPSILON = 1e-5
+
+# Upper bound on triangle pairs evaluated at once, to keep memory flat
+MAX_PAIRS = 500_000
+
+# Inside-test rays are nudged off the triangle grid by this fraction of the
+# cell size so they never run exactly along the edges of CAD meshes
+RAY_JITTER = (1.3e-6, 2.9e-6)
+
+_worker_parts: Optional[List[trimesh.Trimesh]] = None
+
+
+def _init_worker(arrays):
+    global _worker_parts
+    _worker_parts = [trimesh.Trimesh(vertices=v, faces=f, process=False) for v, f in arrays]
+
+
+def _check_chunk(args):
+    pairs, clearance, reach = args
+    return [check_pair(_worker_parts[a], _worker_parts[b], clearance, reach) for a, b in pairs]
+
+
+def box_pairs(bounds: np.ndarray, reach: float) -> List[tuple]:
+    """Index pairs whose bounding boxes come within ``reach`` of each other"""
+    lower, upper = bounds[:, 0] - reach, bounds[:, 1]
+    overlap = np.all((lower[:, None] <= upper[None]) & (lower[None] <= upper[:, None]), axis=2)
+    return [(a, b) for a, b in combinations(range(len(bounds)), 2) if overlap[a, b]]
+
+
+def segment_distances(p1, q1, p2, q2):
+    """Closest distance and points between segment batches p1-q1 and p2-q2"""
+    d1, d2, r = q1 - p1, q2 - p2, p1 - p2
+    a = np.maximum(np.einsum('ij,ij->i', d1, d1), 1e-18)
+    e = np.maximum(np.einsum('ij,ij->i', d2, d2), 1e-18)
+    b = np.einsum('ij,ij->i', d1, d2)
+    c = np.einsum('ij,ij->i', d1, r)
+    f = np.einsum('ij,ij->i', d2, r)
+
+    denom = a * e - b * b
+    with np.errstate(divide='ignore', invalid='ignore'):
+        s = np.where(denom > 1e-12 * a * e, np.clip((b * f - c * e) / denom, 0, 1), 0.0)
+    t = (b * s + f) / e
+    s = np.where(t < 0, np.clip(-c / a, 0, 1), np.where(t > 1, np.clip((b - c) / a, 0, 1), s))
+    t = np.clip(t, 0, 1)
+
+    c1, c2 = p1 + d1 * s[:, None], p2 + d2 * t[:, None]
+    return np.linalg.norm(c1 - c2, axis=1), c1, c2
+
+
+def plane_tolerance(*triangles) -> float:
+    """Distance (mm) within which a point counts as lying in a plane, for these coordinates"""
+    magnitude = max((float(np.abs(t).max()) for t in triangles if len(t)), default=0.0)
+    return max(PLANE_EPSILON, PLANE_RELATIVE_EPSILON * magnitude)
+
+
+def _edge_crossings(edges_from, edges_to, planes, pair_index, epsilon=PLANE_EPSILON):
+    """
+    Pairs where any edge of one triangle passes through the other triangle,
+    and the points where those edges pierce it. End points within
+    ``epsilon`` of the plane count as lying in it. Piercings in the
+    triangle's interior are returned apart from those within ``epsilon`` of
+    its boundary, which solids that only touch along an edge also make:
+    ``(hit, pierced, boundary_hit, boundary_pierced)``.
+    """
+    normals, offsets, edge_planes = planes
+    normal, offset = normals[pair_index], offsets[pair_index]
+    scale = np.linalg.norm(normal, axis=1)
+    hit = np.zeros(len(pair_index), dtype=bool)
+    boundary_hit = np.zeros(len(pair_index), dtype=bool)
+    pierced, boundary_pierced = [], []
+    for k in range(3):
+        p, q = edges_from[:, k], edges_to[:, k]
+        sp = (np.einsum('ij,ij->i', normal, p) - offset) / scale
+        sq = (np.einsum('ij,ij->i', normal, q) - offset) / scale
+        crossing = ((sp > epsilon) & (sq < -epsilon)) | ((sp < -epsilon) & (sq > epsilon))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            point = p + (q - p) * (sp / (sp - sq))[:, None]
+        interior, on_triangle = crossing.copy(), crossing.copy()
+        for edge_normal, edge_offset in edge_planes:
+            edge_normal, edge_offset = edge_normal[pair_index], edge_offset[pair_index]
+            side = np.einsum('ij,ij->i', edge_normal, point) - edge_offset
+            inset = epsilon * np.linalg.norm(edge_normal, axis=1)
+            interior &= side > inset
+            on_triangle &= side >= -inset
+        on_boundary = on_triangle & ~interior
+        hit |= interior
+        boundary_hit |= on_boundary
+        pierced.append(point[interior])
+        boundary_pierced.append(point[on_boundary])
+    return hit, np.concatenate(pierced), boundary_hit & ~hit, np.concatenate(boundary_pierced)
+
+
+def points_inside(triangles: np.ndarray, points: np.ndarray) -> np.ndarray:
+    """
+    Which points lie inside the closed surface made of ``triangles``.
+
+    A +Z ray from every point is tested against the triangles sharing its
+    cell of an (x, y) grid, in bounded-size batches; a point is inside when
+    its ray crosses the surface an odd number of times. Points on the
+    surface itself are ambiguous, so callers test points set back from it.
+    """
+    inside = np.zeros(len(points), dtype=bool)
+    if len(triangles) == 0 or len(points) == 0:
+        return inside
+
+    xy = triangles[:, :, :2]
+    lo, hi = xy.min(axis=1), xy.max(axis=1)
+    cell = max(float(np.median((hi - lo).max(axis=1))), 1e-3)
+    base = lo.min(axis=0)
+    dims = np.append(np.floor((hi.max(axis=0) - base) / cell).astype(np.int64) + 1, 1)
+
+    def cells(values):
+        index = np.floor((values - base) / cell).astype(np.int64)
+        return np.column_stack([index, np.zeros(len(index), dtype=np.int64)])
+
+    tri_keys, tri_ids = expand_boxes(cells(lo), cells(hi), dims)
+    order = np.argsort(tri_keys, kind='stable')
+    tri_keys, tri_ids = tri_keys[order], tri_ids[order]
+
+    origins = points[:, :2] + np.array(RAY_JITTER) * cell
+    index = cells(origins)
+    within = np.all((index[:, :2] >= 0) & (index[:, :2] < dims[:2]), axis=1)
+    keys = (index[:, 0] * dims[1] + index[:, 1]) * dims[2]
+    first = np.searchsorted(tri_keys, keys, side='left')
+    counts = np.where(within, np.searchsorted(tri_keys, keys, side='right') - first, 0)
+    cumulative = np.cumsum(counts)
+
+    a, b, c = xy[:, 0], xy[:, 1], xy[:, 2]
+    det = (b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) - (c[:, 0] - a[:, 0]) * (b[:, 1] - a[:, 1])
+    crossings = np.zeros(len(points), dtype=np.int64)
+    start = 0
+    while start < len(points):
+        base_count = cumulative[start - 1] if start else 0
+        stop = max(int(np.searchsorted(cumulative, base_count + MAX_PAIRS, side='right')), start + 1)
+        batch_counts = counts[start:stop]
+        total = int(batch_counts.sum())
+        point = np.repeat(np.arange(start, stop), batch_counts)
+        offset = np.arange(total) - np.repeat(np.cumsum(batch_counts) - batch_counts, batch_counts)
+        tri = tri_ids[np.repeat(first[start:stop], batch_counts) + offset]
+        start = stop
+        if total == 0:
+            continue
+
+        # Barycentric weights of the ray in the projected triangle, then its height there
+        px, py = origins[point, 0], origins[point, 1]
+        ax, ay = a[tri, 0], a[tri, 1]
+        z = triangles[tri, :, 2]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            w1 = ((px - ax) * (c[tri, 1] - ay) - (c[tri, 0] - ax) * (py - ay)) / det[tri]
+            w2 = ((b[tri, 0] - ax) * (py - ay) - (px - ax) * (b[tri, 1] - ay)) / det[tri]
+            w0 = 1.0 - w1 - w2
+            height = w0 * z[:, 0] + w1 * z[:, 1] + w2 * z[:, 2]
+            hit = (np.abs(det[tri]) > 1e-12) & (w0 >= 0) & (w1 >= 0) & (w2 >= 0) & (height > points[point, 2])
+        crossings += np.bincount(point[hit], minlength=len(points))
+    return crossings % 2 == 1
+
+
+def set_back(triangles: np.ndarray, distance: float) -> np.ndarray:
+    """Triangle centroids moved ``distance`` against the face normal, into the solid they bound"""
+    normals = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+    normals /= np.maximum(np.linalg.norm(normals, axis=1), 1e-12)[:, None]
+    return triangles.mean(axis=1) - normals * distance
+
+
+def volumes_overlap(mesh_a: trimesh.Trimesh, mesh_b: trimesh.Trimesh, tri_a: np.ndarray, tri_b: np.ndarray,
+                    epsilon: float) -> bool:
+    """
+    Whether two closed parts share volume, from their nearby triangles.
+
+    Each triangle's centroid, set back ``2 * epsilon`` into its own part, is
+    tested against the other part; faces that only touch keep their set-back
+    points outside, while overlapping solids put some inside.
+    """
+    for mesh, triangles, other in ((mesh_a, tri_a, mesh_b), (mesh_b, tri_b, mesh_a)):
+        if len(triangles) and other.is_watertight and points_inside(other.triangles, set_back(triangles, 2 * epsilon)).any():
+            return True
+    return False
+
+
+def triangle_pairs(tri_a, tri_b, reach):
+    """
+    Yield batches of (a, b) triangle index pairs whose boxes come within ``reach``.
+
+    Boxes are binned into a uniform grid and joined on cell key; a pair is
+    emitted only from the cell holding the corner max(lower_a, lower_b), so
+    each pair appears exactly once however many cells the two boxes share.
+    """
+    lo_a, hi_a = tri_a.min(axis=1) - reach, tri_a.max(axis=1) + reach
+    lo_b, hi_b = tri_b.min(axis=1), tri_b.max(axis=1)
+    extent = np.median(np.concatenate([hi_a - lo_a, hi_b - lo_b]).max(axis=1))
+    cell = max(float(extent), reach, 1e-3)
+
+    base = np.minimum(lo_a.min(axis=0), lo_b.min(axis=0))
+    top = np.maximum(hi_a.max(axis=0), hi_b.max(axis=0))
+    dims = np.floor((top - base) / cell).astype(np.int64) + 1
+
+    def cells(points):
+        return np.floor((points - base) / cell).astype(np.int64)
+
+    b_keys, b_ids = expand_boxes(cells(lo_b), cells(hi_b), dims)
+    order = np.argsort(b_keys, kind='stable')
+    b_keys, b_ids = b_keys[order], b_ids[order]
+
+    a_keys, a_ids = expand_boxes(cells(lo_a), cells(hi_a), dims)
+    first = np.searchsorted(b_keys, a_keys, side='left')
+    counts = np.searchsorted(b_keys, a_keys, side='right') - first
+    cumulative = np.cumsum(counts)
+
+    start = 0
+    while start < len(a_keys):
+        base_count = cumulative[start - 1] if start else 0
+        stop = max(int(np.searchsorted(cumulative, base_count + MAX_PAIRS, side='right')), start + 1)
+        batch_counts = counts[start:stop]
+        total = int(batch_counts.sum())
+        start, batch_start = stop, start
+        if total == 0:
+            continue
+
+        key = np.repeat(a_keys[batch_start:stop], batch_counts)
+        a = np.repeat(a_ids[batch_start:stop], batch_counts)
+        offset = np.arange(total) - np.repeat(np.cumsum(batch_counts) - batch_counts, batch_counts)
+        b = b_ids[np.repeat(first[batch_start:stop], batch_counts) + offset]
+
+        reference = cells(np.maximum(lo_a[a], lo_b[b]))
+        keep = (reference[:, 0] * dims[1] + reference[:, 1]) * dims[2] + reference[:, 2] == key
+        keep &= np.all((lo_a[a] <= hi_b[b]) & (lo_b[b] <= hi_a[a]), axis=1)
+        yield a[keep], b[keep]
+
+
+def check_pair(mesh_a: trimesh.Trimesh, mesh_b: trimesh.Trimesh, clearance: float = DEFAULT_CLEARANCE,
+               reach: float = DEFAULT_REACH) -> Dict:
+    """
+    Interference and minimum gap between two placed parts.
+
+    Only triangles near the other part's bounding box are considered.
+    Triangle pairs within ``reach`` are tested for surface crossings
+    (an edge of one passing through the other) and, when nothing crosses,
+    for their exact distance from the six vertex/triangle and nine
+    edge/edge closest points. Edges that only pierce the other surface on a
+    triangle boundary, as coplanar faces do, count as crossings when the
+    two solids overlap (see ``volumes_overlap``). A part lying wholly
+    inside a closed part is reported as contained. ``gap`` is None when the
+    parts are further apart than ``reach``.
+    """
+    result = {'status': 'clear', 'gap': None, 'points': None, 'crossings': 0,
+              'region': None, 'contained': False, 'pairs_tested': 0}
+
+    def near(mesh, other):
+        lower, upper = other.bounds[0] - reach, other.bounds[1] + reach
+        triangles = mesh.triangles
+        keep = np.all((triangles.max(axis=1) >= lower) & (triangles.min(axis=1) <= upper), axis=1)
+        return triangles[keep]
+
+    tri_a, tri_b = near(mesh_a, mesh_b), near(mesh_b, mesh_a)
+    best = np.inf
+    if len(tri_a) and len(tri_b):
+        planes_a, planes_b = triangle_planes(tri_a), triangle_planes(tri_b)
+        epsilon = plane_tolerance(tri_a, tri_b)
+        region_lo, region_hi = np.full(3, np.inf), np.full(3, -np.inf)
+        boundary_lo, boundary_hi = np.full(3, np.inf), np.full(3, -np.inf)
+        boundary_crossings = 0
+
+        for a, b in triangle_pairs(tri_a, tri_b, reach):
+            result['pairs_tested'] += len(a)
+            ta, tb = tri_a[a], tri_b[b]
+            crossing_b, pierced_b, boundary_b, edge_b = _edge_crossings(tb, np.roll(tb, -1, axis=1), planes_a, a, epsilon)
+            crossing_a, pierced_a, boundary_a, edge_a = _edge_crossings(ta, np.roll(ta, -1, axis=1), planes_b, b, epsilon)
+            crossing = crossing_a | crossing_b
+            if crossing.any():
+                # The region spans where the surfaces actually cut each other
+                result['crossings'] += int(crossing.sum())
+                pierced = np.concatenate([pierced_a, pierced_b])
+                region_lo = np.minimum(region_lo, pierced.min(axis=0))
+                region_hi = np.maximum(region_hi, pierced.max(axis=0))
+            boundary = (boundary_a | boundary_b) & ~crossing
+            if boundary.any():
+                boundary_crossings += int(boundary.sum())
+                pierced = np.concatenate([edge_a, edge_b])
+                boundary_lo = np.minimum(boundary_lo, pierced.min(axis=0))
+                boundary_hi = np.maximum(boundary_hi, pierced.max(axis=0))
+            if result['crossings']:
+                continue
+
+            # Vertex/triangle closest points both ways, then edge/edge
+            n = len(a)
+            points = np.concatenate([ta.transpose(1, 0, 2).reshape(-1, 3), tb.transpose(1, 0, 2).reshape(-1, 3)])
+            targets = np.concatenate([np.tile(tb, (3, 1, 1)), np.tile(ta, (3, 1, 1))])
+            closest = trimesh.triangles.closest_point(targets, points)
+            distance = np.linalg.norm(points - closest, axis=1)
+            i = int(np.argmin(distance))
+            if distance[i] < best:
+                best = float(distance[i])
+                pair = (points[i], closest[i]) if i < 3 * n else (closest[i], points[i])
+                result['points'] = [p.tolist() for p in pair]
+
+            edge_a = np.repeat(np.arange(3), 3)
+            edge_b = np.tile(np.arange(3), 3)
+            p1 = ta[:, edge_a].transpose(1, 0, 2).reshape(-1, 3)
+            q1 = ta[:, (edge_a + 1) % 3].transpose(1, 0, 2).reshape(-1, 3)
+            p2 = tb[:, edge_b].transpose(1, 0, 2).reshape(-1, 3)
+            q2 = tb[:, (edge_b + 1) % 3].transpose(1, 0, 2).reshape(-1, 3)
+            distance, c1, c2 = segment_distances(p1, q1, p2, q2)
+            i = int(np.argmin(distance))
+            if distance[i] < best:
+                best = float(distance[i])
+                result['points'] = [c1[i].tolist(), c2[i].tolist()]
+
+        # Piercings only along triangle boundaries are either faces meeting
+        # flush or coplanar faces of overlapping solids; the volumes decide
+        if not result['crossings'] and boundary_crossings and volumes_overlap(mesh_a, mesh_b, tri_a, tri_b, epsilon):
+            result['crossings'] = boundary_crossings
+            region_lo, region_hi = boundary_lo, boundary_hi
+
+        if result['crossings']:
+            result.update(status='interference', gap=0.0, points=None,
+                          region=[region_lo.tolist(), region_hi.tolist()])
+            return result
+
+    # Nothing crosses: one part may still sit wholly inside the other
+    for inner, outer in ((mesh_a, mesh_b), (mesh_b, mesh_a)):
+        inside_box = np.all(inner.bounds[0] >= outer.bounds[0]) and np.all(inner.bounds[1] <= outer.bounds[1])
+        if (inside_box and len(inner.faces) and outer.is_watertight
+                and points_inside(outer.triangles, set_back(inner.triangles[:1], PLANE_EPSILON))[0]):
+            result.update(status='interference', gap=0.0, contained=True, points=None,
+                          region=inner.bounds.tolist())
+            return result
+
+    if np.isfinite(best) and best <= reach:
+        result['gap'] = best
+        if best <= CONTACT_TOLERANCE:
+            result['status'] = 'contact'
+        elif best < clearance:
+            result['status'] = 'tight'
+        else:
+            result['status'] = 'ok'
+    return result
+
+
+def check_assembly(parts: Sequence[Dict], clearance: float = DEFAULT_CLEARANCE, reach: float = DEFAULT_REACH,
+                   workers: Optional[int] = None) -> Dict:
+    """
+    Check every pair of placed parts (dicts with ``name`` and ``mesh``).
+
+    Pairs whose bounding boxes are further apart than ``reach`` are pruned;
+    the rest go through ``check_pair``, split across ``workers`` processes
+    when there is more than one pair. Returns the non-clear pair results,
+    interferences first, with broad/narrow-phase counts and timings.
+    """
+    import time
+
+    start = time.perf_counter()
+    bounds = np.array([part['mesh'].bounds for part in parts]) if parts else np.zeros((0, 2, 3))
+    candidates = box_pairs(bounds, reach)
+    broad_time = time.perf_counter() - start
+
+    workers = min(workers or 1, len(candidates))
+    start = time.perf_counter()
+    if workers > 1:
+        chunks = [(candidates[i::workers * 2], clearance, reach) for i in range(workers * 2)]
+        arrays = [(part['mesh'].vertices.view(np.ndarray), part['mesh'].faces.view(np.ndarray)) for part in parts]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(arrays,)) as pool:
+            checked = {}
+            for chunk, results in zip(chunks, pool.map(_check_chunk, chunks)):
+                checked.update(zip(chunk[0], results))
+        results = [checked[pair] for pair in candidates]
+    else:
+        results = [check_pair(parts[a]['mesh'], parts[b]['mesh'], clearance, reach) for a, b in candidates]
+    narrow_time = time.perf_counter() - start
+
+    severity = {'interference': 0, 'tight': 1, 'contact': 2, 'ok': 3}
+    pairs = []
+    for (a, b), result in zip(candidates, results):
+        if result['status'] != 'clear':
+            pairs.append(dict(result, a=parts[a]['name'], b=parts[b]['name']))
+    pairs.sort(key=lambda pair: (severity[pair['status']], pair['gap'] or 0.0))
+
+    return {
+        'parts': len(parts),
+        'pairs_total': len(parts) * (len(parts) - 1) // 2,
+        'pairs_checked': len(candidates),
+        'triangle_pairs': sum(result['pairs_tested'] for result in results),
+        'clearance': clearance,
+        'reach': reach,
+        'pairs': pairs,
+        'interferences': sum(pair['status'] == 'interference' for pair in pairs),
+        'tight': sum(pair['status'] == 'tight' for pair in pairs),
+        'broad_time': broad_time,
+        'narrow_time': narrow_time,
+    }
+
+
+def flush_fit_check() -> List[str]:
+    """
+    Check a phone-sized block sitting flush in a pocket cut by the CSG engine,
+    and identical boxes that share face planes.
+
+    The pocket walls come back float32-rounded, so this guards the plane
+    tolerance: the flush fit must be contact, and a block pushed 0.05 mm
+    into a wall or the floor must be interference. Boxes stacked or slid
+    into a twin along shared planes must be interference, and a twin set
+    face to face must be contact.
+    """
+    from csg_engine import get_engine
+
+    body = trimesh.creation.box([149.1, 151.7, 15.0])
+    body.apply_translation([0, 0, 7.5])
+    pocket = trimesh.creation.box([69.1, 151.7 + 2, 8.9])
+    pocket.apply_translation([0, 0, 3 + 8.9 / 2])
+    case = get_engine().difference(body, [pocket])
+
+    failures = []
+    for label, grow, sink, expected in (("flush", 0.0, 0.0, 'contact'),
+                                        ("into wall", 0.05, 0.0, 'interference'),
+                                        ("into floor", -0.5, 0.05, 'interference')):
+        phone = trimesh.creation.box([69.1 + 2 * grow, 151.7, 7.9])
+        phone.apply_translation([0, 0, 3 + 7.9 / 2 - sink])
+        status = check_pair(case, phone)['status']
+        if status != expected:
+            failures.append(f"{label}: expected {expected}, got {status}")
+
+    box = trimesh.creation.box([10.0, 10.0, 10.0])
+    for offset, expected in (([0, 0, 9], 'interference'), ([9, 0, 0], 'interference'),
+                             ([5, 5, 0], 'interference'), ([0, 0, 10], 'contact'), ([5, 5, 10], 'contact')):
+        twin = box.copy()
+        twin.apply_translation(offset)
+        status = check_pair(box, twin)['status']
+        if status != expected:
+            failures.append(f"box offset {offset}: expected {expected}, got {status}")
+    return failures
+
+
+def print_report(report: Dict):
+    """Print interfering pairs and clearance margins"""
+    print(f"Parts: {report['parts']}, pairs checked: {report['pairs_checked']} of {report['pairs_total']} "
+          f"({report['triangle_pairs']:,} triangle pairs), "
+          f"broad {report['broad_time'] * 1000:.0f} ms, narrow {report['narrow_time']:.2f}s")
+
+    for pair in report['pairs']:
+        if pair['status'] == 'interference':
+            lower, upper = np.array(pair['region'])
+            detail = ("contained" if pair['contained']
+                      else f"{pair['crossings']} crossing triangle pairs")
+            print(f"  ✗ {pair['a']} ↔ {pair['b']}: interference ({detail}) in "
+                  f"({lower[0]:.1f}, {lower[1]:.1f}, {lower[2]:.1f})–({upper[0]:.1f}, {upper[1]:.1f}, {upper[2]:.1f})")
+        else:
+            mark = {'tight': '⚠', 'contact': '•', 'ok': '✓'}[pair['status']]
+            x, y, z = pair['points'][0]
+            print(f"  {mark} {pair['a']} ↔ {pair['b']}: {pair['status']}, gap {pair['gap']:.3f} mm "
+                  f"(margin {pair['gap'] - report['clearance']:+.3f}) at ({x:.1f}, {y:.1f}, {z:.1f})")
+
+    if report['interferences'] or report['tight']:
+        print(f"{report['interferences']} interfering, {report['tight']} below {report['clearance']} mm clearance")
+    else:
+        print(f"No interference; all pairs within {report['reach']} mm meet {report['clearance']} mm clearance")
+
+
+def main():
+    import argparse
+    import json
+    import sys
+    import time
+
+    from scad_scene import parse_overrides, read_scene
+
+    parser = argparse.ArgumentParser(description="NucDeck assembly interference and clearance check")
+    parser.add_argument("scad_file", nargs="?", default=str(DEFAULT_SCAD), help="Assembly SCAD file")
+    parser.add_argument("-D", dest="defines", action="append", default=[], metavar="NAME=VALUE",
+                        help="Override a top-level SCAD variable (repeatable)")
+    parser.add_argument("--clearance", type=float, default=DEFAULT_CLEARANCE,
+                        help=f"Required gap between parts in mm (default: {DEFAULT_CLEARANCE})")
+    parser.add_argument("--reach", type=float, default=DEFAULT_REACH,
+                        help=f"Report gaps up to this distance in mm (default: {DEFAULT_REACH})")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Pair-checking processes")
+    parser.add_argument("--output", type=str, help="Write the report as JSON")
+    parser.add_argument("--self-check", action="store_true",
+                        help="Check that flush fits report contact and overlapping boxes interference, then exit")
+
+    args = parser.parse_args()
+
+    if args.self_check:
+        failures = flush_fit_check()
+        for failure in failures:
+            print(f"  ✗ {failure}")
+        print("Flush fit check failed" if failures else "Flush fit check passed")
+        sys.exit(1 if failures else 0)
+
+    start = time.perf_counter()
+    parts = read_scene(args.scad_file, parse_overrides(args.defines))
+    print(f"{os.path.basename(args.scad_file)}: {len(parts)} parts placed in {time.perf_counter() - start:.2f}s")
+
+    report = check_assembly(parts, args.clearance, args.reach, args.workers)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Assembly report saved to {args.output}")
+
+    sys.exit(1 if report['interferences'] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+import re
+import struct
+import zlib
+
+import numpy as np
+
+# Colours matching OpenSCAD's default "Cornfield" scheme
+BACKGROUND_COLOR = np.array([255, 255, 229], dtype=np.float64)
+MODEL_COLOR = np.array([249, 215, 44], dtype=np.float64)
+
+# Binary STL triangle record: normal, three vertices, attribute byte count
+STL_RECORD = np.dtype(
+    [("normal", "<f4", (3,)), ("vertices", "<f4", (3, 3)), ("attributes", "<u2")]
+)
+
+# Upper bound on candidate pixels tested at once, to keep memory flat
+MAX_CANDIDATES = 4_000_000
+
+
+def read_stl(path: str) -> np.ndarray:
+    """Read an ASCII or binary STL into an (n, 3, 3) array of triangles."""
+    with open(path, "rb") as f:
+        data = f.read()
+
+    if len(data) >= 84:
+        count = struct.unpack("<I", data[80:84])[0]
+        if 84 + count * STL_RECORD.itemsize == len(data):
+            records = np.frombuffer(data, dtype=STL_RECORD, count=count, offset=84)
+            return records["vertices"].astype(np.float64)
+
+    coords = re.findall(rb"vertex\s+(\S+)\s+(\S+)\s+(\S+)", data)
+    return np.array(coords, dtype=np.float64).reshape(-1, 3, 3)
+
+
+def write_png(path: str, image: np.ndarray):
+    """Write an (h, w, 3) uint8 RGB image as a PNG file."""
+    height, width, _ = image.shape
+    raw = np.zeros((height, width * 3 + 1), dtype=np.uint8)  # filter byte 0 per row
+    raw[:, 1:] = image.reshape(height, -1)
+
+    def chunk(tag: bytes, payload: bytes) -> bytes:
+        crc = zlib.crc32(tag + payload) & 0xFFFFFFFF
+        return struct.pack(">I", len(payload)) + tag + payload + struct.pack(">I", crc)
+
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)))
+        f.write(chunk(b"IDAT", zlib.compress(raw.tobytes(), 6)))
+        f.write(chunk(b"IEND", b""))
+
+
+def camera_basis(azimuth: float = 25.0, elevation: float = 35.0):
+    """Return (right, up, forward) unit vectors for an orthographic camera above the front-right."""
+    az, el = np.radians(azimuth), np.radians(elevation)
+    eye = np.array([np.sin(az) * np.cos(el), -np.cos(az) * np.cos(el), np.sin(el)])
+    forward = -eye
+    right = np.cross(forward, [0.0, 0.0, 1.0])
+    right /= np.linalg.norm(right)
+    up = np.cross(right, forward)
+    return right, up, forward
+
+
+def rasterize(triangles: np.ndarray, width: int = 512, height: int = 512,
+              azimuth: float = 25.0, elevation: float = 35.0, margin: float = 0.05) -> np.ndarray:
+    """
+    Render triangles with a z-buffer and flat shading, framed like OpenSCAD's view-all.
+
+    Every triangle's bounding box is expanded into candidate pixels in one
+    vectorized pass, so the cost scales with covered pixels rather than with a
+    Python loop over triangles.
+    """
+    if len(triangles) == 0:
+        raise ValueError("mesh has no triangles")
+
+    right, up, forward = camera_basis(azimuth, elevation)
+
+    # Flat shading from a light slightly above the eye; abs() tolerates bad winding
+    normals = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+    lengths = np.linalg.norm(normals, axis=1)
+    normals /= np.where(lengths > 0, lengths, 1.0)[:, None]
+    light = -forward + 0.5 * up
+    light /= np.linalg.norm(light)
+    intensity = 0.35 + 0.65 * np.abs(normals @ light)
+
+    # Orthographic projection fitted to the image
+    points = triangles.reshape(-1, 3)
+    screen_x = points @ right
+    screen_y = points @ up
+    depth = (points @ forward).reshape(-1, 3)
+    span = max(np.ptp(screen_x), np.ptp(screen_y) * width / height, 1e-9)
+    scale = width * (1 - 2 * margin) / span
+    x = ((screen_x - (screen_x.min() + screen_x.max()) / 2) * scale + width / 2).reshape(-1, 3)
+    y = (height / 2 - (screen_y - (screen_y.min() + screen_y.max()) / 2) * scale).reshape(-1, 3)
+
+    # Edge function coefficients: w_i(px, py) = a_i * px + b_i * py + c_i
+    x0, x1, x2 = x.T
+    y0, y1, y2 = y.T
+    a = np.stack([y1 - y2, y2 - y0, y0 - y1], axis=1)
+    b = np.stack([x2 - x1, x0 - x2, x1 - x0], axis=1)
+    c = np.stack([x1 * y2 - x2 * y1, x2 * y0 - x0 * y2, x0 * y1 - x1 * y0], axis=1)
+    area = c.sum(axis=1)
+    visible = np.abs(area) > 1e-12
+    sign = np.sign(area)[:, None]
+    a, b, c = a * sign, b * sign, c * sign
+    area = np.abs(area)
+
+    # Pixel bounding box of each triangle
+    bx0 = np.clip(np.floor(x.min(axis=1)), 0, width).astype(np.int64)
+    bx1 = np.clip(np.ceil(x.max(axis=1)), 0, width).astype(np.int64)
+    by0 = np.clip(np.floor(y.min(axis=1)), 0, height).astype(np.int64)
+    by1 = np.clip(np.ceil(y.max(axis=1)), 0, height).astype(np.int64)
+    box_w = bx1 - bx0
+    box_h = by1 - by0
+    box_area = np.where(visible, box_w * box_h, 0)
+
+    zbuffer = np.full(width * height, np.inf)
+    shade = np.zeros(width * height)
+
+    # Process triangles in chunks bounded by total candidate pixels
+    cumulative = np.cumsum(box_area)
+    chunk_start = 0
+    while chunk_start < len(triangles):
+        base = cumulative[chunk_start - 1] if chunk_start else 0
+        chunk_end = max(int(np.searchsorted(cumulative, base + MAX_CANDIDATES, side="right")), chunk_start + 1)
+        tri = np.arange(chunk_start, chunk_end)
+        chunk_start = chunk_end
+
+        counts = box_area[tri]
+        total = int(counts.sum())
+        if total == 0:
+            continue
+
+        tri_idx = np.repeat(tri, counts)
+        offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        px = bx0[tri_idx] + offsets % box_w[tri_idx]
+        py = by0[tri_idx] + offsets // box_w[tri_idx]
+        cx = px + 0.5
+        cy = py + 0.5
+
+        w = a[tri_idx] * cx[:, None] + b[tri_idx] * cy[:, None] + c[tri_idx]
+        inside = (w >= 0).all(axis=1)
+        if not inside.any():
+            continue
+
+        tri_idx, px, py, w = tri_idx[inside], px[inside], py[inside], w[inside]
+        z = (w * depth[tri_idx]).sum(axis=1) / area[tri_idx]
+        pixel = py * width + px
+
+        # Nearest fragment per pixel within this chunk, then merge with the z-buffer
+        order = np.lexsort((z, pixel))
+        pixel_sorted = pixel[order]
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = pixel_sorted[1:] != pixel_sorted[:-1]
+        nearest = order[first]
+
+        pixel, z, tri_idx = pixel[nearest], z[nearest], tri_idx[nearest]
+        closer = z < zbuffer[pixel]
+        zbuffer[pixel[closer]] = z[closer]
+        shade[pixel[closer]] = intensity[tri_idx[closer]]
+
+    covered = np.isfinite(zbuffer)
+    image = np.tile(BACKGROUND_COLOR, (width * height, 1))
+    image[covered] = MODEL_COLOR * shade[covered, None]
+    return image.reshape(height, width, 3).round().astype(np.uint8)
+
+
+def render_stl_to_png(stl_path: str, png_path: str, width: int = 512, height: int = 512):
+    """Rasterize an STL file to a PNG preview without re-evaluating the model."""
+    write_png(png_path, rasterize(read_stl(stl_path), width, height))
@@ -1,5 +1,8 @@
 import base64
 import os
+import subprocess
+
+from rasterize import render_stl_to_png
 
 
 # Function to encode the image
@@ -26,11 +29,26 @@ def get_last_generated_scad(generation_id: str):
 # uses openscad to render the code.
 # creates .scad, .png, and .stl files
 # places them in /generated/{generation_id}/{iteration}/output.{filetype}
+# the model is evaluated once: openscad exports the STL and the PNG is
+# rasterized from that mesh instead of running a second CSG evaluation
 def render_scad(code: str, generation_id: str, iteration: int) -> bool:
-    os.system(f"mkdir -p generated/{generation_id}/{iteration}")
-    os.system(f"echo '{code}' > generated/{generation_id}/{iteration}/output.scad")
-    png_command = f"openscad -o generated/{generation_id}/{iteration}/output.png generated/{generation_id}/{iteration}/output.scad"
-    stl_command = f"openscad -o generated/{generation_id}/{iteration}/output.stl generated/{generation_id}/{iteration}/output.scad"
-    png_success = os.system(png_command) == 0
-    stl_success = os.system(stl_command) == 0
-    return png_success and stl_success
+    output_dir = f"generated/{generation_id}/{iteration}"
+    os.makedirs(output_dir, exist_ok=True)
+    scad_path = f"{output_dir}/output.scad"
+    stl_path = f"{output_dir}/output.stl"
+    png_path = f"{output_dir}/output.png"
+
+    with open(scad_path, "w") as file:
+        file.write(code)
+
+    stl_success = subprocess.run(["openscad", "-o", stl_path, scad_path]).returncode == 0
+    if not stl_success:
+        return False
+
+    try:
+        render_stl_to_png(stl_path, png_path)
+        return True
+    except Exception as e:
+        # e.g. an empty top-level object: let openscad draw the preview itself
+        print("could not rasterize STL, falling back to openscad png", e)
+        return subprocess.run(["openscad", "-o", png_path, scad_path]).returncode == 0
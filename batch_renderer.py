@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+NucDeck Batch Renderer
+Runs OpenSCAD STL/PNG renders as independent jobs on a bounded process pool
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+from typing import Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# One automator per worker process, so the OpenSCAD version probe and the
+# render cache's dependency hashes are reused across jobs
+_worker_automators: Dict[tuple, object] = {}
+
+
+def _get_worker_automator(workspace_path: str, use_cache: bool):
+    key = (workspace_path, use_cache)
+    if key not in _worker_automators:
+        from cad_automator import NucDeckCADAutomator
+        _worker_automators[key] = NucDeckCADAutomator(workspace_path, use_cache=use_cache)
+    return _worker_automators[key]
+
+
+def run_render_job(job: Dict, workspace_path: str, use_cache: bool = True) -> Dict:
+    """Render a single STL or PNG job; runs inside a pool worker"""
+    automator = _get_worker_automator(workspace_path, use_cache)
+    render = automator.render_stl if job['kind'] == 'stl' else automator.render_png_preview
+
+    start = time.perf_counter()
+    success = render(job['scad_file'], job['output'], job.get('params'), timeout=job['timeout'])
+    duration = time.perf_counter() - start
+
+    error = automator.last_error
+    if success:
+        status = 'ok'
+    elif error and error.startswith('timed out'):
+        status = 'timeout'
+    else:
+        status = 'failed'
+
+    return {**job, 'status': status, 'duration': duration, 'error': error, 'worker_pid': os.getpid()}
+
+
+class BatchRenderer:
+    """
+    Bounded-concurrency render engine.
+
+    Every job is an independent OpenSCAD invocation with its own timeout, so a
+    variant's STL and PNG render in parallel with each other and with every
+    other variant. ``cancel()`` drops all jobs that have not started yet.
+    """
+
+    def __init__(self, workspace_path: str, max_workers: Optional[int] = None,
+                 use_cache: bool = True):
+        self.workspace_path = str(workspace_path)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.use_cache = use_cache
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """Cancel every job that has not started yet; running jobs finish or time out"""
+        self._cancelled.set()
+
+    def _collect(self, future, job: Dict) -> Dict:
+        try:
+            result = future.result()
+        except Exception as e:
+            result = {**job, 'status': 'failed', 'duration': 0.0, 'error': str(e)}
+
+        logger.info(f"  {result['status']:>9}: {job['variant']} {job['kind']} ({result['duration']:.1f}s)")
+        return result
+
+    def run(self, jobs: List[Dict]) -> Dict:
+        """
+        Run jobs and return a manifest.
+
+        Each job is a dict with ``variant``, ``kind`` ('stl' or 'png'),
+        ``scad_file``, ``params``, ``output`` and ``timeout`` keys.
+        """
+        self._cancelled.clear()
+        started_at = datetime.now().isoformat(timespec='seconds')
+        start = time.perf_counter()
+        results = []
+
+        logger.info(f"Rendering {len(jobs)} jobs on {self.max_workers} workers")
+
+        with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+            future_jobs = {
+                pool.submit(run_render_job, job, self.workspace_path, self.use_cache): job
+                for job in jobs
+            }
+            pending = set(future_jobs)
+
+            while pending:
+                try:
+                    done, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+                except KeyboardInterrupt:
+                    logger.warning("Batch interrupted - cancelling queued jobs")
+                    self.cancel()
+                    done = set()
+
+                for future in done:
+                    results.append(self._collect(future, future_jobs[future]))
+
+                if self._cancelled.is_set():
+                    for future in list(pending):
+                        if future.cancel():
+                            pending.discard(future)
+                            job = future_jobs[future]
+                            results.append({**job, 'status': 'cancelled', 'duration': 0.0, 'error': None})
+
+        wall_time = time.perf_counter() - start
+        order = {job['output']: i for i, job in enumerate(jobs)}
+        results.sort(key=lambda result: order[result['output']])
+
+        return {
+            'started_at': started_at,
+            'workers': self.max_workers,
+            'wall_time': wall_time,
+            'total_job_time': sum(result['duration'] for result in results),
+            'cancelled': self._cancelled.is_set(),
+            'jobs': results,
+            'failures': [result for result in results if result['status'] != 'ok'],
+        }
@@ -13,12 +13,34 @@ from typing import Dict, List, Tuple, Optional
 import argparse
 import logging
 
+from batch_renderer import BatchRenderer
+from render_cache import RenderCache
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Top-level SCAD assignments start at column 0, e.g. "phone_width = 69.1;"
+SCAD_ASSIGNMENT_RE = re.compile(r'^(\$?[A-Za-z_]\w*)\s*=\s*([^;]+);', re.MULTILINE)
+SCAD_IDENTIFIER_RE = re.compile(r'^\$?[A-Za-z_]\w*$')
+
+def format_scad_value(value) -> str:
+    """Format a Python value as an OpenSCAD literal"""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        if value != value or value in (float('inf'), float('-inf')):
+            raise ValueError(f"Cannot pass non-finite number to OpenSCAD: {value}")
+        return repr(value)
+    if isinstance(value, str):
+        return json.dumps(value)
+    if isinstance(value, (list, tuple)):
+        return "[" + ", ".join(format_scad_value(item) for item in value) + "]"
+    raise ValueError(f"Unsupported OpenSCAD parameter type: {type(value).__name__}")
+
 class NucDeckCADAutomator:
-    def __init__(self, workspace_path: str = "/workspaces/scad"):
+    def __init__(self, workspace_path: str = "/workspaces/scad", use_cache: bool = True,
+                 cache_max_bytes: int = 1 << 30):
         self.workspace_path = Path(workspace_path)
         self.openscad_dir = self.workspace_path / "OpenSCAD"
         self.output_dir = self.workspace_path / "output"
@@ -28,6 +50,13 @@ class NucDeckCADAutomator:
         # Create output directory if it doesn't exist
         self.output_dir.mkdir(exist_ok=True)
         
+        # Content-addressed cache of previous renders
+        self.render_cache = RenderCache(self.output_dir / ".render_cache", cache_max_bytes) if use_cache else None
+        self.openscad_version = None
+        self.last_error = None
+        self._declared_params = {}
+        self._warned_params = set()
+        
         # Default parameters
         self.default_params = {
             "phone_width": 69.1,
@@ -52,103 +81,152 @@ class NucDeckCADAutomator:
     
     def check_openscad_installed(self) -> bool:
         """Check if OpenSCAD is installed and available"""
+        if self.openscad_version is not None:
+            return True
+        
         try:
             result = subprocess.run(['openscad', '--version'], 
                                   capture_output=True, text=True, timeout=10)
-            logger.info(f"OpenSCAD found: {result.stdout.strip()}")
+            # OpenSCAD prints its version on stderr
+            self.openscad_version = (result.stdout or result.stderr).strip()
+            logger.info(f"OpenSCAD found: {self.openscad_version}")
             return True
         except (subprocess.TimeoutExpired, FileNotFoundError):
             logger.error("OpenSCAD not found. Please install OpenSCAD.")
+            self.last_error = "OpenSCAD not found"
             return False
     
-    def generate_scad_with_params(self, params: Dict, output_file: Optional[str] = None) -> str:
-        """Generate a custom SCAD file with specified parameters"""
-        if output_file is None:
-            output_file = self.openscad_dir / "nucdeck_custom.scad"
+    def get_declared_params(self, scad_file: str) -> Dict[str, str]:
+        """Return the top-level assignments declared in a SCAD file"""
+        scad_path = Path(scad_file)
+        mtime = scad_path.stat().st_mtime_ns
+        cached = self._declared_params.get(str(scad_path))
+        if cached and cached[0] == mtime:
+            return cached[1]
         
-        # Read the base SCAD file
-        with open(self.main_scad_file, 'r') as f:
-            scad_content = f.read()
+        with open(scad_path, 'r') as f:
+            declared = {name: value.strip() for name, value in SCAD_ASSIGNMENT_RE.findall(f.read())}
         
-        # Replace parameter values
-        for param, value in params.items():
-            if isinstance(value, bool):
-                value_str = "true" if value else "false"
-            elif isinstance(value, str):
-                value_str = f'"{value}"'
-            else:
-                value_str = str(value)
-            
-            # Use regex to replace parameter assignments
-            pattern = rf'^({param}\s*=\s*)[^;]+;'
-            replacement = rf'\g<1>{value_str};'
-            scad_content = re.sub(pattern, replacement, scad_content, flags=re.MULTILINE)
+        self._declared_params[str(scad_path)] = (mtime, declared)
+        return declared
+    
+    def validate_params(self, scad_file: str, params: Dict, strict: bool = False) -> Dict:
+        """
+        Keep only parameters that the SCAD file declares.
+        
+        Undeclared names are logged and dropped, or raise ValueError when strict.
+        """
+        declared = self.get_declared_params(scad_file)
+        
+        invalid = [name for name in params if not SCAD_IDENTIFIER_RE.match(name)]
+        if invalid:
+            raise ValueError(f"Invalid OpenSCAD parameter names: {invalid}")
+        
+        unknown = [name for name in params if name not in declared]
+        if unknown:
+            message = f"Parameters not declared in {Path(scad_file).name}: {', '.join(unknown)}"
+            if strict:
+                raise ValueError(message)
+            if message not in self._warned_params:
+                self._warned_params.add(message)
+                logger.warning(f"{message} (ignored)")
         
-        # Write the custom SCAD file
-        with open(output_file, 'w') as f:
-            f.write(scad_content)
+        return {name: value for name, value in params.items() if name in declared}
+    
+    def build_param_overrides(self, scad_file: str, params: Optional[Dict], strict: bool = False) -> List[str]:
+        """Build OpenSCAD '-D name=value' arguments for the given parameters"""
+        overrides = []
+        for name, value in sorted(self.validate_params(scad_file, params or {}, strict).items()):
+            overrides.extend(['-D', f"{name}={format_scad_value(value)}"])
+        return overrides
+    
+    def get_render_cache_key(self, scad_file: str, output_file: str, options: List[str]) -> Optional[str]:
+        """Compute the render cache key for a SCAD file and its export options"""
+        if self.render_cache is None:
+            return None
+        
+        scad_path = Path(scad_file)
+        with open(scad_path, 'r') as f:
+            scad_content = f.read()
         
-        logger.info(f"Generated custom SCAD file: {output_file}")
-        return str(output_file)
+        export_options = options + [Path(output_file).suffix.lower()]
+        return self.render_cache.make_key(scad_content, scad_path.parent, self.openscad_version, export_options)
     
-    def render_stl(self, scad_file: str, output_stl: str, params: Dict = None) -> bool:
+    def render_stl(self, scad_file: str, output_stl: str, params: Dict = None, timeout: float = 300) -> bool:
         """Render SCAD file to STL using OpenSCAD"""
+        self.last_error = None
         if not self.check_openscad_installed():
             return False
         
-        if params:
-            scad_file = self.generate_scad_with_params(params)
+        # Parameters are passed as -D overrides so concurrent renders never share an input file
+        options = self.build_param_overrides(scad_file, params)
+        
+        cache_key = self.get_render_cache_key(scad_file, output_stl, options)
+        if cache_key and self.render_cache.fetch(cache_key, output_stl):
+            return True
         
         cmd = [
             'openscad',
+            *options,
             '-o', str(output_stl),
             str(scad_file)
         ]
         
         try:
             logger.info(f"Rendering STL: {output_stl}")
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
             
             if result.returncode == 0:
                 logger.info(f"Successfully rendered: {output_stl}")
+                if cache_key:
+                    self.render_cache.store(cache_key, output_stl)
                 return True
             else:
                 logger.error(f"OpenSCAD error: {result.stderr}")
+                self.last_error = result.stderr.strip() or f"openscad exited with code {result.returncode}"
                 return False
                 
         except subprocess.TimeoutExpired:
             logger.error("OpenSCAD rendering timed out")
+            self.last_error = f"timed out after {timeout}s"
             return False
     
-    def render_png_preview(self, scad_file: str, output_png: str, params: Dict = None) -> bool:
+    def render_png_preview(self, scad_file: str, output_png: str, params: Dict = None, timeout: float = 180) -> bool:
         """Render SCAD file to PNG preview using OpenSCAD"""
+        self.last_error = None
         if not self.check_openscad_installed():
             return False
         
-        if params:
-            scad_file = self.generate_scad_with_params(params)
+        options = ['--render', '--imgsize=800,600'] + self.build_param_overrides(scad_file, params)
+        
+        cache_key = self.get_render_cache_key(scad_file, output_png, options)
+        if cache_key and self.render_cache.fetch(cache_key, output_png):
+            return True
         
         cmd = [
             'openscad',
-            '--render',
-            '--imgsize=800,600',
+            *options,
             '-o', str(output_png),
             str(scad_file)
         ]
         
         try:
             logger.info(f"Rendering preview: {output_png}")
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=180)
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
             
             if result.returncode == 0:
                 logger.info(f"Successfully rendered preview: {output_png}")
+                if cache_key:
+                    self.render_cache.store(cache_key, output_png)
                 return True
             else:
                 logger.error(f"OpenSCAD preview error: {result.stderr}")
+                self.last_error = result.stderr.strip() or f"openscad exited with code {result.returncode}"
                 return False
                 
         except subprocess.TimeoutExpired:
             logger.error("OpenSCAD preview rendering timed out")
+            self.last_error = f"timed out after {timeout}s"
             return False
     
     def ai_suggest_modifications(self, user_prompt: str) -> Dict:
@@ -202,27 +280,41 @@ class NucDeckCADAutomator:
         logger.info(f"AI suggestions for '{user_prompt}': {suggestions}")
         return suggestions
     
-    def batch_render_variants(self, variants: List[Tuple[str, Dict]]) -> List[str]:
-        """Render multiple design variants"""
-        rendered_files = []
+    def batch_render_variants(self, variants: List[Tuple[str, Dict]], max_workers: Optional[int] = None,
+                              stl_timeout: float = 300, png_timeout: float = 180) -> List[str]:
+        """Render multiple design variants in parallel, one job per STL and PNG"""
+        if not self.check_openscad_installed():
+            return []
         
+        jobs = []
         for variant_name, params in variants:
             # Merge with default parameters
             merged_params = {**self.default_params, **params}
+            scad_file = str(self.main_scad_file)
             
             # Generate output filenames
             stl_output = self.output_dir / f"nucdeck_{variant_name}.stl"
             png_output = self.output_dir / f"nucdeck_{variant_name}.png"
             
-            # Render STL and PNG
-            if self.render_stl(str(self.main_scad_file), str(stl_output), merged_params):
-                rendered_files.append(str(stl_output))
-            
-            self.render_png_preview(str(self.main_scad_file), str(png_output), merged_params)
+            jobs.append({'variant': variant_name, 'kind': 'stl', 'scad_file': scad_file,
+                         'params': merged_params, 'output': str(stl_output), 'timeout': stl_timeout})
+            jobs.append({'variant': variant_name, 'kind': 'png', 'scad_file': scad_file,
+                         'params': merged_params, 'output': str(png_output), 'timeout': png_timeout})
+        
+        renderer = BatchRenderer(self.workspace_path, max_workers, use_cache=self.render_cache is not None)
+        manifest = renderer.run(jobs)
+        
+        manifest_file = self.output_dir / "batch_manifest.json"
+        with open(manifest_file, 'w') as f:
+            json.dump(manifest, f, indent=2)
         
-        return rendered_files
+        logger.info(f"Batch finished in {manifest['wall_time']:.1f}s "
+                    f"({manifest['total_job_time']:.1f}s of render time, {len(manifest['failures'])} failures)")
+        logger.info(f"Batch manifest: {manifest_file}")
+        
+        return [job['output'] for job in manifest['jobs'] if job['kind'] == 'stl' and job['status'] == 'ok']
     
-    def generate_design_report(self, params: Dict) -> str:
+    def generate_design_report(self, params: Dict, output_name: str = 'custom') -> str:
         """Generate a design report with specifications"""
         report = f"""
 # NucDeck Design Report
@@ -240,9 +332,9 @@ Generated: {os.popen('date').read().strip()}
 - Grip Extension: {params.get('grip_offset', 0):.1f} mm
 
 ## Files Generated
-- SCAD: nucdeck_custom.scad
-- STL: nucdeck_custom.stl
-- Preview: nucdeck_custom.png
+- SCAD: {self.main_scad_file.name} (parameters passed as -D overrides)
+- STL: nucdeck_{output_name}.stl
+- Preview: nucdeck_{output_name}.png
 """
         
         report_file = self.output_dir / "design_report.md"
@@ -259,10 +351,18 @@ def main():
     parser.add_argument('--exploded', action='store_true', help='Generate exploded view')
     parser.add_argument('--batch', action='store_true', help='Render common variants')
     parser.add_argument('--output-name', type=str, default='custom', help='Output filename prefix')
+    parser.add_argument('--workers', type=int, help='Parallel render jobs for --batch (default: CPU count)')
+    parser.add_argument('--job-timeout', type=float, default=300, help='Per-job STL render timeout in seconds for --batch')
+    parser.add_argument('--png-timeout', type=float, default=180, help='Per-job PNG preview timeout in seconds for --batch')
+    parser.add_argument('--no-cache', action='store_true', help='Always re-render, bypassing the render cache')
+    parser.add_argument('--clear-cache', action='store_true', help='Empty the render cache before rendering')
     
     args = parser.parse_args()
     
-    automator = NucDeckCADAutomator()
+    automator = NucDeckCADAutomator(use_cache=not args.no_cache)
+    
+    if args.clear_cache and automator.render_cache:
+        automator.render_cache.clear()
     
     if args.batch:
         # Render common variants
@@ -278,7 +378,9 @@ def main():
         ]
         
         logger.info("Rendering batch variants...")
-        rendered_files = automator.batch_render_variants(variants)
+        rendered_files = automator.batch_render_variants(
+            variants, max_workers=args.workers, stl_timeout=args.job_timeout, png_timeout=args.png_timeout
+        )
         logger.info(f"Rendered {len(rendered_files)} variants")
         
     else:
@@ -304,8 +406,11 @@ def main():
                 automator.render_png_preview(str(automator.main_scad_file), str(png_output), params)
         
         # Generate design report
-        report_file = automator.generate_design_report(params)
+        report_file = automator.generate_design_report(params, args.output_name)
         logger.info(f"Design report generated: {report_file}")
+    
+    if automator.render_cache:
+        logger.info(f"Render cache: {automator.render_cache.stats()}")
 
 if __name__ == "__main__":
     main()
@@ -4,11 +4,13 @@ Enhanced Feature Analysis for NucDeck Front Cover
 Provides detailed analysis and manual verification guidance
 """
 
-import trimesh
-import numpy as np
 import os
 import json
 
+from analysis import compute
+from height_map import DEFAULT_RESOLUTION
+from mesh_cache import load_mesh
+
 def analyze_mesh_geometry_detailed(mesh):
     """
     Detailed geometric analysis of the mesh to understand its structure
@@ -16,126 +18,58 @@ def analyze_mesh_geometry_detailed(mesh):
     print("DETAILED MESH GEOMETRY ANALYSIS")
     print("=" * 50)
     
-    bounds = mesh.bounds
-    dimensions = bounds[1] - bounds[0]
+    results = compute(mesh, ['properties', 'dimensions', 'z_levels', 'vertex_density'])
+    props = results['properties']
+    dimensions = results['dimensions']
     
     print(f"Overall dimensions: {dimensions[0]:.1f} × {dimensions[1]:.1f} × {dimensions[2]:.1f} mm")
-    print(f"Volume: {mesh.volume:,.0f} mm³")
-    print(f"Surface area: {mesh.area:,.0f} mm²")
-    print(f"Watertight: {mesh.is_watertight}")
-    
-    # Analyze vertex distribution to understand complexity
-    vertices = mesh.vertices
+    print(f"Volume: {props['volume']:,.0f} mm³")
+    print(f"Surface area: {props['area']:,.0f} mm²")
+    print(f"Watertight: {props['watertight']}")
     
     # Z-level analysis (features typically exist at specific heights)
-    z_coords = vertices[:, 2]
-    z_unique, z_counts = np.unique(np.round(z_coords, 1), return_counts=True)
-    
     print(f"\nZ-level analysis (top 10 most detailed levels):")
-    top_z_indices = np.argsort(z_counts)[-10:]
-    for idx in reversed(top_z_indices):
-        z_level = z_unique[idx]
-        vertex_count = z_counts[idx]
-        print(f"  Z={z_level:6.1f}mm: {vertex_count:4d} vertices")
+    for level in results['z_levels']['top'][:10]:
+        print(f"  Z={level['z']:6.1f}mm: {level['vertices']:4d} vertices")
     
     # Look for regions with high vertex density (likely feature areas)
     print(f"\nHigh-density regions analysis:")
-    
-    # Divide mesh into grid and count vertices per cell
-    x_bins = np.linspace(bounds[0][0], bounds[1][0], 20)
-    y_bins = np.linspace(bounds[0][1], bounds[1][1], 10)
-    
-    for i in range(len(x_bins)-1):
-        for j in range(len(y_bins)-1):
-            x_mask = (vertices[:, 0] >= x_bins[i]) & (vertices[:, 0] < x_bins[i+1])
-            y_mask = (vertices[:, 1] >= y_bins[j]) & (vertices[:, 1] < y_bins[j+1])
-            region_vertices = vertices[x_mask & y_mask]
-            
-            if len(region_vertices) > 100:  # High density region
-                x_center = (x_bins[i] + x_bins[i+1]) / 2
-                y_center = (y_bins[j] + y_bins[j+1]) / 2
-                z_range = region_vertices[:, 2].max() - region_vertices[:, 2].min()
-                print(f"  Region ({x_center:6.1f}, {y_center:4.1f}): {len(region_vertices):4d} vertices, Z-span={z_range:.1f}mm")
+    for region in results['vertex_density']:
+        x_center, y_center = region['center']
+        print(f"  Region ({x_center:6.1f}, {y_center:4.1f}): {region['vertices']:4d} vertices, Z-span={region['z_span']:.1f}mm")
 
-def detect_holes_and_cutouts(mesh):
+def detect_holes_and_cutouts(mesh, resolution=DEFAULT_RESOLUTION, min_depth=1.0, min_area=1.0):
     """
     Detect holes and cutouts in the mesh using geometric analysis
+    
+    The mesh is rasterized into a first/last-hit height map along its
+    thinnest axis at ``resolution`` mm, and through holes and pockets are
+    segmented from it as connected components, one entry per feature.
     """
     print("\nHOLE AND CUTOUT DETECTION")
     print("=" * 50)
     
-    # Use ray casting to detect holes
-    bounds = mesh.bounds
-    
-    # Create a grid of rays from above the mesh
-    x_test = np.linspace(bounds[0][0] + 5, bounds[1][0] - 5, 50)
-    y_test = np.linspace(bounds[0][1] + 5, bounds[1][1] - 5, 20)
-    z_start = bounds[1][2] + 10  # Start above the mesh
-    
-    ray_origins = []
-    ray_directions = []
-    
-    for x in x_test:
-        for y in y_test:
-            ray_origins.append([x, y, z_start])
-            ray_directions.append([0, 0, -1])  # Point downward
-    
-    ray_origins = np.array(ray_origins)
-    ray_directions = np.array(ray_directions)
-    
-    # Cast rays and find intersections
     try:
-        locations, index_ray, index_tri = mesh.ray.intersects_location(
-            ray_origins=ray_origins,
-            ray_directions=ray_directions
-        )
-        
-        print(f"Ray casting results:")
-        print(f"  Total rays cast: {len(ray_origins)}")
-        print(f"  Intersection points: {len(locations)}")
-        
-        # Group intersections by ray to find holes
-        holes_detected = []
+        results = compute(mesh, ['height_map', 'holes'], {
+            'resolution': resolution, 'hole_min_depth': min_depth, 'hole_min_area': min_area})
+        depth = results['height_map']
+        holes_detected = results['holes']
         
-        for i in range(len(ray_origins)):
-            ray_intersections = locations[index_ray == i]
-            
-            if len(ray_intersections) == 0:
-                # No intersection = hole through entire mesh
-                x, y = ray_origins[i][:2]
-                holes_detected.append({
-                    'center': [x, y],
-                    'type': 'through_hole',
-                    'depth': 'full'
-                })
-            elif len(ray_intersections) > 2:
-                # Multiple intersections = complex geometry (possible cutout)
-                z_intersections = ray_intersections[:, 2]
-                x, y = ray_origins[i][:2]
-                depth = z_intersections.max() - z_intersections.min()
-                
-                if depth > 5:  # Significant depth
-                    holes_detected.append({
-                        'center': [x, y],
-                        'type': 'cutout',
-                        'depth': depth,
-                        'z_range': [z_intersections.min(), z_intersections.max()]
-                    })
+        rows, cols = depth['top'].shape
+        u, v = ('XYZ'[i] for i in depth['image_axes'])
+        print(f"Height map: {rows} × {cols} px at {resolution} mm, viewed along {'XYZ'[depth['axis']]}")
+        print(f"  Pixels with surface: {int((depth['hits'] > 0).sum()):,}")
         
         print(f"\nDetected holes/cutouts: {len(holes_detected)}")
         for i, hole in enumerate(holes_detected):
-            center = hole['center']
-            hole_type = hole['type']
-            if hole_type == 'through_hole':
-                print(f"  {i+1}: Through hole at ({center[0]:.1f}, {center[1]:.1f})")
-            else:
-                depth = hole['depth']
-                print(f"  {i+1}: {hole_type} at ({center[0]:.1f}, {center[1]:.1f}), depth={depth:.1f}mm")
+            center, size = hole['center'], hole['size']
+            print(f"  {i+1}: {hole['type']} at ({u}={center[0]:.1f}, {v}={center[1]:.1f}), "
+                  f"{size[0]:.1f} × {size[1]:.1f} mm, area={hole['area']:.1f}mm², depth={hole['depth']:.1f}mm")
         
         return holes_detected
         
     except Exception as e:
-        print(f"Ray casting failed: {e}")
+        print(f"Height map rasterization failed: {e}")
         return []
 
 def analyze_original_vs_modified():
@@ -156,18 +90,18 @@ def analyze_original_vs_modified():
         print("Modified file not found")
         return
     
-    original_mesh = trimesh.load(original_file)
-    modified_mesh = trimesh.load(modified_file)
+    original = compute(load_mesh(original_file), ['properties'])['properties']
+    modified = compute(load_mesh(modified_file), ['properties'])['properties']
     
     print(f"Original mesh:")
-    print(f"  Vertices: {len(original_mesh.vertices):,}")
-    print(f"  Volume: {original_mesh.volume:,.0f} mm³")
+    print(f"  Vertices: {original['vertices']:,}")
+    print(f"  Volume: {original['volume']:,.0f} mm³")
     
     print(f"Modified mesh:")
-    print(f"  Vertices: {len(modified_mesh.vertices):,}")
-    print(f"  Volume: {modified_mesh.volume:,.0f} mm³")
+    print(f"  Vertices: {modified['vertices']:,}")
+    print(f"  Volume: {modified['volume']:,.0f} mm³")
     
-    volume_diff = original_mesh.volume - modified_mesh.volume
+    volume_diff = original['volume'] - modified['volume']
     print(f"Volume difference: {volume_diff:,.0f} mm³")
     
     if volume_diff > 1000:
@@ -256,7 +190,7 @@ def determine_next_steps():
     modified_file = "/workspaces/scad/output/FrontCover_Modified_S20Cutout_v2.stl"
     
     if os.path.exists(modified_file):
-        mesh = trimesh.load(modified_file)
+        mesh = load_mesh(modified_file)
         
         print("Current status:")
         print(f"✓ Modified front cover exists: {os.path.basename(modified_file)}")
@@ -303,7 +237,7 @@ def main():
         return
     
     # Load and analyze the mesh
-    mesh = trimesh.load(modified_file)
+    mesh = load_mesh(modified_file)
     
     # Detailed geometry analysis
     analyze_mesh_geometry_detailed(mesh)
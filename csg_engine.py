@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+NucDeck CSG Engine
+Boolean operations on trimesh meshes with selectable backends and automatic fallback
+"""
+
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+import logging
+
+import numpy as np
+import trimesh
+
+logger = logging.getLogger(__name__)
+
+OPERATIONS = ('union', 'difference', 'intersection')
+
+# Backends are tried in this order unless a preferred one is requested
+DEFAULT_BACKEND_ORDER = ('manifold', 'trimesh-manifold', 'trimesh-blender', 'openscad')
+
+
+class CSGError(RuntimeError):
+    """Raised when every available backend failed an operation"""
+
+
+class ManifoldBackend:
+    """manifold3d called directly, without trimesh's wrapper"""
+
+    name = 'manifold'
+
+    def __init__(self):
+        self._manifold3d = None
+
+    def probe(self) -> Optional[str]:
+        """Return a version/description string if usable, else None"""
+        try:
+            import manifold3d
+        except ImportError:
+            return None
+        self._manifold3d = manifold3d
+        return getattr(manifold3d, '__version__', 'manifold3d')
+
+    def _to_manifold(self, mesh: trimesh.Trimesh):
+        manifold3d = self._manifold3d
+        solid = manifold3d.Manifold(manifold3d.Mesh(
+            vert_properties=np.asarray(mesh.vertices, dtype=np.float32),
+            tri_verts=np.asarray(mesh.faces, dtype=np.uint32)))
+        if solid.status() != manifold3d.Error.NoError:
+            raise CSGError(f"input mesh is not manifold ({solid.status().name})")
+        return solid
+
+    def boolean(self, operation: str, meshes: Sequence[trimesh.Trimesh]) -> trimesh.Trimesh:
+        op_type = {
+            'union': self._manifold3d.OpType.Add,
+            'difference': self._manifold3d.OpType.Subtract,
+            'intersection': self._manifold3d.OpType.Intersect,
+        }[operation]
+        result = self._manifold3d.Manifold.batch_boolean([self._to_manifold(m) for m in meshes], op_type)
+        out = result.to_mesh()
+        return trimesh.Trimesh(vertices=out.vert_properties[:, :3], faces=out.tri_verts)
+
+
+class TrimeshBackend:
+    """trimesh.boolean with one of its own engines (manifold, blender)"""
+
+    def __init__(self, engine: str):
+        self.engine = engine
+        self.name = f"trimesh-{engine}"
+
+    def probe(self) -> Optional[str]:
+        if self.engine not in trimesh.boolean.engines_available:
+            return None
+        return f"trimesh {trimesh.__version__} ({self.engine})"
+
+    def boolean(self, operation: str, meshes: Sequence[trimesh.Trimesh]) -> trimesh.Trimesh:
+        func = getattr(trimesh.boolean, operation)
+        return func(list(meshes), engine=self.engine)
+
+
+class OpenSCADBackend:
+    """OpenSCAD CLI: meshes are exported to STL, imported and combined in a generated .scad"""
+
+    name = 'openscad'
+
+    def __init__(self, executable: str = 'openscad', timeout: int = 300):
+        self.executable = executable
+        self.timeout = timeout
+
+    def probe(self) -> Optional[str]:
+        if not shutil.which(self.executable):
+            return None
+        try:
+            result = subprocess.run([self.executable, '--version'], capture_output=True,
+                                    text=True, timeout=30)
+        except (OSError, subprocess.TimeoutExpired):
+            return None
+        return (result.stdout or result.stderr).strip() or 'openscad'
+
+    def boolean(self, operation: str, meshes: Sequence[trimesh.Trimesh]) -> trimesh.Trimesh:
+        with tempfile.TemporaryDirectory(prefix='nucdeck_csg_') as temp_dir:
+            imports = []
+            for i, mesh in enumerate(meshes):
+                path = Path(temp_dir) / f"part_{i}.stl"
+                mesh.export(path)
+                imports.append(f'    import("{path.name}");')
+
+            scad_path = Path(temp_dir) / 'csg.scad'
+            scad_path.write_text(f"{operation}() {{\n" + "\n".join(imports) + "\n}\n")
+            output_path = Path(temp_dir) / 'result.stl'
+
+            result = subprocess.run([self.executable, '-o', str(output_path), str(scad_path)],
+                                    capture_output=True, text=True, timeout=self.timeout,
+                                    cwd=temp_dir)
+            if result.returncode != 0 or not output_path.exists():
+                raise CSGError(result.stderr.strip() or f"openscad exited with {result.returncode}")
+            return trimesh.load(output_path, force='mesh')
+
+
+def create_backend(name: str):
+    if name == 'manifold':
+        return ManifoldBackend()
+    if name.startswith('trimesh-'):
+        return TrimeshBackend(name[len('trimesh-'):])
+    if name == 'openscad':
+        return OpenSCADBackend()
+    raise ValueError(f"Unknown CSG backend: {name}")
+
+
+class CSGEngine:
+    """
+    Runs boolean operations on the first backend that succeeds.
+
+    Backends are probed once at construction. An operation that raises or
+    yields an empty mesh is retried on the next available backend; if all of
+    them fail, ``CSGError`` is raised rather than returning the input
+    unchanged. Every attempt is recorded in ``history`` with its timing.
+    """
+
+    def __init__(self, preferred: Optional[str] = None,
+                 order: Sequence[str] = DEFAULT_BACKEND_ORDER):
+        preferred = preferred or os.environ.get('NUCDECK_CSG_BACKEND')
+        names = list(order)
+        if preferred:
+            if preferred not in names:
+                names.append(preferred)
+            names.remove(preferred)
+            names.insert(0, preferred)
+
+        self.backends = []
+        self.versions: Dict[str, str] = {}
+        for name in names:
+            backend = create_backend(name)
+            version = backend.probe()
+            if version:
+                self.backends.append(backend)
+                self.versions[name] = version
+
+        if preferred and preferred not in self.versions:
+            logger.warning(f"Preferred CSG backend '{preferred}' is not available")
+        logger.debug(f"CSG backends: {', '.join(self.versions) or 'none'}")
+
+        self.history: List[Dict] = []
+
+    def run(self, operation: str, meshes: Sequence[trimesh.Trimesh]) -> trimesh.Trimesh:
+        """Apply ``operation`` across ``meshes`` (the first is the base for a difference)"""
+        if operation not in OPERATIONS:
+            raise ValueError(f"Unknown CSG operation: {operation}")
+        if not self.backends:
+            raise CSGError("No CSG backend available")
+
+        meshes = list(meshes)
+        faces_in = sum(len(mesh.faces) for mesh in meshes)
+        errors = []
+
+        for backend in self.backends:
+            start = time.perf_counter()
+            try:
+                result = backend.boolean(operation, meshes)
+                if operation != 'intersection' and len(result.faces) == 0:
+                    raise CSGError("empty result")
+                error = None
+            except Exception as e:
+                result, error = None, str(e) or type(e).__name__
+
+            self.history.append({
+                'operation': operation,
+                'backend': backend.name,
+                'duration': time.perf_counter() - start,
+                'ok': error is None,
+                'error': error,
+                'meshes': len(meshes),
+                'faces_in': faces_in,
+                'faces_out': len(result.faces) if result is not None else 0,
+            })
+
+            if error is None:
+                return result
+
+            errors.append(f"{backend.name}: {error}")
+            logger.warning(f"CSG {operation} failed on {backend.name} ({error}), trying next backend")
+
+        raise CSGError(f"{operation} failed on every backend: " + "; ".join(errors))
+
+    def union(self, meshes: Sequence[trimesh.Trimesh]) -> trimesh.Trimesh:
+        return self.run('union', meshes)
+
+    def difference(self, base: trimesh.Trimesh, tools: Sequence[trimesh.Trimesh]) -> trimesh.Trimesh:
+        return self.run('difference', [base, *tools])
+
+    def intersection(self, meshes: Sequence[trimesh.Trimesh]) -> trimesh.Trimesh:
+        return self.run('intersection', meshes)
+
+    def stats(self) -> Dict[str, Dict]:
+        """Per-backend call counts, failures and total time"""
+        stats = {}
+        for record in self.history:
+            entry = stats.setdefault(record['backend'], {'calls': 0, 'failures': 0, 'total_time': 0.0})
+            entry['calls'] += 1
+            entry['failures'] += 0 if record['ok'] else 1
+            entry['total_time'] += record['duration']
+        return stats
+
+
+_default_engine: Optional[CSGEngine] = None
+
+
+def get_engine() -> CSGEngine:
+    """Shared engine, probed on first use"""
+    global _default_engine
+    if _default_engine is None:
+        _default_engine = CSGEngine()
+    return _default_engine
+
+
+def benchmark_tools(mesh: trimesh.Trimesh) -> List[trimesh.Trimesh]:
+    """A row of through-holes plus a pocket across a mesh, like the shell cutouts"""
+    lower, upper = mesh.bounds
+    size = upper - lower
+    z_center = (lower[2] + upper[2]) / 2
+    radius = max(min(size[0], size[1]) * 0.08, 0.5)
+
+    tools = []
+    for fraction in (0.25, 0.5, 0.75):
+        center = [lower[0] + size[0] * fraction, lower[1] + size[1] / 2, z_center]
+        tools.append(trimesh.creation.cylinder(
+            radius=radius, height=size[2] + 2, sections=32,
+            transform=trimesh.transformations.translation_matrix(center)))
+
+    tools.append(trimesh.creation.box(
+        extents=[size[0] * 0.3, size[1] * 0.2, size[2] * 0.5],
+        transform=trimesh.transformations.translation_matrix(
+            [lower[0] + size[0] / 2, lower[1] + size[1] * 0.2, upper[2]])))
+    return tools
+
+
+def run_benchmark(stl_files: Sequence[Path], repeat: int = 3) -> List[Dict]:
+    """Time a multi-cutout difference on every available backend for each file"""
+    from mesh_cache import load_mesh
+
+    probe = CSGEngine()
+    rows = []
+    for stl_file in stl_files:
+        mesh = load_mesh(stl_file)
+        tools = benchmark_tools(mesh)
+        print(f"\n{Path(stl_file).name}: {len(mesh.faces):,} faces, watertight={mesh.is_watertight}")
+
+        for name in probe.versions:
+            engine = CSGEngine(order=[name])
+            times = []
+            result = None
+            error = None
+            for _ in range(repeat):
+                try:
+                    start = time.perf_counter()
+                    result = engine.difference(mesh, tools)
+                    times.append(time.perf_counter() - start)
+                except CSGError as e:
+                    error = str(e)
+                    break
+
+            row = {'file': str(stl_file), 'backend': name, 'faces': len(mesh.faces), 'error': error}
+            if times:
+                row.update({
+                    'best_time': min(times),
+                    'faces_out': len(result.faces),
+                    'volume': float(result.volume),
+                    'watertight': bool(result.is_watertight),
+                })
+                print(f"  {name:>16}: {min(times) * 1000:9.1f} ms  faces={len(result.faces):,}  "
+                      f"volume={result.volume:,.0f}  watertight={result.is_watertight}")
+            else:
+                print(f"  {name:>16}: failed - {error}")
+            rows.append(row)
+
+    return rows
+
+
+def main():
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="NucDeck CSG backend probe and benchmark")
+    parser.add_argument("--benchmark", action="store_true", help="Benchmark backends on housing meshes")
+    parser.add_argument("--files", nargs="+", help="STL files to benchmark (default: Housing - STL/*.STL)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per backend (default: 3)")
+    parser.add_argument("--output", type=str, help="Write benchmark results as JSON")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    engine = CSGEngine()
+    print("Available CSG backends:")
+    for name, version in engine.versions.items():
+        print(f"  {name}: {version}")
+
+    if args.benchmark:
+        if args.files:
+            files = [Path(f) for f in args.files]
+        else:
+            files = sorted((Path(__file__).resolve().parent / "Housing - STL").glob("*.STL"))
+        rows = run_benchmark(files, args.repeat)
+
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(rows, f, indent=2)
+            print(f"\nBenchmark results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
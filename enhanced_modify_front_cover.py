@@ -8,6 +8,9 @@ import trimesh
 import numpy as np
 import os
 
+from csg_engine import get_engine
+from profiles import extrude_profile, rounded_rectangle
+
 def analyze_mesh_at_position(mesh, center_x, center_y, search_radius=80):
     """
     Analyze the mesh geometry at a specific position to determine proper cutout depth
@@ -64,63 +67,9 @@ def create_precise_cutout(width, height, depth, corner_radius, center, surface_l
     else:
         cutout_center = center
     
-    # Create main rectangular box
-    main_box = trimesh.creation.box(extents=[width, height, depth])
-    
-    if corner_radius > 0:
-        # Create rounded corners by combining box with cylinders
-        half_w = width/2 - corner_radius
-        half_h = height/2 - corner_radius
-        
-        # Corner positions relative to box center
-        corners = [
-            [half_w, half_h, 0],
-            [-half_w, half_h, 0],
-            [-half_w, -half_h, 0],
-            [half_w, -half_h, 0]
-        ]
-        
-        # Create corner cylinders
-        corner_cylinders = []
-        for corner_pos in corners:
-            cyl = trimesh.creation.cylinder(
-                radius=corner_radius,
-                height=depth,
-                sections=32  # High resolution for smooth corners
-            )
-            cyl.apply_translation(corner_pos)
-            corner_cylinders.append(cyl)
-        
-        # Create connecting rectangles
-        # Top and bottom strips
-        top_strip = trimesh.creation.box(extents=[width - 2*corner_radius, 2*corner_radius, depth])
-        top_strip.apply_translation([0, half_h + corner_radius, 0])
-        
-        bottom_strip = trimesh.creation.box(extents=[width - 2*corner_radius, 2*corner_radius, depth])
-        bottom_strip.apply_translation([0, -half_h - corner_radius, 0])
-        
-        # Left and right strips  
-        left_strip = trimesh.creation.box(extents=[2*corner_radius, height - 2*corner_radius, depth])
-        left_strip.apply_translation([-half_w - corner_radius, 0, 0])
-        
-        right_strip = trimesh.creation.box(extents=[2*corner_radius, height - 2*corner_radius, depth])
-        right_strip.apply_translation([half_w + corner_radius, 0, 0])
-        
-        # Combine all parts
-        all_parts = [main_box] + corner_cylinders + [top_strip, bottom_strip, left_strip, right_strip]
-        
-        # Union all parts to create rounded rectangle
-        cutout = all_parts[0]
-        for part in all_parts[1:]:
-            cutout = cutout.union(part)
-            
-    else:
-        cutout = main_box
-    
-    # Position the cutout at the target location
-    cutout.apply_translation(cutout_center)
-    
-    return cutout
+    # Rounded rectangle profile extruded straight to a watertight prism
+    # at the target location
+    return extrude_profile(rounded_rectangle(width, height, corner_radius), depth, cutout_center)
 
 def validate_cutout_intersection(original_mesh, cutout_mesh):
     """
@@ -257,7 +206,7 @@ def modify_front_cover_enhanced():
     # Perform boolean difference
     print(f"\nPerforming boolean subtraction...")
     try:
-        result_mesh = original_mesh.difference(cutout_mesh)
+        result_mesh = get_engine().difference(original_mesh, [cutout_mesh])
         
         if result_mesh is None or len(result_mesh.vertices) == 0:
             print("Boolean operation returned empty result")
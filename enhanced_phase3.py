@@ -7,31 +7,24 @@ import trimesh
 import numpy as np
 import os
 
+from csg_engine import CSGError, get_engine
+from profiles import cylinder
+
 def create_simple_rectangular_cutout(center, width, height, depth):
     """
     Create a simple rectangular cutout ensuring watertight geometry
     """
+    # Boxes are watertight by construction
     box = trimesh.creation.box(extents=[width, height, depth])
     box.apply_translation(center)
-    
-    # Ensure it's watertight
-    if not box.is_watertight:
-        box.fill_holes()
-    
     return box
 
 def create_cylindrical_cutout(center, diameter, depth):
     """
     Create a cylindrical cutout for switches and holes
     """
-    cylinder = trimesh.creation.cylinder(radius=diameter/2, height=depth, sections=32)
-    cylinder.apply_translation(center)
-    
-    # Ensure it's watertight
-    if not cylinder.is_watertight:
-        cylinder.fill_holes()
-    
-    return cylinder
+    # Extruded profiles are watertight by construction
+    return cylinder(diameter/2, depth, center)
 
 def modify_back_cover_simple():
     """
@@ -129,14 +122,14 @@ def modify_back_cover_simple():
             
             # Check intersection first
             try:
-                intersection = modified_mesh.intersection(cutout)
+                intersection = get_engine().intersection([modified_mesh, cutout])
                 if intersection.volume < 10:  # Very small intersection
                     print("❌ (no significant intersection)")
                     continue
-            except:
-                pass  # Continue with subtraction anyway
+            except CSGError as e:
+                print(f"(intersection check failed: {e})", end=" ")  # Continue with subtraction anyway
             
-            result = modified_mesh.difference(cutout)
+            result = get_engine().difference(modified_mesh, [cutout])
             
             if result is not None and hasattr(result, 'volume') and result.volume > 0:
                 volume_removed = modified_mesh.volume - result.volume
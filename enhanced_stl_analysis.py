@@ -4,137 +4,62 @@ Enhanced STL Analysis with Feature Detection
 Specifically looks for mounting points, cutouts, and internal cavities
 """
 
-import trimesh
 import numpy as np
 import os
 
-def detect_mounting_features(mesh, filepath):
+from analysis import compute
+from mesh_cache import load_mesh
+from voxel_grid import DEFAULT_PITCH
+
+def detect_mounting_features(mesh, filepath, pitch=DEFAULT_PITCH):
     """
     Detect potential mounting points, holes, and cutouts in the mesh
+    
+    Cavities and pockets come from a cached occupancy grid at ``pitch`` mm.
     """
     print(f"\n--- Detailed Feature Detection for {os.path.basename(filepath)} ---")
     
-    # Sample points to analyze internal structure
-    bounds = mesh.bounds
-    dimensions = bounds[1] - bounds[0]
-    
-    # Create a grid of test points to check if they're inside the mesh
-    test_resolution = 20  # Number of test points per dimension
-    x_points = np.linspace(bounds[0][0], bounds[1][0], test_resolution)
-    y_points = np.linspace(bounds[0][1], bounds[1][1], test_resolution)
-    z_points = np.linspace(bounds[0][2], bounds[1][2], test_resolution)
+    results = compute(mesh, ['properties', 'cavities', 'mounting_faces', 'z_levels'], {'pitch': pitch})
+    volumes = results['cavities']
+    cavities = volumes['enclosed']
+    pockets = volumes['pockets']
     
-    internal_points = []
-    external_points = []
+    print(f"Internal cavity analysis ({volumes['pitch']} mm voxels, grid {' × '.join(map(str, volumes['shape']))}):")
+    print(f"  Solid voxels: {volumes['solid_voxels']:,} of {int(np.prod(volumes['shape'])):,}")
+    print(f"  Voxelized volume: {volumes['voxel_volume']:.1f} mm³ (mesh: {results['properties']['volume']:.1f} mm³)")
+    print(f"  Enclosed cavities: {len(cavities)}")
+    for i, cavity in enumerate(cavities[:5]):
+        dims, center = cavity['dimensions'], cavity['centroid']
+        print(f"    Cavity {i+1}: {dims[0]:.1f} × {dims[1]:.1f} × {dims[2]:.1f} mm, "
+              f"{cavity['volume']:.1f} mm³ at ({center[0]:.1f}, {center[1]:.1f}, {center[2]:.1f})")
     
-    # Sample fewer points for performance
-    for i in range(0, len(x_points), 3):
-        for j in range(0, len(y_points), 2):
-            for k in range(0, len(z_points), 3):
-                point = [x_points[i], y_points[j], z_points[k]]
-                if mesh.contains([point])[0]:
-                    internal_points.append(point)
-                else:
-                    external_points.append(point)
+    print(f"  Pockets and recesses: {len(pockets)}")
+    for i, pocket in enumerate(pockets[:5]):
+        dims, center = pocket['dimensions'], pocket['centroid']
+        print(f"    Pocket {i+1}: {dims[0]:.1f} × {dims[1]:.1f} × {dims[2]:.1f} mm, "
+              f"{pocket['volume']:.1f} mm³ at ({center[0]:.1f}, {center[1]:.1f}, {center[2]:.1f})")
     
-    print(f"Internal cavity analysis:")
-    print(f"  Total test points: {len(internal_points) + len(external_points)}")
-    print(f"  Internal points: {len(internal_points)}")
-    print(f"  External points: {len(external_points)}")
-    
-    if len(internal_points) > 0:
-        internal_points = np.array(internal_points)
-        cavity_bounds = [
-            [internal_points[:, 0].min(), internal_points[:, 1].min(), internal_points[:, 2].min()],
-            [internal_points[:, 0].max(), internal_points[:, 1].max(), internal_points[:, 2].max()]
-        ]
-        cavity_dims = np.array(cavity_bounds[1]) - np.array(cavity_bounds[0])
-        print(f"  Largest internal cavity: {cavity_dims[0]:.1f} × {cavity_dims[1]:.1f} × {cavity_dims[2]:.1f} mm")
-        print(f"  Cavity center: {np.mean(cavity_bounds, axis=0)}")
-    
-    # Analyze mesh thickness by looking at face normals and proximity
-    try:
-        # Find faces that might represent mounting surfaces (flat areas)
-        face_normals = mesh.face_normals
-        face_areas = mesh.area_faces
-        
-        # Look for large, flat surfaces (potential mounting areas)
-        large_faces = face_areas > np.percentile(face_areas, 90)  # Top 10% largest faces
-        flat_faces = np.abs(face_normals[:, 2]) > 0.8  # Nearly horizontal faces
-        
-        mounting_candidates = large_faces & flat_faces
-        print(f"  Potential mounting surfaces: {np.sum(mounting_candidates)} large flat faces")
-        
-        if np.sum(mounting_candidates) > 0:
-            mounting_face_indices = np.where(mounting_candidates)[0]
-            for i, face_idx in enumerate(mounting_face_indices[:5]):  # Show first 5
-                face_center = mesh.triangles_center[face_idx]
-                face_area = face_areas[face_idx]
-                print(f"    Mount {i+1}: center=({face_center[0]:.1f}, {face_center[1]:.1f}, {face_center[2]:.1f}), area={face_area:.1f}mm²")
-    
-    except Exception as e:
-        print(f"  Could not analyze mounting features: {e}")
+    # Large, nearly horizontal faces (top 10% by area) are candidate mounting surfaces
+    mounts = results['mounting_faces']
+    print(f"  Potential mounting surfaces: {mounts['count']} large flat faces")
+    for i, (face_center, face_area) in enumerate(zip(mounts['centers'][:5], mounts['areas'][:5])):
+        print(f"    Mount {i+1}: center=({face_center[0]:.1f}, {face_center[1]:.1f}, {face_center[2]:.1f}), area={face_area:.1f}mm²")
     
-    # Look for circular features (holes, posts)
-    try:
-        # This is a simplified approach - real hole detection would need more sophisticated algorithms
-        vertices = mesh.vertices
-        
-        # Look for vertices that form circular patterns (simplified)
-        unique_z_levels = np.unique(np.round(vertices[:, 2], 1))
-        
-        print(f"  Z-level analysis (potential layers/features):")
-        print(f"    Unique Z levels: {len(unique_z_levels)}")
-        print(f"    Z range: {unique_z_levels.min():.1f} to {unique_z_levels.max():.1f} mm")
-        
-        # Find the most populated Z levels (likely to contain features)
-        z_level_counts = []
-        for z in unique_z_levels:
-            count = np.sum(np.abs(vertices[:, 2] - z) < 0.5)  # Within 0.5mm
-            z_level_counts.append(count)
-        
-        z_level_counts = np.array(z_level_counts)
-        top_levels = unique_z_levels[np.argsort(z_level_counts)[-5:]]  # Top 5 levels
-        
-        print(f"    Most detailed Z levels: {[f'{z:.1f}mm' for z in top_levels]}")
-        
-    except Exception as e:
-        print(f"  Could not analyze Z-levels: {e}")
+    # Z levels with the most vertices within 0.5 mm (likely layers/features)
+    z_levels = results['z_levels']
+    print(f"  Z-level analysis (potential layers/features):")
+    print(f"    Unique Z levels: {z_levels['unique']}")
+    print(f"    Z range: {z_levels['range'][0]:.1f} to {z_levels['range'][1]:.1f} mm")
+    top_levels = [level['z'] for level in z_levels['top_window'][:5]]
+    print(f"    Most detailed Z levels: {[f'{z:.1f}mm' for z in top_levels]}")
 
 def analyze_shell_thickness(mesh):
     """
     Attempt to estimate shell thickness at various points
     """
     try:
-        # Use ray casting to estimate thickness
-        bounds = mesh.bounds
-        center = (bounds[0] + bounds[1]) / 2
-        
-        # Cast rays from center outward in different directions
-        directions = [
-            [1, 0, 0],   # X direction
-            [-1, 0, 0],  # -X direction
-            [0, 1, 0],   # Y direction
-            [0, -1, 0],  # -Y direction
-            [0, 0, 1],   # Z direction
-            [0, 0, -1]   # -Z direction
-        ]
-        
-        thicknesses = []
-        for direction in directions:
-            # Cast ray from center
-            ray_origins = [center]
-            ray_directions = [direction]
-            
-            locations, index_ray, index_tri = mesh.ray.intersects_location(
-                ray_origins=ray_origins,
-                ray_directions=ray_directions
-            )
-            
-            if len(locations) >= 2:
-                # Distance between first two intersections gives thickness
-                distances = np.linalg.norm(locations[1] - locations[0])
-                thicknesses.append(distances)
+        # Rays from the bounding-box centre along ±X, ±Y and ±Z
+        thicknesses = compute(mesh, ['axis_thickness'])['axis_thickness']
         
         if thicknesses:
             avg_thickness = np.mean(thicknesses)
@@ -155,14 +80,14 @@ def main():
     # Load and analyze front cover
     if os.path.exists(front_file):
         print(f"\nLoading: {front_file}")
-        front_mesh = trimesh.load(front_file)
+        front_mesh = load_mesh(front_file)
         detect_mounting_features(front_mesh, front_file)
         analyze_shell_thickness(front_mesh)
     
     # Load and analyze back cover
     if os.path.exists(back_file):
         print(f"\nLoading: {back_file}")
-        back_mesh = trimesh.load(back_file)
+        back_mesh = load_mesh(back_file)
         detect_mounting_features(back_mesh, back_file)
         analyze_shell_thickness(back_mesh)
     
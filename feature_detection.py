@@ -4,73 +4,26 @@ NucDeck Feature Detection Script
 Analyzes the modified front cover to identify existing gaming control features
 """
 
-import trimesh
 import numpy as np
 import os
 import json
 from scipy.spatial.distance import cdist
 from scipy.spatial import ConvexHull
 
-def detect_circular_features(mesh, min_radius=3, max_radius=20, center_z_range=None):
+from mesh_cache import load_mesh
+from slice_circles import detect_cylinders
+
+def detect_circular_features(mesh, min_radius=3, max_radius=20, center_z_range=None, spacing=0.5):
     """
     Detect circular holes/features in the mesh (joysticks, buttons)
+    
+    The mesh is sliced every ``spacing`` mm along Z in one pass, closed loops
+    from every slice are circle-fitted together, and matching circles on
+    consecutive slices are merged into one feature with ``z_bottom``/``z_top``.
     """
     print(f"Detecting circular features (radius {min_radius}-{max_radius} mm)...")
     
-    vertices = mesh.vertices
-    
-    # Filter by Z-range if specified
-    if center_z_range:
-        z_mask = (vertices[:, 2] >= center_z_range[0]) & (vertices[:, 2] <= center_z_range[1])
-        vertices = vertices[z_mask]
-    
-    # Group vertices by Z-level to find circular patterns
-    z_levels = np.round(vertices[:, 2], 1)
-    unique_z = np.unique(z_levels)
-    
-    circular_features = []
-    
-    for z in unique_z:
-        level_vertices = vertices[np.abs(vertices[:, 2] - z) < 0.5]
-        
-        if len(level_vertices) < 10:  # Skip levels with few vertices
-            continue
-        
-        # Look for circular patterns by finding vertex clusters
-        # Use 2D coordinates only (X, Y)
-        xy_coords = level_vertices[:, :2]
-        
-        # Find potential centers by clustering
-        from sklearn.cluster import DBSCAN
-        clustering = DBSCAN(eps=2.0, min_samples=5).fit(xy_coords)
-        labels = clustering.labels_
-        
-        for label in set(labels):
-            if label == -1:  # Skip noise
-                continue
-                
-            cluster_points = xy_coords[labels == label]
-            
-            if len(cluster_points) < 8:  # Need enough points for circle
-                continue
-            
-            # Find center and radius of this cluster
-            center = np.mean(cluster_points, axis=0)
-            distances = np.linalg.norm(cluster_points - center, axis=1)
-            radius = np.mean(distances)
-            radius_std = np.std(distances)
-            
-            # Check if it's circular (low standard deviation)
-            if radius_std < radius * 0.3 and min_radius <= radius <= max_radius:
-                circular_features.append({
-                    'center': [center[0], center[1], z],
-                    'radius': radius,
-                    'radius_std': radius_std,
-                    'point_count': len(cluster_points),
-                    'circularity': 1.0 - (radius_std / radius)
-                })
-    
-    return circular_features
+    return detect_cylinders(mesh, min_radius, max_radius, spacing=spacing, z_range=center_z_range)
 
 def detect_rectangular_features(mesh, min_area=100, max_area=1000):
     """
@@ -96,7 +49,11 @@ def detect_rectangular_features(mesh, min_area=100, max_area=1000):
         # Group nearby face centers
         centers = face_centers[candidate_indices]
         
-        from sklearn.cluster import DBSCAN
+        try:
+            from sklearn.cluster import DBSCAN
+        except ImportError:
+            print("  scikit-learn not installed; skipping rectangular feature clustering")
+            return rectangular_features
         clustering = DBSCAN(eps=10.0, min_samples=2).fit(centers[:, :2])  # Cluster in XY
         labels = clustering.labels_
         
@@ -196,7 +153,7 @@ def analyze_front_cover_features():
     print(f"Analyzing: {os.path.basename(modified_file)}")
     
     # Load mesh
-    mesh = trimesh.load(modified_file)
+    mesh = load_mesh(modified_file)
     
     print(f"\nMesh properties:")
     print(f"  Vertices: {len(mesh.vertices):,}")
@@ -204,14 +161,6 @@ def analyze_front_cover_features():
     print(f"  Bounds: {mesh.bounds[0]} to {mesh.bounds[1]}")
     print(f"  Watertight: {mesh.is_watertight}")
     
-    # Install sklearn if not available
-    try:
-        from sklearn.cluster import DBSCAN
-    except ImportError:
-        print("Installing scikit-learn for clustering...")
-        os.system("/home/codespace/.python/current/bin/python3 -m pip install scikit-learn")
-        from sklearn.cluster import DBSCAN
-    
     # Detect circular features (joysticks, buttons)
     print(f"\n" + "="*40)
     circular_features = detect_circular_features(mesh, min_radius=3, max_radius=20)
@@ -222,7 +171,8 @@ def analyze_front_cover_features():
         radius = feature['radius']
         circularity = feature['circularity']
         print(f"  {i+1}: Center=({center[0]:.1f}, {center[1]:.1f}, {center[2]:.1f}), "
-              f"R={radius:.1f}mm, Circularity={circularity:.2f}")
+              f"R={radius:.1f}mm, Z={feature['z_bottom']:.1f}-{feature['z_top']:.1f}mm, "
+              f"Circularity={circularity:.2f}")
     
     # Detect rectangular features (D-pad, trigger slots)
     print(f"\n" + "="*40)
@@ -4,10 +4,11 @@ Comprehensive STL Analysis for Component Placement
 Focus on practical measurements for NucDeck assembly
 """
 
-import trimesh
-import numpy as np
 import os
 
+from analysis import compute
+from mesh_cache import load_mesh
+
 def comprehensive_analysis(filepath):
     """
     Perform comprehensive analysis focusing on practical design needs
@@ -16,8 +17,11 @@ def comprehensive_analysis(filepath):
         print(f"File not found: {filepath}")
         return None
     
-    mesh = trimesh.load(filepath)
+    mesh = load_mesh(filepath)
     filename = os.path.basename(filepath)
+    results = compute(mesh, ['properties', 'bounds', 'dimensions', 'geometric_center', 'volume_ratio',
+                             'face_orientation', 'planar_patches', 'z_levels'])
+    props = results['properties']
     
     print(f"\n{'='*60}")
     print(f"ANALYSIS: {filename}")
@@ -25,15 +29,15 @@ def comprehensive_analysis(filepath):
     
     # Basic properties
     print(f"Mesh Properties:")
-    print(f"  Vertices: {len(mesh.vertices):,}")
-    print(f"  Faces: {len(mesh.faces):,}")
-    print(f"  Volume: {mesh.volume:,.0f} mm³")
-    print(f"  Surface Area: {mesh.area:,.0f} mm²")
-    print(f"  Watertight: {mesh.is_watertight}")
+    print(f"  Vertices: {props['vertices']:,}")
+    print(f"  Faces: {props['faces']:,}")
+    print(f"  Volume: {props['volume']:,.0f} mm³")
+    print(f"  Surface Area: {props['area']:,.0f} mm²")
+    print(f"  Watertight: {props['watertight']}")
     
     # Dimensional analysis
-    bounds = mesh.bounds
-    dimensions = bounds[1] - bounds[0]
+    bounds = results['bounds']
+    dimensions = results['dimensions']
     
     print(f"\nDimensional Analysis:")
     print(f"  Bounding Box Min: ({bounds[0][0]:.1f}, {bounds[0][1]:.1f}, {bounds[0][2]:.1f}) mm")
@@ -44,12 +48,11 @@ def comprehensive_analysis(filepath):
     print(f"  Height (Z): {dimensions[2]:.1f} mm")
     
     # Center points
-    geometric_center = (bounds[0] + bounds[1]) / 2
+    geometric_center = results['geometric_center']
     print(f"  Geometric Center: ({geometric_center[0]:.1f}, {geometric_center[1]:.1f}, {geometric_center[2]:.1f}) mm")
     
     # Complexity analysis
-    convex_hull = mesh.convex_hull
-    volume_ratio = mesh.volume / convex_hull.volume if convex_hull.volume > 0 else 0
+    volume_ratio = results['volume_ratio']
     
     print(f"\nComplexity Analysis:")
     print(f"  Volume/ConvexHull Ratio: {volume_ratio:.3f}")
@@ -60,62 +63,39 @@ def comprehensive_analysis(filepath):
     else:
         print(f"  -> Relatively simple geometry")
     
-    # Face orientation analysis
-    face_normals = mesh.face_normals
-    face_areas = mesh.area_faces
-    
-    # Categorize faces by orientation
-    horizontal_up = np.sum((face_normals[:, 2] > 0.8) & (face_areas > 1.0))  # Facing up
-    horizontal_down = np.sum((face_normals[:, 2] < -0.8) & (face_areas > 1.0))  # Facing down
-    vertical_faces = np.sum((np.abs(face_normals[:, 2]) < 0.3) & (face_areas > 1.0))  # Vertical
+    # Face orientation analysis (faces over 1 mm²)
+    orientation = results['face_orientation']
     
     print(f"\nSurface Analysis:")
-    print(f"  Large upward faces: {horizontal_up} (potential mounting surfaces)")
-    print(f"  Large downward faces: {horizontal_down} (potential recesses)")
-    print(f"  Large vertical faces: {vertical_faces} (walls/sides)")
-    
-    # Find large flat areas (potential component mounting zones)
-    large_flat_areas = []
-    for i, (normal, area) in enumerate(zip(face_normals, face_areas)):
-        if area > 100:  # Areas larger than 100 mm²
-            face_center = mesh.triangles_center[i]
-            large_flat_areas.append({
-                'index': i,
-                'center': face_center,
-                'area': area,
-                'normal': normal,
-                'orientation': 'horizontal_up' if normal[2] > 0.8 else 
-                              'horizontal_down' if normal[2] < -0.8 else 'vertical'
-            })
+    print(f"  Large upward faces: {orientation['up']['large_faces']} (potential mounting surfaces)")
+    print(f"  Large downward faces: {orientation['down']['large_faces']} (potential recesses)")
+    print(f"  Large vertical faces: {orientation['walls']['large_faces']} (walls/sides)")
     
-    print(f"\nLarge Flat Areas (>100mm²): {len(large_flat_areas)}")
-    for i, area in enumerate(sorted(large_flat_areas, key=lambda x: x['area'], reverse=True)[:5]):
-        print(f"  Area {i+1}: {area['area']:.0f}mm² at ({area['center'][0]:.1f}, {area['center'][1]:.1f}, {area['center'][2]:.1f}) - {area['orientation']}")
+    # Find large flat areas (potential component mounting zones), merging
+    # coplanar triangles into whole planar patches first
+    large_flat_areas = results['planar_patches']
     
-    # Analyze potential mounting locations
-    vertices = mesh.vertices
+    print(f"\nLarge Flat Areas (>100mm²): {len(large_flat_areas)}")
+    for i, area in enumerate(large_flat_areas[:5]):
+        print(f"  Area {i+1}: {area['area']:.0f}mm² at ({area['center'][0]:.1f}, {area['center'][1]:.1f}, {area['center'][2]:.1f}) - "
+              f"{area['orientation']}, {area['faces']} faces, {area['holes']} holes")
     
     # Find Z-levels with many vertices (indicating detail/features)
-    z_coords = vertices[:, 2]
-    unique_z = np.round(z_coords, 1)
-    z_counts = np.bincount((unique_z * 10).astype(int) - int(unique_z.min() * 10))
+    z_levels = results['z_levels']
     
     print(f"\nZ-Level Analysis:")
-    print(f"  Z range: {z_coords.min():.1f} to {z_coords.max():.1f} mm")
+    print(f"  Z range: {z_levels['range'][0]:.1f} to {z_levels['range'][1]:.1f} mm")
     print(f"  Most detailed levels (likely feature locations):")
     
-    top_z_indices = np.argsort(z_counts)[-5:]
-    for idx in reversed(top_z_indices):
-        z_level = (idx + int(z_coords.min() * 10)) / 10
-        vertex_count = z_counts[idx]
-        if vertex_count > 10:  # Only show levels with significant detail
-            print(f"    Z={z_level:.1f}mm: {vertex_count} vertices")
+    for level in z_levels['top'][:5]:
+        if level['vertices'] > 10:  # Only show levels with significant detail
+            print(f"    Z={level['z']:.1f}mm: {level['vertices']} vertices")
     
     return {
         'filename': filename,
         'dimensions': dimensions,
         'bounds': bounds,
-        'volume': mesh.volume,
+        'volume': props['volume'],
         'geometric_center': geometric_center,
         'volume_ratio': volume_ratio,
         'large_flat_areas': large_flat_areas
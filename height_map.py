@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+NucDeck Height Map Rasterizer
+Triangle z-buffer depth images and connected-component hole/pocket segmentation
+"""
+
+from typing import Dict, List, Optional
+import logging
+
+import numpy as np
+import trimesh
+from scipy import ndimage
+
+from voxel_grid import column_crossings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RESOLUTION = 0.25
+
+# Recesses narrower than this (mm) are measured against the surrounding
+# surface; wider ones are treated as part of the shape
+MAX_FEATURE_SIZE = 40.0
+
+AXIS_NAMES = 'XYZ'
+
+
+def height_map(mesh: trimesh.Trimesh, resolution: float = DEFAULT_RESOLUTION,
+               axis: Optional[int] = None) -> Dict:
+    """
+    Rasterize a mesh into first/last-hit height images looking down ``axis``.
+
+    Every triangle is scan-converted against the pixel centres under its
+    footprint in one batched pass (see ``voxel_grid.column_crossings``), and
+    the per-pixel maximum and minimum crossing heights are kept, z-buffer
+    style. ``axis`` defaults to the mesh's thinnest dimension, which is the
+    face normal of the housing shells. Pixels with no surface are NaN.
+    """
+    if axis is None:
+        axis = int(np.argmin(mesh.extents))
+    # Image axes first, view axis last, keeping a right-handed frame
+    order = [(axis + 1) % 3, (axis + 2) % 3, axis]
+
+    triangles = mesh.triangles[:, :, order]
+    lower = mesh.bounds[0][order] - resolution
+    upper = mesh.bounds[1][order] + resolution
+    shape = tuple(np.ceil((upper[:2] - lower[:2]) / resolution).astype(int))
+
+    columns, heights = column_crossings(triangles, lower, resolution, shape)
+
+    top = np.full(shape[0] * shape[1], -np.inf)
+    bottom = np.full(shape[0] * shape[1], np.inf)
+    np.maximum.at(top, columns, heights)
+    np.minimum.at(bottom, columns, heights)
+    hits = np.bincount(columns, minlength=shape[0] * shape[1])
+
+    top[hits == 0] = np.nan
+    bottom[hits == 0] = np.nan
+    return {
+        'axis': axis,
+        'image_axes': order[:2],
+        'origin': lower[:2],
+        'resolution': resolution,
+        'top': top.reshape(shape),
+        'bottom': bottom.reshape(shape),
+        'hits': hits.reshape(shape),
+    }
+
+
+def _pixel_centers(depth: Dict, pixels: np.ndarray) -> np.ndarray:
+    return depth['origin'] + (np.asarray(pixels) + 0.5) * depth['resolution']
+
+
+def _components(depth: Dict, mask: np.ndarray, depth_image: np.ndarray,
+                feature_type: str, min_area: float) -> List[Dict]:
+    """Connected components of ``mask`` as feature dicts, largest first"""
+    labels, count = ndimage.label(mask)
+    if count == 0:
+        return []
+
+    pixel_area = depth['resolution'] ** 2
+    index = np.arange(1, count + 1)
+    sizes = np.bincount(labels.ravel(), minlength=count + 1)[1:]
+    centroids = ndimage.center_of_mass(mask, labels, index)
+    depths = ndimage.maximum(depth_image, labels, index)
+    boxes = ndimage.find_objects(labels)
+
+    features = []
+    for i in np.flatnonzero(sizes * pixel_area >= min_area):
+        box = boxes[i]
+        extent = np.array([s.stop - s.start for s in box]) * depth['resolution']
+        features.append({
+            'type': feature_type,
+            'center': _pixel_centers(depth, centroids[i]).tolist(),
+            'area': float(sizes[i] * pixel_area),
+            'size': extent.tolist(),
+            'depth': float(depths[i]),
+        })
+
+    features.sort(key=lambda feature: feature['area'], reverse=True)
+    return features
+
+
+def segment_features(depth: Dict, min_depth: float = 1.0, min_area: float = 1.0,
+                     max_feature_size: float = MAX_FEATURE_SIZE) -> List[Dict]:
+    """
+    Split a height map into through holes and blind pockets.
+
+    Through holes are empty pixels enclosed by the part's footprint. Pockets
+    are pixels whose top surface sits at least ``min_depth`` below the
+    surrounding surface, estimated by a greyscale closing of the top image
+    with a ``max_feature_size`` window. Both are reported as connected
+    components with area (mm²), centroid and bounding size in image
+    coordinates, and depth (wall thickness around a hole, recess depth for a
+    pocket).
+    """
+    top, bottom = depth['top'], depth['bottom']
+    solid = depth['hits'] > 0
+    floor = np.nanmin(bottom) if solid.any() else 0.0
+
+    window = max(3, int(round(max_feature_size / depth['resolution'])) | 1)
+    surface = ndimage.grey_closing(np.where(solid, top, floor), size=(window, window))
+
+    through = ndimage.binary_fill_holes(solid) & ~solid
+    thickness = np.where(solid, top - bottom, 0.0)
+    # Holes have no depth of their own; take the wall thickness around them
+    wall = ndimage.grey_dilation(thickness, size=(3, 3))
+
+    recess = np.where(solid, surface - top, 0.0)
+    pockets = solid & (recess >= min_depth)
+
+    return (_components(depth, through, np.where(through, wall, 0.0), 'through_hole', min_area)
+            + _components(depth, pockets, recess, 'pocket', min_area))
+
+
+def main():
+    import argparse
+    import os
+    import time
+
+    from mesh_cache import load_mesh
+
+    parser = argparse.ArgumentParser(description="NucDeck height map hole and pocket detection")
+    parser.add_argument("stl_file", help="STL file to analyze")
+    parser.add_argument("--resolution", type=float, default=DEFAULT_RESOLUTION,
+                        help=f"Pixel size in mm (default: {DEFAULT_RESOLUTION})")
+    parser.add_argument("--axis", choices=list(AXIS_NAMES), help="View axis (default: thinnest)")
+    parser.add_argument("--min-depth", type=float, default=1.0, help="Minimum pocket depth in mm")
+    parser.add_argument("--min-area", type=float, default=1.0, help="Minimum feature area in mm²")
+
+    args = parser.parse_args()
+
+    mesh = load_mesh(args.stl_file)
+    start = time.perf_counter()
+    axis = AXIS_NAMES.index(args.axis) if args.axis else None
+    depth = height_map(mesh, args.resolution, axis)
+    features = segment_features(depth, args.min_depth, args.min_area)
+    elapsed = time.perf_counter() - start
+
+    u, v = (AXIS_NAMES[i] for i in depth['image_axes'])
+    print(f"{os.path.basename(args.stl_file)}: {depth['top'].shape[0]} × {depth['top'].shape[1]} px "
+          f"along {AXIS_NAMES[depth['axis']]} at {args.resolution} mm, {elapsed:.2f}s")
+    for feature in features:
+        center, size = feature['center'], feature['size']
+        print(f"  {feature['type']:<12} {u}={center[0]:7.1f} {v}={center[1]:7.1f}  "
+              f"{size[0]:5.1f} × {size[1]:5.1f} mm  area={feature['area']:7.1f} mm²  "
+              f"depth={feature['depth']:.1f} mm")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+NucDeck Hole Loop Extraction
+Vectorized boundary-edge detection, loop chaining and batched circle fitting
+"""
+
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+
+def edge_face_counts(faces: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Count how many faces use each undirected edge, in one pass.
+
+    Returns the directed face edges (3 per face, in winding order), the
+    index of each directed edge's undirected edge, and the face count of
+    every undirected edge.
+    """
+    faces = np.asarray(faces, dtype=np.int64)
+    directed = faces[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2)
+    _, inverse, counts = np.unique(np.sort(directed, axis=1), axis=0,
+                                   return_inverse=True, return_counts=True)
+    return directed, inverse.reshape(-1), counts
+
+
+def boundary_edges(faces: np.ndarray) -> np.ndarray:
+    """Directed edges used by exactly one face, oriented as in that face"""
+    directed, inverse, counts = edge_face_counts(faces)
+    return directed[counts[inverse] == 1]
+
+
+def chain_loops(edges: np.ndarray) -> List[np.ndarray]:
+    """
+    Chain directed boundary edges into ordered vertex loops.
+
+    Edges are sorted by start vertex so each step is a slice lookup; a
+    vertex with several outgoing boundary edges (touching holes) starts one
+    loop per edge. Open chains are dropped.
+    """
+    if len(edges) == 0:
+        return []
+
+    order = np.argsort(edges[:, 0], kind='stable')
+    starts = edges[order, 0]
+    ends = edges[order, 1]
+    used = np.zeros(len(order), dtype=bool)
+
+    # Range of edges leaving each edge's end vertex, found for all edges at once
+    next_lo = np.searchsorted(starts, ends, side='left')
+    next_hi = np.searchsorted(starts, ends, side='right')
+
+    loops = []
+    for first in range(len(order)):
+        if used[first]:
+            continue
+
+        loop = [starts[first]]
+        current = first
+        closed = False
+        while True:
+            used[current] = True
+            vertex = ends[current]
+            if vertex == loop[0]:
+                closed = True
+                break
+
+            lo, hi = next_lo[current], next_hi[current]
+            candidates = np.flatnonzero(~used[lo:hi])
+            if len(candidates) == 0:
+                break
+            loop.append(vertex)
+            current = lo + candidates[0]
+
+        if closed and len(loop) >= 3:
+            loops.append(np.array(loop, dtype=np.int64))
+
+    return loops
+
+
+def fit_circles_2d(point_sets: Sequence[np.ndarray]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Algebraic least-squares circle fit for many 2D point sets at once.
+
+    Each set solves ``[2x 2y 1] @ [cx cy c] = x^2 + y^2`` through its 3x3
+    normal equations; all systems are accumulated with bincount and solved
+    in one stacked call. Points are centred per set first for conditioning.
+    Returns centers (k, 2), radii (k,) and RMS radial residuals (k,).
+    """
+    k = len(point_sets)
+    if k == 0:
+        return np.zeros((0, 2)), np.zeros(0), np.zeros(0)
+
+    sizes = np.array([len(points) for points in point_sets])
+    points = np.concatenate([np.asarray(p, dtype=np.float64)[:, :2] for p in point_sets])
+    labels = np.repeat(np.arange(k), sizes)
+
+    def sums(values):
+        return np.bincount(labels, weights=values, minlength=k)
+
+    n = np.maximum(sizes, 1).astype(np.float64)
+    means = np.stack([sums(points[:, 0]), sums(points[:, 1])], axis=1) / n[:, None]
+    x = points[:, 0] - means[labels, 0]
+    y = points[:, 1] - means[labels, 1]
+    z = x * x + y * y
+
+    sx, sy = sums(x), sums(y)
+    normal = np.empty((k, 3, 3))
+    normal[:, 0] = np.stack([4 * sums(x * x), 4 * sums(x * y), 2 * sx], axis=1)
+    normal[:, 1] = np.stack([4 * sums(x * y), 4 * sums(y * y), 2 * sy], axis=1)
+    normal[:, 2] = np.stack([2 * sx, 2 * sy, n], axis=1)
+    rhs = np.stack([2 * sums(x * z), 2 * sums(y * z), sums(z)], axis=1)
+
+    # pinv keeps degenerate (collinear or tiny) sets from failing the whole batch
+    params = np.einsum('kij,kj->ki', np.linalg.pinv(normal), rhs)
+    offsets = params[:, :2]
+    radii = np.sqrt(np.maximum((offsets ** 2).sum(axis=1) + params[:, 2], 0.0))
+
+    distances = np.hypot(x - offsets[labels, 0], y - offsets[labels, 1])
+    residuals = np.sqrt(sums((distances - radii[labels]) ** 2) / n)
+
+    radii[sizes < 3] = 0.0
+    return means + offsets, radii, residuals
+
+
+def fit_circle_2d(points: np.ndarray):
+    """
+    Fit a circle to 2D points using least squares
+    Returns center (x, y) and radius
+    """
+    if len(points) < 3:
+        return [0, 0], 0
+    centers, radii, _ = fit_circles_2d([points])
+    return list(centers[0]), radii[0]
+
+
+def extract_hole_loops(vertices: np.ndarray, faces: np.ndarray) -> List[np.ndarray]:
+    """Ordered vertex-index loops around every open boundary of a mesh"""
+    return chain_loops(boundary_edges(faces))
+
+
+def detect_circular_loops(vertices: np.ndarray, faces: np.ndarray, min_radius: float = 0.0,
+                          max_radius: float = np.inf, max_residual_ratio: float = 0.1) -> List[Dict]:
+    """
+    Find boundary loops that are circles in the XY plane.
+
+    A loop qualifies when its fitted radius lies in ``[min_radius, max_radius]``
+    and the RMS radial residual is below ``max_residual_ratio`` of the radius.
+    """
+    vertices = np.asarray(vertices, dtype=np.float64)
+    loops = extract_hole_loops(vertices, faces)
+    if not loops:
+        return []
+
+    loop_points = [vertices[loop] for loop in loops]
+    centers, radii, residuals = fit_circles_2d(loop_points)
+    accepted = ((radii >= min_radius) & (radii <= max_radius)
+                & (residuals <= max_residual_ratio * np.maximum(radii, 1e-12)))
+
+    holes = []
+    for i in np.flatnonzero(accepted):
+        points = loop_points[i]
+        holes.append({
+            'center': [centers[i, 0], centers[i, 1], points[:, 2].mean()],
+            'radius': radii[i],
+            'residual': residuals[i],
+            'loop': loops[i],
+            'points': points,
+            'type': 'circular',
+        })
+    return holes
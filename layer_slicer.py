@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+NucDeck Layer Slicer
+True cross-sections at every print layer height, with per-layer area/perimeter and SVG/GeoJSON previews
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+import logging
+
+import numpy as np
+import trimesh
+
+from slice_circles import section_loops, slice_heights
+
+logger = logging.getLogger(__name__)
+
+# Layer height from build/PETG_PRINT_SETTINGS.md
+DEFAULT_LAYER_HEIGHT = 0.2
+
+# Below this many layers per process the pool start-up costs more than it saves
+MIN_LAYERS_PER_WORKER = 100
+
+# Rings smaller than this (mm²) are slivers where a plane grazes a vertex
+MIN_RING_AREA = 1e-6
+
+SVG_MARGIN = 2.0
+
+_worker_mesh: Optional[trimesh.Trimesh] = None
+
+
+def _init_worker(vertices: np.ndarray, faces: np.ndarray):
+    global _worker_mesh
+    _worker_mesh = trimesh.Trimesh(vertices=vertices, faces=faces, process=False)
+
+
+def _section_chunk(heights: np.ndarray) -> Tuple[List[np.ndarray], np.ndarray]:
+    return section_loops(_worker_mesh, heights)
+
+
+def ring_metrics(rings: Sequence[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """Signed shoelace area and perimeter of every closed ring, in one pass over all points"""
+    if not rings:
+        return np.zeros(0), np.zeros(0)
+    lengths = np.array([len(ring) for ring in rings])
+    points = np.concatenate(rings)
+    ring = np.repeat(np.arange(len(rings)), lengths)
+
+    # Index of each point's successor, wrapping at the end of its ring
+    following = np.arange(len(points)) + 1
+    ends = np.cumsum(lengths) - 1
+    following[ends] = ends - lengths + 1
+    nxt = points[following]
+
+    cross = points[:, 0] * nxt[:, 1] - nxt[:, 0] * points[:, 1]
+    step = np.linalg.norm(nxt - points, axis=1)
+    return 0.5 * np.bincount(ring, cross, len(rings)), np.bincount(ring, step, len(rings))
+
+
+def points_in_ring(points: np.ndarray, ring: np.ndarray) -> np.ndarray:
+    """Even-odd point-in-polygon test of many XY points against one ring"""
+    a = ring
+    b = np.roll(ring, -1, axis=0)
+    x, y = points[:, 0][:, None], points[:, 1][:, None]
+    straddles = (a[:, 1] > y) != (b[:, 1] > y)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        crossing_x = a[:, 0] + (y - a[:, 1]) * (b[:, 0] - a[:, 0]) / (b[:, 1] - a[:, 1])
+    return (straddles & (x < crossing_x)).sum(axis=1) % 2 == 1
+
+
+def nest_rings(rings: List[np.ndarray], areas: np.ndarray) -> List[List[np.ndarray]]:
+    """
+    Group one layer's rings into polygons: an outer ring followed by its holes.
+
+    Sections come out with material on a fixed side, so outer boundaries and
+    holes have opposite winding. Rings are flipped to counter-clockwise outers
+    and clockwise holes (the GeoJSON right-hand rule), and each hole goes to
+    the smallest outer ring containing it.
+    """
+    outer = np.flatnonzero(areas > 0)
+    polygons = [[rings[i]] for i in outer]
+    outer_area = areas[outer]
+    for i in np.flatnonzero(areas < 0):
+        probe = rings[i][:1]
+        inside = [k for k, j in enumerate(outer) if points_in_ring(probe, rings[j])[0]]
+        if not inside:
+            logger.debug(f"Hole ring of {-areas[i]:.2f} mm² has no enclosing outer ring")
+            continue
+        polygons[min(inside, key=lambda k: outer_area[k])].append(rings[i])
+    return polygons
+
+
+def slice_layers(mesh: trimesh.Trimesh, layer_height: float = DEFAULT_LAYER_HEIGHT,
+                 z_range: Optional[Sequence[float]] = None, workers: Optional[int] = None) -> Dict:
+    """
+    Cross-section a mesh at every layer height.
+
+    Planes sit mid-layer, as a slicer places them. All face/plane
+    intersections of a block of layers are computed in one vectorized pass
+    and chained into closed rings (see ``slice_circles.section_loops``);
+    contiguous blocks of layers go to ``workers`` processes when there are
+    enough layers. Each layer has its Z, net material area, perimeter,
+    outer/hole ring counts and the nested polygons.
+    """
+    heights = slice_heights(mesh, layer_height, z_range)
+
+    workers = workers or 1
+    workers = min(workers, max(1, len(heights) // MIN_LAYERS_PER_WORKER))
+    if workers > 1:
+        # Chunks must stay evenly spaced: section_segments indexes planes by spacing
+        chunks = [chunk for chunk in np.array_split(heights, workers * 4) if len(chunk)]
+        offsets = np.cumsum([0] + [len(chunk) for chunk in chunks[:-1]])
+        rings, plane = [], []
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(mesh.vertices.view(np.ndarray), mesh.faces.view(np.ndarray))) as pool:
+            for offset, (chunk_rings, chunk_plane) in zip(offsets, pool.map(_section_chunk, chunks)):
+                rings.extend(chunk_rings)
+                plane.append(chunk_plane + offset)
+        plane = np.concatenate(plane) if plane else np.zeros(0, dtype=np.int64)
+    else:
+        rings, plane = section_loops(mesh, heights)
+
+    # Walk order keeps material on the right; flip so outer rings are counter-clockwise
+    rings = [ring[::-1] for ring in rings]
+    areas, perimeters = ring_metrics(rings)
+    keep = np.abs(areas) > MIN_RING_AREA
+    rings = [ring for ring, k in zip(rings, keep) if k]
+    areas, perimeters, plane = areas[keep], perimeters[keep], plane[keep]
+
+    order = np.argsort(plane, kind='stable')
+    starts = np.searchsorted(plane[order], np.arange(len(heights) + 1))
+    layers = []
+    for index, z in enumerate(heights):
+        members = order[starts[index]:starts[index + 1]]
+        layer_areas = areas[members]
+        layers.append({
+            'index': index,
+            'z': float(z),
+            'area': float(layer_areas.sum()),
+            'perimeter': float(perimeters[members].sum()),
+            'outer_rings': int((layer_areas > 0).sum()),
+            'holes': int((layer_areas < 0).sum()),
+            'polygons': nest_rings([rings[i] for i in members], layer_areas),
+        })
+
+    return {
+        'layer_height': layer_height,
+        'bounds': mesh.bounds.tolist(),
+        'layers': layers,
+    }
+
+
+def layer_svg(layer: Dict, bounds: np.ndarray) -> str:
+    """One layer as an SVG document in millimetres, Y up, holes cut with the even-odd rule"""
+    (x0, y0), (x1, y1) = bounds[0][:2] - SVG_MARGIN, bounds[1][:2] + SVG_MARGIN
+    width, height = x1 - x0, y1 - y0
+    paths = []
+    for polygon in layer['polygons']:
+        d = " ".join("M " + " L ".join(f"{x - x0:.3f},{y1 - y:.3f}" for x, y in ring) + " Z" for ring in polygon)
+        paths.append(f'  <path d="{d}"/>')
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{width:.3f}mm" height="{height:.3f}mm" '
+            f'viewBox="0 0 {width:.3f} {height:.3f}">\n'
+            f'<title>Layer {layer["index"]} at Z={layer["z"]:.3f} mm</title>\n'
+            f'<g fill="#4a90d9" fill-rule="evenodd" stroke="#1f3a5f" stroke-width="0.1">\n'
+            + "\n".join(paths) + "\n</g>\n</svg>\n")
+
+
+def export_svg_layers(result: Dict, directory: str, stem: str = "layer") -> List[str]:
+    """Write one SVG per non-empty layer into ``directory``, all sharing the part's XY frame"""
+    os.makedirs(directory, exist_ok=True)
+    bounds = np.array(result['bounds'])
+    width = len(str(len(result['layers'])))
+    paths = []
+    for layer in result['layers']:
+        if not layer['polygons']:
+            continue
+        path = os.path.join(directory, f"{stem}_{layer['index']:0{width}d}.svg")
+        with open(path, 'w') as f:
+            f.write(layer_svg(layer, bounds))
+        paths.append(path)
+    return paths
+
+
+def layers_geojson(result: Dict) -> Dict:
+    """FeatureCollection with one MultiPolygon feature per non-empty layer"""
+    features = []
+    for layer in result['layers']:
+        if not layer['polygons']:
+            continue
+        coordinates = [[np.vstack([ring, ring[:1]]).round(4).tolist() for ring in polygon]
+                       for polygon in layer['polygons']]
+        features.append({
+            'type': 'Feature',
+            'geometry': {'type': 'MultiPolygon', 'coordinates': coordinates},
+            'properties': {key: layer[key] for key in ('index', 'z', 'area', 'perimeter', 'outer_rings', 'holes')},
+        })
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+def layer_table(result: Dict) -> List[Dict]:
+    """Per-layer statistics without the polygon geometry"""
+    return [{key: value for key, value in layer.items() if key != 'polygons'} for layer in result['layers']]
+
+
+def print_layer_summary(result: Dict):
+    """Print area/perimeter extremes and layers whose area jumps sharply"""
+    layers = result['layers']
+    filled = [layer for layer in layers if layer['polygons']]
+    print(f"{len(layers)} layers at {result['layer_height']} mm, {len(filled)} with material")
+    if not filled:
+        return
+
+    area = np.array([layer['area'] for layer in layers])
+    largest = max(filled, key=lambda layer: layer['area'])
+    smallest = min(filled, key=lambda layer: layer['area'])
+    print(f"  Largest section:  {largest['area']:9.1f} mm² at Z={largest['z']:.2f}")
+    print(f"  Smallest section: {smallest['area']:9.1f} mm² at Z={smallest['z']:.2f}")
+    print(f"  Longest perimeter: {max(l['perimeter'] for l in filled):.1f} mm")
+    print(f"  Estimated volume: {area.sum() * result['layer_height']:,.0f} mm³")
+
+    # Sudden area drops are where overhangs and bridges start
+    change = np.diff(area)
+    for index in np.argsort(change)[:3]:
+        if change[index] < 0:
+            print(f"  Area drop {-change[index]:8.1f} mm² entering Z={layers[index + 1]['z']:.2f}")
+
+
+def main():
+    import argparse
+    import json
+
+    from mesh_cache import load_mesh
+
+    parser = argparse.ArgumentParser(description="NucDeck layer cross-section slicer")
+    parser.add_argument("stl_file", help="STL file to slice")
+    parser.add_argument("--layer-height", type=float, default=DEFAULT_LAYER_HEIGHT,
+                        help=f"Layer height in mm (default: {DEFAULT_LAYER_HEIGHT})")
+    parser.add_argument("--z-range", type=float, nargs=2, metavar=("LOW", "HIGH"), help="Only slice this Z range")
+    parser.add_argument("--workers", type=int, help="Parallel processes (default: CPU count)")
+    parser.add_argument("--svg-dir", type=str, help="Write one SVG preview per layer into this directory")
+    parser.add_argument("--geojson", type=str, help="Write every layer's polygons as GeoJSON")
+    parser.add_argument("--output", type=str, help="Write per-layer area/perimeter as JSON")
+
+    args = parser.parse_args()
+
+    mesh = load_mesh(args.stl_file)
+    start = time.perf_counter()
+    result = slice_layers(mesh, args.layer_height, args.z_range, args.workers or os.cpu_count())
+    print(f"{os.path.basename(args.stl_file)}: sliced in {time.perf_counter() - start:.2f}s")
+    print_layer_summary(result)
+
+    if args.svg_dir:
+        stem = os.path.splitext(os.path.basename(args.stl_file))[0].replace(" ", "_")
+        written = export_svg_layers(result, args.svg_dir, stem)
+        print(f"{len(written)} SVG layers saved to {args.svg_dir}")
+
+    if args.geojson:
+        with open(args.geojson, 'w') as f:
+            json.dump(layers_geojson(result), f)
+        print(f"Layer polygons saved to {args.geojson}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'layer_height': result['layer_height'], 'layers': layer_table(result)}, f, indent=2)
+        print(f"Layer statistics saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+NucDeck Mesh Cache
+Pre-welded trimesh meshes persisted as .npz, keyed by source file content
+"""
+
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Union
+import logging
+
+import numpy as np
+import trimesh
+
+from render_cache import hash_file
+from stl_io import load_triangles
+
+logger = logging.getLogger(__name__)
+
+# Bump when the stored arrays change; trimesh's version is part of the key
+# too, since vertex welding may differ between releases
+MESH_CACHE_VERSION = 2
+
+DEFAULT_CACHE_DIR = Path(os.environ.get(
+    'NUCDECK_MESH_CACHE', Path(__file__).resolve().parent / 'output' / '.mesh_cache'))
+
+# Arrays computed once by trimesh and restored straight into the mesh cache
+CACHED_PROPERTIES = (
+    'face_adjacency',
+    'face_adjacency_edges',
+    'edges_unique',
+    'edges_unique_idx',
+    'edges_unique_inverse',
+)
+
+
+class MeshCache:
+    """
+    Two-level cache for analysis meshes.
+
+    The disk level stores welded vertices, faces, face normals, face adjacency
+    and unique edges for each distinct file content. The in-process level keeps
+    the most recent meshes keyed by path, size and mtime, so loading the same
+    file twice in one script costs nothing. Returned meshes are shared: call
+    ``mesh.copy()`` before modifying one.
+    """
+
+    def __init__(self, cache_dir: Union[str, Path] = DEFAULT_CACHE_DIR, max_memory_entries: int = 16):
+        self.cache_dir = Path(cache_dir)
+        self.max_memory_entries = max_memory_entries
+        self._memory = OrderedDict()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _entry_path(self, content_hash: str) -> Path:
+        return self.cache_dir / f"{content_hash}-v{MESH_CACHE_VERSION}-trimesh{trimesh.__version__}.npz"
+
+    def _build(self, filepath: Path) -> trimesh.Trimesh:
+        mesh = None
+        if filepath.suffix.lower() == '.stl':
+            # Read through the binary sidecar (converted once) instead of
+            # re-parsing ASCII text; welding happens in the constructor
+            try:
+                triangles = load_triangles(filepath)
+                mesh = trimesh.Trimesh(vertices=np.asarray(triangles, dtype=np.float64).reshape(-1, 3),
+                                       faces=np.arange(len(triangles) * 3).reshape(-1, 3))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Binary STL read failed for {filepath.name} ({e}), using trimesh.load")
+        if mesh is None:
+            mesh = trimesh.load(filepath, force='mesh')
+        # Computing these fills every entry of CACHED_PROPERTIES as a side effect
+        mesh.face_normals
+        mesh.face_adjacency
+        mesh.edges_unique
+        return mesh
+
+    def _save(self, mesh: trimesh.Trimesh, entry: Path):
+        arrays = {
+            'vertices': mesh.vertices.view(np.ndarray),
+            'faces': mesh.faces.view(np.ndarray),
+            'face_normals': mesh.face_normals.view(np.ndarray),
+        }
+        for name in CACHED_PROPERTIES:
+            arrays[name] = np.asarray(mesh._cache[name])
+
+        temp_entry = entry.with_name(f".{entry.stem}.{os.getpid()}.tmp.npz")
+        np.savez_compressed(temp_entry, **arrays)
+        os.replace(temp_entry, entry)
+
+    def _restore(self, entry: Path) -> trimesh.Trimesh:
+        with np.load(entry) as data:
+            mesh = trimesh.Trimesh(vertices=data['vertices'], faces=data['faces'],
+                                   face_normals=data['face_normals'], process=False)
+            for name in CACHED_PROPERTIES:
+                mesh._cache[name] = data[name]
+        return mesh
+
+    def load(self, filepath: Union[str, Path]) -> trimesh.Trimesh:
+        """Load a mesh, reusing the in-process copy or the on-disk arrays when possible"""
+        filepath = Path(filepath).resolve()
+        stat = filepath.stat()
+        memory_key = (str(filepath), stat.st_size, stat.st_mtime_ns)
+
+        if memory_key in self._memory:
+            self._memory.move_to_end(memory_key)
+            return self._memory[memory_key]
+
+        entry = self._entry_path(hash_file(filepath))
+        mesh = None
+        if entry.exists():
+            try:
+                mesh = self._restore(entry)
+            except (OSError, KeyError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable mesh cache entry {entry.name}: {e}")
+
+        if mesh is None:
+            mesh = self._build(filepath)
+            self._save(mesh, entry)
+
+        self._memory[memory_key] = mesh
+        if len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+        return mesh
+
+    def clear(self):
+        """Drop the in-process meshes and every on-disk entry"""
+        self._memory.clear()
+        for path in self.cache_dir.glob('*.npz'):
+            path.unlink(missing_ok=True)
+
+
+_default_cache: Optional[MeshCache] = None
+
+
+def load_mesh(filepath: Union[str, Path]) -> trimesh.Trimesh:
+    """Load a mesh through the shared default cache (drop-in for ``trimesh.load``)"""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = MeshCache()
+    return _default_cache.load(filepath)
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+NucDeck Mesh Diff
+Added and removed material between two versions of a part, from a shared voxel grid and KD-tree surface distances
+"""
+
+import os
+from typing import Dict, List, Optional
+import logging
+
+import numpy as np
+import trimesh
+from scipy.spatial import cKDTree
+
+from assembly_check import triangle_pairs
+from voxel_grid import DEFAULT_PITCH, OccupancyGrid, lattice, voxelize
+
+logger = logging.getLogger(__name__)
+
+# Changed blobs smaller than this (mm³) are voxel noise along unchanged walls
+DEFAULT_MIN_VOLUME = 1.0
+
+# Surface samples for the distance KD-tree are spaced about this many
+# voxel pitches apart
+SAMPLE_SPACING = 1.0
+
+# Vertices whose sampled distance is under this many sample spacings get
+# their exact distance to the original surface
+REFINE_DISTANCE = 2.0
+
+# Diverging colour ramp for signed distance: removed (inside), unchanged, added
+COLOR_REMOVED = np.array([40, 90, 220])
+COLOR_UNCHANGED = np.array([235, 235, 235])
+COLOR_ADDED = np.array([220, 50, 40])
+
+
+def surface_tree(mesh: trimesh.Trimesh, spacing: float, seed: int = 0) -> cKDTree:
+    """KD-tree over a mesh's vertices plus area-proportional surface samples about ``spacing`` apart"""
+    count = int(np.ceil(mesh.area / spacing ** 2))
+    samples, _ = trimesh.sample.sample_surface(mesh, count, seed=seed)
+    return cKDTree(np.vstack([mesh.vertices, samples]))
+
+
+def surface_distance(mesh: trimesh.Trimesh, points: np.ndarray, reach: float) -> np.ndarray:
+    """
+    Exact distance from each point to the mesh surface, inf beyond ``reach``.
+
+    Points are joined to the triangles whose boxes come within ``reach`` on
+    the same grid as the assembly checker, and each pair's closest point is
+    measured in one batched call per chunk.
+    """
+    distance = np.full(len(points), np.inf)
+    triangles = mesh.triangles
+    for a, b in triangle_pairs(np.repeat(points[:, None], 3, axis=1), triangles, reach):
+        closest = trimesh.triangles.closest_point(triangles[b], points[a])
+        np.minimum.at(distance, a, np.linalg.norm(points[a] - closest, axis=1))
+    return distance
+
+
+def _with_depth(grid: OccupancyGrid, mask: np.ndarray, tree: cKDTree, min_voxels: int) -> List[Dict]:
+    """Connected regions of ``mask``, each with how far it reaches from the other part's surface"""
+    index = np.argwhere(mask)
+    depth = np.zeros(mask.shape)
+    depth[tuple(index.T)] = tree.query(grid.centers(index))[0]
+
+    regions = grid.regions(mask, min_voxels, values=depth)
+    for region in regions:
+        region['max_depth'] = region.pop('max_value')
+    return regions
+
+
+def diff_meshes(original: trimesh.Trimesh, modified: trimesh.Trimesh, pitch: float = DEFAULT_PITCH,
+                min_volume: float = DEFAULT_MIN_VOLUME) -> Dict:
+    """
+    Where material was removed from or added to ``original`` in ``modified``.
+
+    Both meshes are voxelized on one shared lattice, so removed material is
+    simply ``original & ~modified`` and added material the reverse; each is
+    split into face-connected blobs with volume, bounds and centroid
+    (blobs under ``min_volume`` mm³ are dropped as surface noise). Every
+    blob also gets its ``max_depth``: the largest distance from its voxels
+    to the other part's surface. ``vertex_distance`` is the signed distance
+    (negative inside the original) from each modified vertex to the
+    original surface: exact near the surface, so unchanged areas read 0,
+    and accurate to roughly one pitch further away.
+    """
+    bounds = np.array([np.minimum(original.bounds[0], modified.bounds[0]),
+                       np.maximum(original.bounds[1], modified.bounds[1])])
+    origin, shape = lattice(bounds, pitch)
+    before = voxelize(original, pitch, origin, shape)
+    after = voxelize(modified, pitch, origin, shape)
+
+    removed = before.solid & ~after.solid
+    added = after.solid & ~before.solid
+    min_voxels = max(int(np.ceil(min_volume / before.voxel_volume)), 1)
+
+    original_tree = surface_tree(original, pitch * SAMPLE_SPACING)
+    modified_tree = surface_tree(modified, pitch * SAMPLE_SPACING)
+
+    distance, _ = original_tree.query(modified.vertices)
+    sign = np.where(before.contains(modified.vertices), -1.0, 1.0)
+
+    # Sample distances overestimate by up to the sample spacing, which would
+    # tint unchanged faces; measure the near ones exactly against the surface
+    reach = REFINE_DISTANCE * pitch * SAMPLE_SPACING
+    near = np.flatnonzero(distance < reach)
+    if len(near):
+        distance[near] = np.minimum(distance[near], surface_distance(original, modified.vertices[near], reach))
+
+    removed_regions = _with_depth(before, removed, modified_tree, min_voxels)
+    added_regions = _with_depth(before, added, original_tree, min_voxels)
+    removed_volume = sum(region['volume'] for region in removed_regions)
+    added_volume = sum(region['volume'] for region in added_regions)
+    return {
+        'pitch': pitch,
+        'min_volume': min_volume,
+        'original_volume': before.internal_volume(),
+        'modified_volume': after.internal_volume(),
+        'removed_volume': removed_volume,
+        'added_volume': added_volume,
+        'net_change': added_volume - removed_volume,
+        'removed': removed_regions,
+        'added': added_regions,
+        'vertex_distance': distance * sign,
+    }
+
+
+def distance_colors(distance: np.ndarray, limit: Optional[float] = None) -> np.ndarray:
+    """RGBA colours for signed distances: blue inside, grey unchanged, red outside"""
+    if limit is None:
+        limit = float(np.abs(distance).max()) if len(distance) else 1.0
+    t = np.clip(distance / max(limit, 1e-9), -1.0, 1.0)[:, None]
+    rgb = np.where(t < 0, COLOR_UNCHANGED + (COLOR_REMOVED - COLOR_UNCHANGED) * -t,
+                   COLOR_UNCHANGED + (COLOR_ADDED - COLOR_UNCHANGED) * t)
+    return np.column_stack([rgb.round().astype(np.uint8), np.full(len(t), 255, dtype=np.uint8)])
+
+
+def export_diff_ply(modified: trimesh.Trimesh, distance: np.ndarray, path: str, limit: Optional[float] = None):
+    """Write the modified mesh with vertices coloured by signed distance to the original"""
+    colored = trimesh.Trimesh(vertices=modified.vertices, faces=modified.faces,
+                              vertex_colors=distance_colors(distance, limit), process=False)
+    colored.export(path)
+
+
+def print_diff_summary(diff: Dict, max_regions: int = 5):
+    """Print volume change and the largest removed/added blobs"""
+    print(f"Geometric diff (pitch {diff['pitch']} mm): removed {diff['removed_volume']:,.0f} mm³, "
+          f"added {diff['added_volume']:,.0f} mm³, net {diff['net_change']:+,.0f} mm³")
+    for kind in ('removed', 'added'):
+        regions = diff[kind]
+        print(f"  {kind.capitalize()} regions (≥ {diff['min_volume']} mm³): {len(regions)}")
+        for region in regions[:max_regions]:
+            x, y, z = region['centroid']
+            dx, dy, dz = region['dimensions']
+            print(f"    {region['volume']:10,.1f} mm³ at ({x:.1f}, {y:.1f}, {z:.1f}), "
+                  f"{dx:.1f} × {dy:.1f} × {dz:.1f} mm, up to {region['max_depth']:.2f} mm deep")
+
+
+def main():
+    import argparse
+    import json
+    import time
+
+    from mesh_cache import load_mesh
+
+    parser = argparse.ArgumentParser(description="NucDeck geometric diff between two meshes")
+    parser.add_argument("original", help="Original STL")
+    parser.add_argument("modified", help="Modified STL")
+    parser.add_argument("--pitch", type=float, default=DEFAULT_PITCH,
+                        help=f"Voxel size in mm (default: {DEFAULT_PITCH})")
+    parser.add_argument("--min-volume", type=float, default=DEFAULT_MIN_VOLUME,
+                        help=f"Smallest reported blob in mm³ (default: {DEFAULT_MIN_VOLUME})")
+    parser.add_argument("--ply", type=str, help="Write the modified mesh coloured by distance as PLY")
+    parser.add_argument("--output", type=str, help="Write the changed regions as JSON")
+
+    args = parser.parse_args()
+
+    original, modified = load_mesh(args.original), load_mesh(args.modified)
+    start = time.perf_counter()
+    diff = diff_meshes(original, modified, args.pitch, args.min_volume)
+    print(f"{os.path.basename(args.original)} → {os.path.basename(args.modified)}: "
+          f"diffed in {time.perf_counter() - start:.2f}s")
+    print_diff_summary(diff)
+
+    if args.ply:
+        export_diff_ply(modified, diff['vertex_distance'], args.ply)
+        print(f"Distance-coloured mesh saved to {args.ply}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({key: value for key, value in diff.items() if key != 'vertex_distance'}, f, indent=2)
+        print(f"Diff saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
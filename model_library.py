@@ -6,18 +6,58 @@ Manages STL/STEP files and provides interfaces for OpenSCAD integration
 
 import os
 import json
+import time
 import yaml
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
 import hashlib
+import logging
+
+from render_cache import hash_file
+from stl_io import binary_path, ensure_binary, is_binary_sidecar, is_binary_stl
+
+logger = logging.getLogger(__name__)
+
+
+def analyze_model(model_path: str, metrics: Optional[Sequence[str]] = None) -> Dict:
+    """
+    Compute analysis metrics for one STL (runs in a worker process).
+
+    Returns the JSON-ready metrics with the content hash they belong to and
+    the time spent per metric, so the catalog can skip unchanged files.
+    """
+    from analysis import METRICS, compute, jsonable
+    from mesh_cache import load_mesh
+
+    start = time.perf_counter()
+    content_hash = hash_file(Path(model_path))
+    mesh = load_mesh(model_path)
+    load_time = time.perf_counter() - start
+
+    timings = {}
+    # The pool already uses every core, so thickness rays stay in-process
+    results = compute(mesh, metrics, {'thickness_workers': 1}, timings)
+    return {
+        'content_hash': content_hash,
+        'metrics': {name: jsonable(value) for name, value in results.items() if METRICS[name]['serialize']},
+        'faces': len(mesh.faces),
+        'load_time': load_time,
+        'metric_times': timings,
+        'total_time': time.perf_counter() - start,
+        'analyzed_at': time.time(),
+    }
 
 class ModelLibrary:
     """Manages the collection of 3D models and their metadata"""
     
-    def __init__(self, config_path: str = "config.yaml"):
+    def __init__(self, config_path: str = "config.yaml", convert_binary: bool = True):
         with open(config_path, 'r') as f:
             self.config = yaml.safe_load(f)
         
+        # Whether scans write .bin.stl sidecars for ASCII STLs
+        self.convert_binary = convert_binary
+        
         self.base_path = Path(".")
         self.cache_file = "model_cache.json"
         self.model_cache = self._load_cache()
@@ -34,8 +74,8 @@ class ModelLibrary:
         with open(self.cache_file, 'w') as f:
             json.dump(self.model_cache, f, indent=2)
     
-    def scan_models(self) -> Dict[str, List[str]]:
-        """Scan directories for STL and STEP files"""
+    def scan_models(self, convert_binary: Optional[bool] = None) -> Dict[str, List[str]]:
+        """Scan directories for STL and STEP files, converting ASCII STLs to binary sidecars unless disabled"""
         models = {
             'housing_stl': [],
             'housing_step': [],
@@ -71,8 +111,24 @@ class ModelLibrary:
                     if subdir.suffix == ".STEP":
                         models['buttons_step'].append(subdir)
         
+        for category in ('housing_stl', 'buttons_stl'):
+            models[category] = [path for path in models[category] if not is_binary_sidecar(path)]
+        
+        if convert_binary if convert_binary is not None else self.convert_binary:
+            self.convert_to_binary(models['housing_stl'] + models['buttons_stl'])
+        
         return models
     
+    def convert_to_binary(self, stl_paths: List[Path]) -> Dict[str, Path]:
+        """Make sure every STL has a binary counterpart; returns source -> binary path"""
+        binaries = {}
+        for stl_path in stl_paths:
+            try:
+                binaries[str(stl_path)] = ensure_binary(stl_path)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not convert {stl_path} to binary STL: {e}")
+        return binaries
+    
     def get_model_info(self, model_path: Path) -> Dict:
         """Get metadata for a specific model"""
         model_key = str(model_path)
@@ -86,6 +142,7 @@ class ModelLibrary:
             'path': str(model_path),
             'type': model_path.suffix.lower(),
             'size': model_path.stat().st_size if model_path.exists() else 0,
+            'binary_path': self._binary_path(model_path),
             'category': self._categorize_model(model_path),
             'description': self._generate_description(model_path)
         }
@@ -94,6 +151,19 @@ class ModelLibrary:
         self._save_cache()
         return info
     
+    def _binary_path(self, model_path: Path) -> Optional[str]:
+        """Binary STL for a model: the file itself or a current sidecar, converted now if ``convert_binary`` is set"""
+        if model_path.suffix.lower() != '.stl' or not model_path.exists():
+            return None
+        if is_binary_stl(model_path):
+            return str(model_path)
+        sidecar = binary_path(model_path)
+        if sidecar.exists() and sidecar.stat().st_mtime >= model_path.stat().st_mtime:
+            return str(sidecar)
+        if self.convert_binary:
+            return str(ensure_binary(model_path))
+        return None
+    
     def _categorize_model(self, model_path: Path) -> str:
         """Categorize model based on path and name"""
         path_str = str(model_path).lower()
@@ -179,6 +249,76 @@ class ModelLibrary:
         
         return "\n".join(imports)
     
+    def analyze_library(self, workers: Optional[int] = None, metrics: Optional[Sequence[str]] = None,
+                        force: bool = False) -> Dict:
+        """
+        Analyze every STL found by ``scan_models`` in a process pool.
+
+        Results are stored under ``analysis`` in each model's catalog entry,
+        together with the file's content hash; parts whose hash and metric
+        list are unchanged since the last run are skipped unless ``force``.
+        Returns a report with per-part timings and overall throughput.
+        """
+        from analysis import METRICS
+
+        models = self.scan_models()
+        paths = [Path(p) for p in models['housing_stl'] + models['buttons_stl']]
+        wanted = sorted(metrics or [name for name, entry in METRICS.items() if entry['serialize']])
+
+        pending, skipped = [], []
+        for path in paths:
+            info = self.get_model_info(path)
+            previous = info.get('analysis')
+            if (not force and previous
+                    and previous.get('content_hash') == hash_file(path)
+                    and set(wanted) <= set(previous.get('metrics', {}))):
+                skipped.append(str(path))
+            else:
+                pending.append(path)
+
+        print(f"Analyzing {len(pending)} of {len(paths)} parts "
+              f"({len(skipped)} unchanged), {workers or os.cpu_count()} workers")
+
+        parts = []
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(analyze_model, str(path), wanted): path for path in pending}
+            for future in as_completed(futures):
+                path = futures[future]
+                size = path.stat().st_size
+                try:
+                    analysis = future.result()
+                except Exception as e:
+                    logger.warning(f"Analysis failed for {path}: {e}")
+                    parts.append({'path': str(path), 'size': size, 'error': str(e)})
+                    continue
+
+                analysis['metric_list'] = wanted
+                self.model_cache[str(path)]['analysis'] = analysis
+                self._save_cache()
+                parts.append({'path': str(path), 'size': size, 'faces': analysis['faces'],
+                              'load_time': analysis['load_time'], 'total_time': analysis['total_time'],
+                              'metric_times': analysis['metric_times']})
+                print(f"  {path.name:<45} {analysis['faces']:>8,} faces  {analysis['total_time']:6.2f}s")
+
+        elapsed = time.perf_counter() - start
+        analyzed = [part for part in parts if 'error' not in part]
+        megabytes = sum(part['size'] for part in analyzed) / 1e6
+        report = {
+            'parts': parts,
+            'skipped': skipped,
+            'analyzed': len(analyzed),
+            'failed': len(parts) - len(analyzed),
+            'wall_time': elapsed,
+            'parts_per_sec': len(analyzed) / elapsed if elapsed > 0 else 0.0,
+            'mb_per_sec': megabytes / elapsed if elapsed > 0 else 0.0,
+            'metrics': wanted,
+        }
+        print(f"Analyzed {len(analyzed)} parts ({megabytes:.1f} MB) in {elapsed:.2f}s: "
+              f"{report['parts_per_sec']:.2f} parts/s, {report['mb_per_sec']:.2f} MB/s"
+              + (f", {report['failed']} failed" if report['failed'] else ""))
+        return report
+    
     def export_model_catalog(self, output_file: str = "model_catalog.json"):
         """Export complete model catalog"""
         models = self.scan_models()
@@ -203,10 +343,24 @@ def main():
     parser.add_argument("--catalog", action="store_true", help="Export model catalog")
     parser.add_argument("--generate-imports", action="store_true", help="Generate OpenSCAD imports")
     parser.add_argument("--category", type=str, help="Filter by category")
+    parser.add_argument("--no-binary", action="store_true", help="Skip converting ASCII STLs to binary")
+    parser.add_argument("--analyze", action="store_true", help="Analyze every STL and store results in the catalog")
+    parser.add_argument("--workers", type=int, help="Analysis processes (default: CPU count)")
+    parser.add_argument("--metrics", nargs="+", help="Metrics to compute (default: all)")
+    parser.add_argument("--force", action="store_true", help="Re-analyze unchanged files too")
+    parser.add_argument("--report", type=str, help="Write analysis timings and throughput as JSON")
     
     args = parser.parse_args()
     
-    library = ModelLibrary()
+    library = ModelLibrary(convert_binary=not args.no_binary)
+    
+    if args.analyze:
+        report = library.analyze_library(args.workers, args.metrics, args.force)
+        if args.report:
+            os.makedirs(os.path.dirname(args.report) or ".", exist_ok=True)
+            with open(args.report, 'w') as f:
+                json.dump(report, f, indent=2)
+            print(f"Analysis report saved to {args.report}")
     
     if args.scan:
         models = library.scan_models()
@@ -9,6 +9,9 @@ import numpy as np
 import os
 from scipy.spatial.transform import Rotation
 
+from csg_engine import get_engine
+from profiles import extrude_profile, rounded_rectangle
+
 def create_rounded_rectangle_cutout(width, height, depth, corner_radius=1.0, center=(0, 0, 0)):
     """
     Create a rounded rectangle cutout mesh for boolean subtraction
@@ -21,60 +24,8 @@ def create_rounded_rectangle_cutout(width, height, depth, corner_radius=1.0, cen
     - center: center position (x, y, z)
     """
     
-    # Create the main rectangle
-    box = trimesh.creation.box(extents=[width, height, depth])
-    
-    # Create corner cylinders for filleting
-    if corner_radius > 0:
-        # Calculate corner positions
-        half_w = width / 2 - corner_radius
-        half_h = height / 2 - corner_radius
-        
-        corners = [
-            [half_w, half_h, 0],      # +X, +Y
-            [-half_w, half_h, 0],     # -X, +Y
-            [-half_w, -half_h, 0],    # -X, -Y
-            [half_w, -half_h, 0]      # +X, -Y
-        ]
-        
-        # Create rounded corners
-        corner_meshes = []
-        for corner_pos in corners:
-            # Create cylinder for corner
-            cylinder = trimesh.creation.cylinder(
-                radius=corner_radius,
-                height=depth,
-                sections=16  # Smooth corners
-            )
-            cylinder.apply_translation(corner_pos)
-            corner_meshes.append(cylinder)
-        
-        # Create rectangles to connect corners
-        # Horizontal rectangles (top and bottom)
-        top_rect = trimesh.creation.box(extents=[width - 2*corner_radius, 2*corner_radius, depth])
-        top_rect.apply_translation([0, half_h + corner_radius, 0])
-        
-        bottom_rect = trimesh.creation.box(extents=[width - 2*corner_radius, 2*corner_radius, depth])
-        bottom_rect.apply_translation([0, -half_h - corner_radius, 0])
-        
-        # Vertical rectangles (left and right)
-        left_rect = trimesh.creation.box(extents=[2*corner_radius, height - 2*corner_radius, depth])
-        left_rect.apply_translation([-half_w - corner_radius, 0, 0])
-        
-        right_rect = trimesh.creation.box(extents=[2*corner_radius, height - 2*corner_radius, depth])
-        right_rect.apply_translation([half_w + corner_radius, 0, 0])
-        
-        # Combine all parts
-        cutout_parts = [box] + corner_meshes + [top_rect, bottom_rect, left_rect, right_rect]
-        cutout = trimesh.util.concatenate(cutout_parts)
-        cutout = cutout.convex_hull  # Ensure clean union
-    else:
-        cutout = box
-    
-    # Position at the specified center
-    cutout.apply_translation(center)
-    
-    return cutout
+    # Rounded rectangle profile extruded straight to a watertight prism
+    return extrude_profile(rounded_rectangle(width, height, corner_radius), depth, center)
 
 def analyze_existing_cutout(mesh, search_center, search_radius=50):
     """
@@ -217,7 +168,7 @@ def modify_front_cover():
     # Perform boolean subtraction
     print(f"\nPerforming boolean subtraction...")
     try:
-        modified_mesh = original_mesh.difference(cutout_mesh)
+        modified_mesh = get_engine().difference(original_mesh, [cutout_mesh])
         
         if modified_mesh is None or len(modified_mesh.vertices) == 0:
             print("Error: Boolean operation failed - empty result")
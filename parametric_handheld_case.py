@@ -9,6 +9,9 @@ import numpy as np
 import os
 from math import cos, sin, radians, sqrt
 
+from csg_engine import CSGError, get_engine
+from profiles import cylinder, extrude_profile, rounded_rectangle
+
 class ParametricHandheldCase:
     """
     Full parametric handheld case generator with modular cutout system
@@ -75,6 +78,9 @@ class ParametricHandheldCase:
             'edge_fillet': 1.5,          # External edge fillet radius
             'internal_fillet': 0.5,      # Internal feature fillet
         }
+        
+        # Boolean backend (manifold3d, trimesh or OpenSCAD, whichever works)
+        self.csg = get_engine()
     
     def create_base_shell(self, is_front=True):
         """
@@ -102,7 +108,7 @@ class ParametricHandheldCase:
         right_grip = self.create_ergonomic_grip(right_grip_center, depth, is_left=False)
         
         # Combine all parts
-        shell = main_body.union([left_grip, right_grip])
+        shell = self.csg.union([main_body, left_grip, right_grip])
         
         # Add edge fillets for printability
         if hasattr(shell, 'visual'):
@@ -143,9 +149,9 @@ class ParametricHandheldCase:
         
         # Apply beveling
         try:
-            grip = grip.difference(bevel_box)
-        except:
-            pass  # Keep original if boolean fails
+            grip = self.csg.difference(grip, [bevel_box])
+        except CSGError as e:
+            print(f"  ⚠️ Grip bevel failed, keeping unbevelled grip: {e}")
         
         return grip
     
@@ -155,21 +161,12 @@ class ParametricHandheldCase:
         """
         params = self.params
         
-        # Create main cutout box
-        cutout = trimesh.creation.box(
-            extents=[
-                params['phone_cutout_width'],
-                params['phone_cutout_height'],
-                params['front_depth'] + 2  # Cut all the way through
-            ],
-            transform=trimesh.transformations.translation_matrix([0, 0, params['front_depth']/2])
+        # Rounded rectangle extruded through the whole front shell
+        return extrude_profile(
+            rounded_rectangle(params['phone_cutout_width'], params['phone_cutout_height'], params['internal_fillet']),
+            params['front_depth'] + 2,
+            [0, 0, params['front_depth']/2]
         )
-        
-        # Add corner fillets for clean edges
-        if hasattr(cutout, 'visual'):
-            cutout = self.add_corner_fillets(cutout, params['internal_fillet'])
-        
-        return cutout
     
     def create_joystick_cutout(self, center, is_left=True):
         """
@@ -178,16 +175,11 @@ class ParametricHandheldCase:
         params = self.params
         
         # Main cylindrical cutout
-        joystick = trimesh.creation.cylinder(
-            radius=params['joystick_diameter']/2,
-            height=params['joystick_depth'],
-            sections=32,
-            transform=trimesh.transformations.translation_matrix([
-                center[0], center[1], params['joystick_depth']/2
-            ])
+        return cylinder(
+            params['joystick_diameter']/2,
+            params['joystick_depth'],
+            [center[0], center[1], params['joystick_depth']/2]
         )
-        
-        return joystick
     
     def create_dpad_cutout(self, center):
         """
@@ -195,19 +187,12 @@ class ParametricHandheldCase:
         """
         params = self.params
         
-        # Create rounded square for D-pad
-        dpad = trimesh.creation.box(
-            extents=[params['dpad_size'], params['dpad_size'], params['front_depth'] + 2],
-            transform=trimesh.transformations.translation_matrix([
-                center[0], center[1], params['front_depth']/2
-            ])
+        # Rounded square for D-pad
+        return extrude_profile(
+            rounded_rectangle(params['dpad_size'], params['dpad_size'], params['dpad_corner_radius']),
+            params['front_depth'] + 2,
+            [center[0], center[1], params['front_depth']/2]
         )
-        
-        # Add corner rounding
-        if hasattr(dpad, 'visual'):
-            dpad = self.add_corner_fillets(dpad, params['dpad_corner_radius'])
-        
-        return dpad
     
     def create_abxy_cutouts(self, center):
         """
@@ -228,12 +213,7 @@ class ParametricHandheldCase:
         
         buttons = []
         for pos in positions:
-            button = trimesh.creation.cylinder(
-                radius=diameter/2,
-                height=depth,
-                sections=16,
-                transform=trimesh.transformations.translation_matrix(pos)
-            )
+            button = cylinder(diameter/2, depth, pos)
             buttons.append(button)
         
         return buttons
@@ -246,23 +226,8 @@ class ParametricHandheldCase:
         diameter = params['start_menu_diameter']
         depth = params['front_depth'] + 2
         
-        start_button = trimesh.creation.cylinder(
-            radius=diameter/2,
-            height=depth,
-            sections=16,
-            transform=trimesh.transformations.translation_matrix([
-                center_left[0], center_left[1], depth/2
-            ])
-        )
-        
-        menu_button = trimesh.creation.cylinder(
-            radius=diameter/2,
-            height=depth,
-            sections=16,
-            transform=trimesh.transformations.translation_matrix([
-                center_right[0], center_right[1], depth/2
-            ])
-        )
+        start_button = cylinder(diameter/2, depth, [center_left[0], center_left[1], depth/2])
+        menu_button = cylinder(diameter/2, depth, [center_right[0], center_right[1], depth/2])
         
         return [start_button, menu_button]
     
@@ -348,12 +313,7 @@ class ParametricHandheldCase:
         
         # Power switch - top right corner
         switch_center = [params['case_width']/2 - 20, params['case_height']/2 - 20, params['back_depth']/2]
-        switch_cutout = trimesh.creation.cylinder(
-            radius=params['power_switch_diameter']/2,
-            height=params['back_depth'] + 2,
-            sections=32,
-            transform=trimesh.transformations.translation_matrix(switch_center)
-        )
+        switch_cutout = cylinder(params['power_switch_diameter']/2, params['back_depth'] + 2, switch_center)
         cutouts.append(switch_cutout)
         
         # USB splitter - bottom
@@ -390,13 +350,78 @@ class ParametricHandheldCase:
         # In a full implementation, this would use mesh processing
         return mesh
     
-    def add_corner_fillets(self, mesh, radius):
+    def group_overlapping_cutouts(self, cutouts):
         """
-        Add corner fillets to cutouts
+        Group cutouts whose bounding boxes overlap (transitively)
         """
-        # For now, return mesh as-is
-        # In a full implementation, this would round corners
-        return mesh
+        bounds = np.array([cutout.bounds for cutout in cutouts])
+        lower, upper = bounds[:, 0], bounds[:, 1]
+        overlaps = np.all((lower[:, None] < upper[None, :]) & (lower[None, :] < upper[:, None]), axis=2)
+        
+        groups = []
+        unassigned = set(range(len(cutouts)))
+        while unassigned:
+            stack = [unassigned.pop()]
+            group = []
+            while stack:
+                i = stack.pop()
+                group.append(i)
+                neighbours = [j for j in np.flatnonzero(overlaps[i]) if j in unassigned]
+                unassigned.difference_update(neighbours)
+                stack.extend(neighbours)
+            groups.append(sorted(group))
+        
+        return groups
+    
+    def combine_cutouts(self, cutouts):
+        """
+        Merge cutouts into a single tool mesh.
+        
+        Groups with overlapping bounding boxes are unioned; the disjoint groups
+        are then simply concatenated, which needs no boolean at all.
+        """
+        parts = []
+        for group in self.group_overlapping_cutouts(cutouts):
+            if len(group) == 1:
+                parts.append(cutouts[group[0]])
+            else:
+                parts.append(self.csg.union([cutouts[i] for i in group]))
+        return trimesh.util.concatenate(parts)
+    
+    def apply_cutouts(self, shell, cutouts, label="cutout"):
+        """
+        Subtract all cutouts from a shell with a single boolean difference.
+        
+        If the combined operation fails, the cutouts are applied one at a time
+        so the log points at the cutout responsible.
+        """
+        valid = []
+        for i, cutout in enumerate(cutouts):
+            if cutout.is_watertight and cutout.volume > 0:
+                valid.append(i)
+            else:
+                print(f"  ❌ Skipped invalid {label} {i+1}")
+        
+        if not valid:
+            return shell
+        
+        try:
+            tool = self.combine_cutouts([cutouts[i] for i in valid])
+            result = self.csg.difference(shell, [tool])
+            for i in valid:
+                print(f"  ✓ Applied {label} {i+1}")
+            return result
+        except Exception as e:
+            print(f"  ⚠️ Combined {label} difference failed ({e}), applying individually...")
+        
+        for i in valid:
+            try:
+                shell = self.csg.difference(shell, [cutouts[i]])
+                print(f"  ✓ Applied {label} {i+1}")
+            except Exception as e:
+                print(f"  ❌ Failed {label} {i+1}: {e}")
+        
+        return shell
     
     def create_front_shell(self):
         """
@@ -446,16 +471,7 @@ class ParametricHandheldCase:
         
         # Apply all cutouts to front shell
         print(f"Applying {len(cutouts)} cutouts to front shell...")
-        
-        for i, cutout in enumerate(cutouts):
-            try:
-                if cutout.is_watertight and cutout.volume > 0:
-                    front_shell = front_shell.difference(cutout)
-                    print(f"  ✓ Applied cutout {i+1}")
-                else:
-                    print(f"  ❌ Skipped invalid cutout {i+1}")
-            except Exception as e:
-                print(f"  ❌ Failed cutout {i+1}: {e}")
+        front_shell = self.apply_cutouts(front_shell, cutouts)
         
         return front_shell
     
@@ -473,16 +489,7 @@ class ParametricHandheldCase:
         
         # Apply electronics cutouts
         print(f"Applying {len(electronics_cutouts)} electronics cutouts...")
-        
-        for i, cutout in enumerate(electronics_cutouts):
-            try:
-                if cutout.is_watertight and cutout.volume > 0:
-                    back_shell = back_shell.difference(cutout)
-                    print(f"  ✓ Applied electronics cutout {i+1}")
-                else:
-                    print(f"  ❌ Skipped invalid electronics cutout {i+1}")
-            except Exception as e:
-                print(f"  ❌ Failed electronics cutout {i+1}: {e}")
+        back_shell = self.apply_cutouts(back_shell, electronics_cutouts, label="electronics cutout")
         
         return back_shell
     
@@ -549,6 +556,11 @@ class ParametricHandheldCase:
         # Generate design summary
         self.create_design_summary(output_dir)
         
+        print()
+        print("⏱️ Boolean operations:")
+        for backend, stats in self.csg.stats().items():
+            print(f"   • {backend}: {stats['calls']} ops, {stats['failures']} failed, {stats['total_time']:.2f}s")
+        
         print()
         print("🎉 PARAMETRIC CASE GENERATION COMPLETE!")
         print("=" * 60)
@@ -8,6 +8,9 @@ import trimesh
 import numpy as np
 import os
 
+from csg_engine import CSGError, get_engine
+from profiles import tube
+
 def create_battery_compartment(center, width=90, height=60, depth=12, tolerance=1.0):
     """
     Create battery compartment pocket (90×60×12mm for 8000mAh LiPo)
@@ -60,40 +63,24 @@ def create_electronics_pockets():
     
     return pockets
 
-def create_cable_routing_channels(start_points, end_points, diameter=3.0):
+def create_cable_routing_channels(routes, diameter=3.0, bend_radius=None):
     """
-    Create cable routing channels between components
+    Create one swept cable channel per route (a polyline of points)
+    
+    Joints are mitred, or rounded when a bend_radius is given, so a
+    multi-segment route is a single watertight tube instead of a chain of
+    overlapping cylinders.
     """
     channels = []
     
-    for i, (start, end) in enumerate(zip(start_points, end_points)):
-        # Create cylinder connecting start and end points
-        direction = np.array(end) - np.array(start)
-        length = np.linalg.norm(direction)
+    for i, route in enumerate(routes):
+        points = np.array(route, dtype=float)
+        length = np.linalg.norm(np.diff(points, axis=0), axis=1).sum()
         
         if length > 0:
-            # Create cylinder along Z-axis, then rotate and translate
-            channel = trimesh.creation.cylinder(radius=diameter/2, height=length)
-            
-            # Calculate rotation to align with direction
-            z_axis = np.array([0, 0, 1])
-            direction_normalized = direction / length
-            
-            if not np.allclose(direction_normalized, z_axis):
-                rotation_axis = np.cross(z_axis, direction_normalized)
-                rotation_angle = np.arccos(np.clip(np.dot(z_axis, direction_normalized), -1, 1))
-                
-                if np.linalg.norm(rotation_axis) > 1e-6:
-                    rotation_axis = rotation_axis / np.linalg.norm(rotation_axis)
-                    rotation_matrix = trimesh.transformations.rotation_matrix(rotation_angle, rotation_axis)
-                    channel.apply_transform(rotation_matrix)
-            
-            # Translate to position
-            center = (np.array(start) + np.array(end)) / 2
-            channel.apply_translation(center)
-            
+            channel = tube(points, diameter/2, bend_radius)
             channels.append(channel)
-            print(f"Cable channel {i+1}: {length:.1f}mm long, ∅{diameter}mm")
+            print(f"Cable channel {i+1}: {len(points) - 1} segments, {length:.1f}mm long, ∅{diameter}mm")
     
     return channels
 
@@ -182,17 +169,13 @@ def modify_back_cover():
     print("CABLE ROUTING CHANNELS")
     print("=" * 30)
     
+    # Battery → charger → boost → power switch in one run, plus the indicator lead
     cable_routes = [
-        (positions['battery'], positions['tp4056_charger']),
-        (positions['tp4056_charger'], positions['pd_boost_module']),
-        (positions['battery'], positions['battery_indicator']),
-        (positions['pd_boost_module'], positions['power_switch'])
+        [positions['battery'], positions['tp4056_charger'], positions['pd_boost_module'], positions['power_switch']],
+        [positions['battery'], positions['battery_indicator']]
     ]
     
-    start_points = [route[0] for route in cable_routes]
-    end_points = [route[1] for route in cable_routes]
-    
-    cable_channels = create_cable_routing_channels(start_points, end_points, diameter=2.5)
+    cable_channels = create_cable_routing_channels(cable_routes, diameter=2.5, bend_radius=5.0)
     
     # Combine all cutout geometries
     print(f"\n" + "="*30)
@@ -201,22 +184,29 @@ def modify_back_cover():
     
     all_cutouts = [battery_pocket] + positioned_pockets + cable_channels
     
-    print(f"Performing {len(all_cutouts)} boolean subtractions...")
+    print(f"Subtracting {len(all_cutouts)} cutouts in one boolean difference...")
     
     modified_mesh = back_mesh.copy()
     successful_operations = 0
     
-    for i, cutout in enumerate(all_cutouts):
-        try:
-            result = modified_mesh.difference(cutout)
-            if result is not None and len(result.vertices) > 0:
-                modified_mesh = result
-                successful_operations += 1
-                print(f"  Operation {i+1}/{len(all_cutouts)}: ✓")
-            else:
-                print(f"  Operation {i+1}/{len(all_cutouts)}: ❌ (empty result)")
-        except Exception as e:
-            print(f"  Operation {i+1}/{len(all_cutouts)}: ❌ ({str(e)})")
+    try:
+        modified_mesh = get_engine().difference(modified_mesh, all_cutouts)
+        successful_operations = len(all_cutouts)
+        print(f"  Combined difference: ✓")
+    except CSGError as e:
+        # Fall back to one cutout at a time so the log names the culprit
+        print(f"  Combined difference failed ({e}), applying individually...")
+        for i, cutout in enumerate(all_cutouts):
+            try:
+                result = get_engine().difference(modified_mesh, [cutout])
+                if result is not None and len(result.vertices) > 0:
+                    modified_mesh = result
+                    successful_operations += 1
+                    print(f"  Operation {i+1}/{len(all_cutouts)}: ✓")
+                else:
+                    print(f"  Operation {i+1}/{len(all_cutouts)}: ❌ (empty result)")
+            except Exception as e:
+                print(f"  Operation {i+1}/{len(all_cutouts)}: ❌ ({str(e)})")
     
     print(f"Successful operations: {successful_operations}/{len(all_cutouts)}")
     
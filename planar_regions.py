@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+NucDeck Planar Region Segmentation
+Coplanar face patches from face adjacency and sparse connected components
+"""
+
+from typing import Dict, List
+import logging
+
+import numpy as np
+import trimesh
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from scipy.spatial import cKDTree
+
+from hole_loops import chain_loops
+
+logger = logging.getLogger(__name__)
+
+# Normals within this angle (degrees) are treated as the same plane
+DEFAULT_ANGLE_TOLERANCE = 1.0
+
+
+def orientation_class(normal: np.ndarray) -> str:
+    """
+    Coarse orientation of a plane normal.
+
+    Up, down and vertical use the same normal-Z thresholds (±0.8, 0.3) as
+    the analysis scripts; ``'inclined'`` is an extra class here for the
+    normals in between, which those scripts leave unclassified.
+    """
+    if normal[2] > 0.8:
+        return 'horizontal_up'
+    if normal[2] < -0.8:
+        return 'horizontal_down'
+    if abs(normal[2]) < 0.3:
+        return 'vertical'
+    return 'inclined'
+
+
+def _components(n_faces: int, edges: np.ndarray) -> np.ndarray:
+    graph = coo_matrix((np.ones(len(edges), dtype=np.int8), (edges[:, 0], edges[:, 1])),
+                       shape=(n_faces, n_faces))
+    return connected_components(graph, directed=False)[1]
+
+
+def label_planes(mesh: trimesh.Trimesh, angle_tolerance: float = DEFAULT_ANGLE_TOLERANCE) -> np.ndarray:
+    """
+    Plane label for every face.
+
+    Faces are joined across shared edges whose normals agree within
+    ``angle_tolerance``. Because small angles can chain around a finely
+    tessellated curve, faces that end up further than the tolerance from
+    their region's area-weighted normal are split off and regrouped among
+    themselves (see ``_regroup``); the other faces are flooded again without
+    them.
+    """
+    n_faces = len(mesh.faces)
+    cos_tolerance = np.cos(np.radians(angle_tolerance))
+    normals = mesh.face_normals
+    areas = mesh.area_faces
+
+    adjacency = mesh.face_adjacency
+    edges = adjacency[mesh.face_adjacency_angles <= np.radians(angle_tolerance)]
+    labels = _components(n_faces, edges)
+
+    # Area-weighted mean normal of every region, all regions at once
+    mean = np.stack([np.bincount(labels, weights=normals[:, i] * areas) for i in range(3)], axis=1)
+    mean /= np.maximum(np.linalg.norm(mean, axis=1), 1e-12)[:, None]
+    drifted = np.einsum('ij,ij->i', normals, mean[labels]) < cos_tolerance
+    if not drifted.any():
+        return labels
+
+    keep = ~drifted[edges[:, 0]] & ~drifted[edges[:, 1]]
+    return _components(n_faces, np.vstack([edges[keep], _regroup(normals, areas, drifted, edges, cos_tolerance)]))
+
+
+def _regroup(normals: np.ndarray, areas: np.ndarray, drifted: np.ndarray, edges: np.ndarray,
+             cos_tolerance: float) -> np.ndarray:
+    """
+    Joined edges between drifted faces that settle on the same seed normal.
+
+    Drifted normals are binned on a grid half the tolerance wide; the normal
+    of the largest face in each bin is a seed, and a seed within half the
+    tolerance of a larger seed is dropped so a plane lying across a bin
+    border keeps one seed. Every drifted face then takes its nearest seed in
+    one query, and joined edges are kept where both faces took the same one.
+    Where two planes meet through a fine fillet this gives back both planes,
+    with the fillet split into strips no wider than the tolerance.
+    """
+    members = np.flatnonzero(drifted)
+    inner = edges[drifted[edges[:, 0]] & drifted[edges[:, 1]]]
+    if len(inner) == 0:
+        return inner
+
+    # Chord length between unit normals at half the angle tolerance
+    step = np.sqrt(2 * (1 - cos_tolerance)) / 2
+    _, cell = np.unique(np.floor(normals[members] / step).astype(np.int64), axis=0, return_inverse=True)
+    cell = cell.reshape(-1)
+    order = np.lexsort((-areas[members], cell))
+    first = order[np.r_[True, cell[order][1:] != cell[order][:-1]]]
+    seeds = members[first[np.argsort(-areas[members[first]], kind='stable')]]
+
+    # Seeds are in falling area order, so the later seed of a close pair is dropped
+    pairs = cKDTree(normals[seeds]).query_pairs(step, output_type='ndarray')
+    keep = np.ones(len(seeds), dtype=bool)
+    keep[pairs.max(axis=1)] = False
+    seeds = seeds[keep]
+
+    assigned = np.full(len(normals), -1)
+    assigned[members] = cKDTree(normals[seeds]).query(normals[members])[1]
+    return inner[assigned[inner[:, 0]] == assigned[inner[:, 1]]]
+
+
+def _outlines(mesh: trimesh.Trimesh, labels: np.ndarray, wanted: np.ndarray) -> Dict[int, List[np.ndarray]]:
+    """
+    Boundary vertex loops of the ``wanted`` regions, from one chaining pass.
+
+    A directed face edge is on a region's boundary when no other face of the
+    same region uses that edge. Loop nodes are (region, vertex) pairs so
+    regions that share boundary vertices are never chained together.
+    """
+    faces = np.flatnonzero(np.isin(labels, wanted))
+    directed = mesh.faces[faces][:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2)
+    owner = np.repeat(labels[faces], 3)
+
+    keys = np.column_stack([owner, np.sort(directed, axis=1)])
+    _, inverse, counts = np.unique(keys, axis=0, return_inverse=True, return_counts=True)
+    boundary = counts[inverse.reshape(-1)] == 1
+
+    n_vertices = len(mesh.vertices)
+    nodes = owner[boundary, None] * n_vertices + directed[boundary]
+    loops: Dict[int, List[np.ndarray]] = {}
+    for loop in chain_loops(nodes):
+        loops.setdefault(int(loop[0] // n_vertices), []).append(loop % n_vertices)
+    return loops
+
+
+def segment_planes(mesh: trimesh.Trimesh, angle_tolerance: float = DEFAULT_ANGLE_TOLERANCE,
+                   min_area: float = 0.0) -> List[Dict]:
+    """
+    Planar patches of a mesh, largest first.
+
+    Each patch reports its face count, total area, plane equation
+    ``normal · x = offset``, area-weighted centroid, bounds, orientation
+    class and outline (the longest boundary loop, as 3D points) with the
+    number of inner loops (holes). Outlines are only traced for patches of
+    at least ``min_area`` mm².
+    """
+    labels = label_planes(mesh, angle_tolerance)
+    count = labels.max() + 1 if len(labels) else 0
+    areas = mesh.area_faces
+    centers = mesh.triangles_center
+
+    def sums(values):
+        return np.bincount(labels, weights=values, minlength=count)
+
+    patch_area = sums(areas)
+    wanted = np.flatnonzero(patch_area >= min_area)
+    if len(wanted) == 0:
+        return []
+
+    weight = np.maximum(patch_area, 1e-12)[:, None]
+    normal = np.stack([sums(mesh.face_normals[:, i] * areas) for i in range(3)], axis=1)
+    normal /= np.maximum(np.linalg.norm(normal, axis=1), 1e-12)[:, None]
+    centroid = np.stack([sums(centers[:, i] * areas) for i in range(3)], axis=1) / weight
+    face_count = np.bincount(labels, minlength=count)
+
+    # Per-patch vertex bounds through the faces' corners
+    corners = mesh.triangles.reshape(-1, 3)
+    corner_label = np.repeat(labels, 3)
+    lower = np.full((count, 3), np.inf)
+    upper = np.full((count, 3), -np.inf)
+    np.minimum.at(lower, corner_label, corners)
+    np.maximum.at(upper, corner_label, corners)
+
+    outlines = _outlines(mesh, labels, wanted)
+    vertices = mesh.vertices
+
+    patches = []
+    for label in wanted:
+        loops = outlines.get(int(label), [])
+        if loops:
+            lengths = [np.linalg.norm(np.diff(vertices[np.append(loop, loop[0])], axis=0), axis=1).sum()
+                       for loop in loops]
+            outline = vertices[loops[int(np.argmax(lengths))]]
+        else:
+            outline = np.zeros((0, 3))
+        patches.append({
+            'faces': int(face_count[label]),
+            'area': float(patch_area[label]),
+            'normal': normal[label],
+            'offset': float(normal[label] @ centroid[label]),
+            'center': centroid[label],
+            'bounds': np.array([lower[label], upper[label]]),
+            'orientation': orientation_class(normal[label]),
+            'outline': outline,
+            'holes': max(len(loops) - 1, 0),
+        })
+
+    patches.sort(key=lambda patch: patch['area'], reverse=True)
+    return patches
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+NucDeck Print Orientation Optimizer
+Scores thousands of build orientations at once for overhang, support contact, height and bed contact, keeping the Pareto front
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional, Sequence
+import logging
+
+import numpy as np
+import trimesh
+
+from planar_regions import label_planes
+
+logger = logging.getLogger(__name__)
+
+# PETG profile from build/PETG_PRINT_SETTINGS.md (Creality Sermoon V1 Pro)
+SUPPORT_ANGLE = 50.0          # degrees from vertical before a downward face needs support
+FIRST_LAYER_HEIGHT = 0.25     # faces this close to the bed print on it
+BUILD_VOLUME = (175.0, 175.0, 165.0)
+
+DEFAULT_CANDIDATES = 2000
+
+# Downward directions of the largest planar patches are added as candidates,
+# since laying a big flat face exactly on the bed is usually best
+PLANAR_CANDIDATES = 64
+
+# Candidate orientations scored per matrix product, to keep memory flat
+CHUNK = 256
+
+# Spins about the build axis (degrees apart) tried for a part whose footprint
+# does not fit the bed as first laid out
+SPIN_STEP = 1.0
+
+# Orientations touching the bed over less than this (mm²) are balanced on an
+# edge or vertex; they are only ranked when no candidate does better
+MIN_BED_AREA = 1.0
+
+# Support interface charged for a downward-pointing low vertex or edge that
+# sits above nothing (mm², about one support tip)
+SUPPORT_POINT_AREA = 1.0
+
+# Vertices within this height (mm) of their lowest neighbour count as lowest,
+# so a horizontal bottom edge is caught as well as a single point
+LOWEST_TOLERANCE = 1e-6
+
+# Objectives to minimize; bed contact is maximized, so enters negated
+OBJECTIVES = ('overhang_area', 'support_area', 'height', 'bed_area')
+OBJECTIVE_SIGNS = np.array([1.0, 1.0, 1.0, -1.0])
+
+METRICS = ('overhang_area', 'support_area', 'support_volume', 'support_points', 'bed_area', 'height')
+
+
+def fibonacci_directions(count: int) -> np.ndarray:
+    """Nearly uniform unit vectors on the sphere"""
+    i = np.arange(count) + 0.5
+    z = 1 - 2 * i / count
+    radius = np.sqrt(1 - z * z)
+    theta = np.pi * (3 - np.sqrt(5)) * i
+    return np.column_stack([radius * np.cos(theta), radius * np.sin(theta), z])
+
+
+def candidate_directions(mesh: trimesh.Trimesh, count: int = DEFAULT_CANDIDATES) -> np.ndarray:
+    """
+    Build-up directions to evaluate, in the part's own frame.
+
+    Orientation only matters up to a spin about the build axis, so each
+    candidate is the part direction that will point up (+Z): a Fibonacci
+    sphere, the six axis directions and the reverse normals of the largest
+    planar patches, with near-duplicates removed.
+    """
+    labels = label_planes(mesh)
+    areas = mesh.area_faces
+    patch_area = np.bincount(labels, weights=areas)
+    normals = np.stack([np.bincount(labels, weights=mesh.face_normals[:, i] * areas) for i in range(3)], axis=1)
+    largest = np.argsort(-patch_area)[:PLANAR_CANDIDATES]
+    planar = -normals[largest] / np.maximum(np.linalg.norm(normals[largest], axis=1), 1e-12)[:, None]
+
+    directions = np.vstack([planar, np.eye(3), -np.eye(3), fibonacci_directions(count)])
+    directions /= np.linalg.norm(directions, axis=1)[:, None]
+    _, unique = np.unique(np.round(directions, 6), axis=0, return_index=True)
+    return directions[np.sort(unique)]
+
+
+def score_orientations(mesh: trimesh.Trimesh, up: np.ndarray, support_angle: float = SUPPORT_ANGLE,
+                       first_layer: float = FIRST_LAYER_HEIGHT) -> Dict[str, np.ndarray]:
+    """
+    Print metrics for every candidate up direction, all candidates at once.
+
+    Face normals and vertices are multiplied by the (3, k) matrix of up
+    vectors, giving every face's build-axis normal component and every
+    vertex's height under every candidate in one product. A downward face
+    steeper than ``support_angle`` from vertical needs support unless it
+    lies within ``first_layer`` of the bed. A vertex no higher than any of
+    its neighbours with a downward normal is a point (or, with a level
+    neighbour, an edge) hanging in the air; off the bed and away from
+    supported faces it needs a support tip of its own. Returned arrays have
+    one value per candidate: overhang_area (true area of supported faces),
+    support_area (their area projected onto the bed, where support
+    interfaces touch the part, plus ``SUPPORT_POINT_AREA`` per hanging
+    point), support_volume (projected area times height above the bed),
+    support_points, bed_area and height. A candidate touching the bed over
+    less than ``MIN_BED_AREA`` balances on a point or edge and is charged
+    one more support tip for it. ``fits`` says whether the part fits the
+    build volume once spun on the bed: the convex hull's footprint is tried
+    every ``SPIN_STEP`` degrees, and ``bed_axis`` is the part direction to
+    lay along the bed's X axis for the best spin.
+    """
+    normals = mesh.face_normals
+    areas = mesh.area_faces
+    faces = mesh.faces
+    vertices = mesh.vertices - mesh.bounds.mean(axis=0)
+    hull = mesh.convex_hull.vertices - mesh.bounds.mean(axis=0)
+    threshold = -np.sin(np.radians(support_angle))
+    vertex_normals = mesh.vertex_normals
+    vertex_faces = mesh.faces_sparse.tocsr()
+
+    # Neighbour lists in CSR order, for each vertex's lowest neighbour
+    edges = mesh.edges_unique
+    source = np.concatenate([edges[:, 0], edges[:, 1]])
+    order = np.argsort(source, kind='stable')
+    neighbour = np.concatenate([edges[:, 1], edges[:, 0]])[order]
+    counts = np.bincount(source, minlength=len(vertices))
+    connected = np.flatnonzero(counts)
+    starts = (np.cumsum(counts) - counts)[connected]
+
+    results = {key: np.zeros(len(up)) for key in METRICS}
+    results['bed_axis'] = np.zeros((len(up), 3))
+    footprint = np.zeros(len(up))
+    bed = np.sort(BUILD_VOLUME[:2])
+    spins = np.radians(np.arange(0.0, 90.0, SPIN_STEP))
+
+    def spin_footprint(u, v, angle):
+        """Footprint over the bed (<= 1 fits) and the X-axis weights for one spin"""
+        c, s = np.cos(angle), np.sin(angle)
+        along = u * c + v * s
+        across = v * c - u * s
+        extent = np.stack([along.max(axis=0) - along.min(axis=0), across.max(axis=0) - across.min(axis=0)])
+        size = np.maximum(extent.min(axis=0) / bed[0], extent.max(axis=0) / bed[1])
+        # Lay the longer extent along X when X is the longer bed side
+        longer = (extent[0] >= extent[1]) == (BUILD_VOLUME[0] >= BUILD_VOLUME[1])
+        return size, np.where(longer, c, -s), np.where(longer, s, c)
+
+    for start in range(0, len(up), CHUNK):
+        block = up[start:start + CHUNK]
+        nz = normals @ block.T                         # (faces, k)
+        heights = vertices @ block.T                   # (vertices, k)
+        bottom = heights.min(axis=0)
+        face_top = heights[faces].max(axis=1) - bottom  # (faces, k)
+        face_mid = heights[faces].mean(axis=1) - bottom
+
+        on_bed = face_top <= first_layer
+        supported = (nz < threshold) & ~on_bed
+        projected = areas[:, None] * -nz
+
+        # Lowest points that face down, are off the bed and not already on a supported face
+        local = heights[connected]
+        lowest = local <= np.minimum.reduceat(heights[neighbour], starts, axis=0) + LOWEST_TOLERANCE
+        hanging = (lowest & ((vertex_normals[connected] @ block.T) < 0)
+                   & (local - bottom > first_layer)
+                   & (vertex_faces[connected] @ supported.astype(np.float64) == 0))
+        points = hanging.sum(axis=0)
+
+        stop = start + len(block)
+        results['overhang_area'][start:stop] = areas @ supported
+        results['support_points'][start:stop] = points
+        results['support_area'][start:stop] = (np.where(supported, projected, 0).sum(axis=0)
+                                               + SUPPORT_POINT_AREA * points)
+        results['support_volume'][start:stop] = np.where(supported, projected * face_mid, 0).sum(axis=0)
+        results['bed_area'][start:stop] = areas @ (on_bed & (nz < -0.99))
+        results['height'][start:stop] = heights.max(axis=0) - bottom
+
+        # Hull footprint on two axes perpendicular to each up vector, spun
+        # through SPIN_STEP angles only where the first layout is too big
+        side = np.cross(block, np.where(np.abs(block[:, [2]]) < 0.9, [[0, 0, 1]], [[1, 0, 0]]))
+        side /= np.linalg.norm(side, axis=1)[:, None]
+        other = np.cross(block, side)
+        u, v = hull @ side.T, hull @ other.T
+        size, x_side, x_other = spin_footprint(u, v, 0.0)
+        wide = np.flatnonzero(size > 1)
+        for angle in spins[1:] if len(wide) else ():
+            spun, spun_side, spun_other = spin_footprint(u[:, wide], v[:, wide], angle)
+            better = spun < size[wide]
+            size[wide[better]] = spun[better]
+            x_side[wide[better]] = spun_side[better]
+            x_other[wide[better]] = spun_other[better]
+        footprint[start:stop] = size
+        results['bed_axis'][start:stop] = x_side[:, None] * side + x_other[:, None] * other
+
+    # Balanced on a point or edge: that contact needs a support tip as well
+    balanced = results['bed_area'] < MIN_BED_AREA
+    results['support_points'] += balanced
+    results['support_area'] += SUPPORT_POINT_AREA * balanced
+
+    results['fits'] = (footprint <= 1) & (results['height'] <= BUILD_VOLUME[2])
+    return results
+
+
+def pareto_front(values: np.ndarray) -> np.ndarray:
+    """Indices of rows not dominated by any other row (all objectives minimized)"""
+    # In lexicographic order a row can only be dominated by rows before it
+    order = np.lexsort(values.T[::-1])
+    front: List[int] = []
+    for index in order:
+        if front:
+            kept = values[front]
+            row = values[index]
+            if np.any(np.all(kept <= row, axis=1) & np.any(kept < row, axis=1)):
+                continue
+        front.append(int(index))
+    return np.array(front, dtype=np.int64)
+
+
+def placement(mesh: trimesh.Trimesh, up: np.ndarray, bed_axis: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    4x4 transform turning ``up`` to +Z, centred on the bed origin and resting
+    on Z=0, spun so ``bed_axis`` (a part direction across ``up``) lies along X
+    """
+    transform = trimesh.geometry.align_vectors(up, [0.0, 0.0, 1.0])
+    if bed_axis is not None:
+        x, y, _ = transform[:3, :3] @ bed_axis
+        transform = trimesh.transformations.rotation_matrix(-np.arctan2(y, x), [0, 0, 1]) @ transform
+    rotated = mesh.vertices @ transform[:3, :3].T
+    lower, upper = rotated.min(axis=0), rotated.max(axis=0)
+    transform[:3, 3] = [-(lower[0] + upper[0]) / 2, -(lower[1] + upper[1]) / 2, -lower[2]]
+    return transform
+
+
+def optimize_orientation(mesh: trimesh.Trimesh, candidates: int = DEFAULT_CANDIDATES,
+                         support_angle: float = SUPPORT_ANGLE, max_results: int = 10) -> Dict:
+    """
+    Pareto-best print orientations of one part.
+
+    Candidates that fit the build volume and rest at least
+    ``MIN_BED_AREA`` on the bed are compared on overhang area, support
+    contact area, build height and bed contact area, the last maximized
+    (objectives rounded to 0.1 mm² / 0.1 mm so numerically equal choices
+    collapse). The front is ordered by bed contact, then support area, then
+    height; each entry has the up direction, the 4x4 transform that puts the
+    part on the bed that way, and its metrics.
+    """
+    up = candidate_directions(mesh, candidates)
+    scores = score_orientations(mesh, up, support_angle)
+    eligible = np.flatnonzero(scores['fits'])
+    if len(eligible) == 0:
+        logger.warning("No orientation fits the build volume; ranking all candidates")
+        eligible = np.arange(len(up))
+    resting = eligible[scores['bed_area'][eligible] >= MIN_BED_AREA]
+    if len(resting):
+        eligible = resting
+    else:
+        logger.warning(f"No orientation rests {MIN_BED_AREA} mm² on the bed; ranking point contacts")
+
+    objectives = np.round(np.column_stack([scores[key][eligible] for key in OBJECTIVES]), 1) * OBJECTIVE_SIGNS
+    _, distinct = np.unique(objectives, axis=0, return_index=True)
+    front = eligible[distinct[pareto_front(objectives[distinct])]]
+    front = front[np.lexsort((scores['height'][front], np.round(scores['support_area'][front], 1),
+                              -np.round(scores['bed_area'][front], 1)))]
+
+    orientations = []
+    for index in front[:max_results]:
+        orientations.append({
+            'up': up[index].tolist(),
+            'transform': placement(mesh, up[index], scores['bed_axis'][index]).tolist(),
+            **{key: float(scores[key][index]) for key in METRICS},
+            'fits': bool(scores['fits'][index]),
+        })
+
+    current = int(np.argmin(np.linalg.norm(up - [0, 0, 1], axis=1)))
+    return {
+        'candidates': len(up),
+        'fitting': int(scores['fits'].sum()),
+        'pareto': len(front),
+        'orientations': orientations,
+        'as_modelled': {key: float(scores[key][current]) for key in METRICS},
+    }
+
+
+def _optimize_file(path: str, candidates: int, support_angle: float) -> Dict:
+    from mesh_cache import load_mesh
+
+    start = time.perf_counter()
+    result = optimize_orientation(load_mesh(path), candidates, support_angle)
+    result['path'] = path
+    result['time'] = time.perf_counter() - start
+    return result
+
+
+def optimize_files(paths: Sequence[str], candidates: int = DEFAULT_CANDIDATES, support_angle: float = SUPPORT_ANGLE,
+                   workers: Optional[int] = None) -> List[Dict]:
+    """Optimize every file in a process pool, in completion order"""
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(_optimize_file, str(path), candidates, support_angle): path for path in paths}
+        for future in as_completed(futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                logger.warning(f"Orientation search failed for {futures[future]}: {e}")
+    return results
+
+
+def print_orientations(result: Dict, max_rows: int = 3):
+    """Print the as-modelled metrics and the best Pareto orientations"""
+    def row(metrics):
+        return (f"overhang {metrics['overhang_area']:8.0f} mm², support {metrics['support_area']:8.0f} mm², "
+                f"height {metrics['height']:6.1f} mm, on bed {metrics['bed_area']:6.0f} mm²")
+
+    print(f"{os.path.basename(result['path'])} ({result['candidates']} candidates, "
+          f"{result['fitting']} fit, {result['pareto']} Pareto-optimal, {result['time']:.2f}s)")
+    print(f"  as modelled: {row(result['as_modelled'])}")
+    for rank, orientation in enumerate(result['orientations'][:max_rows], start=1):
+        x, y, z = orientation['up']
+        print(f"  #{rank} up=({x:+.2f}, {y:+.2f}, {z:+.2f}): {row(orientation)}")
+
+
+def main():
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="NucDeck print orientation optimizer")
+    parser.add_argument("stl_files", nargs="*", help="STL files (default: the whole model library)")
+    parser.add_argument("--candidates", type=int, default=DEFAULT_CANDIDATES,
+                        help=f"Sphere directions to evaluate per part (default: {DEFAULT_CANDIDATES})")
+    parser.add_argument("--support-angle", type=float, default=SUPPORT_ANGLE,
+                        help=f"Overhang angle from vertical needing support (default: {SUPPORT_ANGLE})")
+    parser.add_argument("--workers", type=int, help="Parallel processes (default: CPU count)")
+    parser.add_argument("--output", type=str, help="Write every part's Pareto orientations as JSON")
+
+    args = parser.parse_args()
+
+    paths = args.stl_files
+    if not paths:
+        from model_library import ModelLibrary
+        models = ModelLibrary().scan_models()
+        paths = [str(p) for p in models['housing_stl'] + models['buttons_stl']]
+
+    start = time.perf_counter()
+    results = optimize_files(paths, args.candidates, args.support_angle, args.workers)
+    elapsed = time.perf_counter() - start
+
+    for result in sorted(results, key=lambda r: r['path']):
+        print_orientations(result)
+    print(f"\n{len(results)} parts in {elapsed:.1f}s")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(sorted(results, key=lambda r: r['path']), f, indent=2)
+        print(f"Orientations saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+"""
+NucDeck Profile Primitives
+Cutout shapes built as 2D profiles and extruded or swept straight into watertight meshes, with no booleans
+"""
+
+import math
+import os
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+import logging
+
+import numpy as np
+import trimesh
+
+logger = logging.getLogger(__name__)
+
+# Tessellation tiers, like OpenSCAD's $fa/$fs: a circle gets just enough
+# segments to keep its chords within chord_error (mm) of the true curve,
+# but never a segment angle below fa (degrees). 0.1 mm is a quarter of a
+# 0.4 mm PETG extrusion line, so "normal" facets do not show in print.
+TESSELLATION_TIERS = {
+    'draft': {'chord_error': 0.25, 'fa': 12.0},
+    'normal': {'chord_error': 0.1, 'fa': 6.0},
+    'fine': {'chord_error': 0.02, 'fa': 2.0},
+}
+DEFAULT_TIER = os.environ.get('NUCDECK_TESSELLATION', 'normal')
+
+# Full circles get at least this many segments, always a multiple of 4 so
+# the extreme points on both axes are vertices and bounds stay exact
+MIN_SEGMENTS = 8
+
+# Consecutive profile points closer than this (mm) are merged, e.g. where
+# two fillets meet on a fully rounded edge
+MERGE_DISTANCE = 1e-9
+
+
+def _clean(points: np.ndarray) -> np.ndarray:
+    """Drop repeated points, including a closing point equal to the first"""
+    step = np.linalg.norm(points - np.roll(points, 1, axis=0), axis=1)
+    return points[step > MERGE_DISTANCE]
+
+
+def signed_area(profile: np.ndarray) -> float:
+    """Shoelace area; positive for counter-clockwise profiles"""
+    x, y = profile[:, 0], profile[:, 1]
+    return 0.5 * float(np.sum(x * np.roll(y, -1) - np.roll(x, -1) * y))
+
+
+def segments_for(radius: float, tier: Optional[str] = None) -> int:
+    """
+    Segments for a full circle of ``radius`` under a tessellation tier.
+
+    An inscribed n-gon deviates from its circle by r·(1 − cos(π/n)), so
+    n = ⌈π / acos(1 − e/r)⌉ is the fewest segments within chord error e.
+    The tier's ``fa`` caps the count for large radii, as $fa does in
+    OpenSCAD, and the result is rounded up to a multiple of 4.
+    """
+    policy: Dict[str, float] = TESSELLATION_TIERS[tier or DEFAULT_TIER]
+    error = policy['chord_error']
+    if radius <= error:
+        count = MIN_SEGMENTS
+    else:
+        count = math.ceil(math.pi / math.acos(1.0 - error / radius))
+        count = min(count, math.ceil(360.0 / policy['fa']))
+    return max(4 * math.ceil(count / 4), MIN_SEGMENTS)
+
+
+def circle(radius: float, segments: Optional[int] = None) -> np.ndarray:
+    """Regular polygon inscribed in a circle, counter-clockwise (segments from the tessellation policy by default)"""
+    segments = segments or segments_for(radius)
+    theta = np.linspace(0.0, 2 * np.pi, max(segments, 3), endpoint=False)
+    return radius * np.column_stack([np.cos(theta), np.sin(theta)])
+
+
+def filleted_polygon(points: Sequence[Sequence[float]], radius: Union[float, Sequence[float]] = 0.0,
+                     segments: Optional[int] = None) -> np.ndarray:
+    """
+    Polygon with every corner rounded by a tangent arc.
+
+    ``radius`` is one value or one per vertex and applies to convex and
+    concave corners alike. A fillet never uses more than half of either
+    adjacent edge, so a radius larger than the geometry allows is reduced
+    (which is how a stadium's ends become full semicircles). Each arc gets
+    its share by angle of ``segments`` per full turn, or by default of
+    ``segments_for`` its own radius. The result is counter-clockwise.
+    """
+    points = _clean(np.asarray(points, dtype=np.float64))
+    if signed_area(points) < 0:
+        points = points[::-1]
+        if not np.isscalar(radius):
+            radius = np.asarray(radius)[::-1]
+    radii = np.broadcast_to(np.asarray(radius, dtype=np.float64), len(points))
+
+    previous = np.roll(points, 1, axis=0)
+    following = np.roll(points, -1, axis=0)
+    to_previous = previous - points
+    to_following = following - points
+    length_previous = np.linalg.norm(to_previous, axis=1)
+    length_following = np.linalg.norm(to_following, axis=1)
+    u = to_previous / length_previous[:, None]
+    v = to_following / length_following[:, None]
+
+    # Half the interior angle at each vertex; straight vertices get no arc
+    half = 0.5 * np.arccos(np.clip(np.einsum('ij,ij->i', u, v), -1.0, 1.0))
+    straight = half > np.pi / 2 - 1e-9
+    tangent = np.where(straight, 0.0, radii / np.tan(np.where(straight, 1.0, half)))
+    tangent = np.minimum(tangent, 0.5 * np.minimum(length_previous, length_following))
+    effective = tangent * np.tan(half)
+
+    outline: List[np.ndarray] = []
+    for i in range(len(points)):
+        if effective[i] <= MERGE_DISTANCE or straight[i]:
+            outline.append(points[i][None])
+            continue
+        bisector = (u[i] + v[i]) / np.linalg.norm(u[i] + v[i])
+        center = points[i] + bisector * effective[i] / np.sin(half[i])
+        start = points[i] + u[i] * tangent[i] - center
+        end = points[i] + v[i] * tangent[i] - center
+        a0 = np.arctan2(start[1], start[0])
+        sweep = np.arctan2(start[0] * end[1] - start[1] * end[0], start @ end)
+        turn = segments or segments_for(effective[i])
+        count = max(int(np.ceil(abs(sweep) / (2 * np.pi) * turn - 1e-9)), 1)
+        theta = a0 + sweep * np.linspace(0.0, 1.0, count + 1)
+        outline.append(center + effective[i] * np.column_stack([np.cos(theta), np.sin(theta)]))
+    return _clean(np.vstack(outline))
+
+
+def rounded_rectangle(width: float, height: float, radius: float = 0.0,
+                      segments: Optional[int] = None) -> np.ndarray:
+    """Rectangle centred on the origin with all four corners filleted"""
+    w, h = width / 2, height / 2
+    return filleted_polygon([[w, h], [-w, h], [-w, -h], [w, -h]], radius, segments)
+
+
+def stadium(length: float, width: float, segments: Optional[int] = None) -> np.ndarray:
+    """``length`` × ``width`` rectangle with fully round ends, long axis along X"""
+    return rounded_rectangle(length, width, min(length, width) / 2, segments)
+
+
+def slot(start: Sequence[float], end: Sequence[float], width: float,
+         segments: Optional[int] = None) -> np.ndarray:
+    """Round-ended slot of ``width`` whose end centres are the XY points ``start`` and ``end``"""
+    start, end = np.asarray(start, dtype=np.float64)[:2], np.asarray(end, dtype=np.float64)[:2]
+    axis = end - start
+    length = float(np.linalg.norm(axis))
+    profile = stadium(length + width, width, segments)
+    if length > 0:
+        c, s = axis / length
+        profile = profile @ np.array([[c, s], [-s, c]])
+    return profile + (start + end) / 2
+
+
+def cross(size: float, arm_width: float, radius: float = 0.0, inner_radius: Optional[float] = None,
+          segments: Optional[int] = None) -> np.ndarray:
+    """
+    D-pad plus sign spanning ``size`` in X and Y with arms ``arm_width`` wide.
+
+    The eight outer corners are filleted with ``radius`` and the four inner
+    corners with ``inner_radius`` (default: the same radius).
+    """
+    a, b = size / 2, arm_width / 2
+    points = [[a, -b], [a, b], [b, b], [b, a], [-b, a], [-b, b],
+              [-a, b], [-a, -b], [-b, -b], [-b, -a], [b, -a], [b, -b]]
+    inner = radius if inner_radius is None else inner_radius
+    radii = [radius, radius, inner] * 4
+    return filleted_polygon(points, radii, segments)
+
+
+def cylinder(radius: float, height: float, center: Sequence[float] = (0.0, 0.0, 0.0),
+             segments: Optional[int] = None) -> trimesh.Trimesh:
+    """Z-axis cylinder tessellated by the chord-error policy, a drop-in for ``trimesh.creation.cylinder``"""
+    return extrude_profile(circle(radius, segments), height, center)
+
+
+def _star_center(profile: np.ndarray) -> Optional[np.ndarray]:
+    """A point that sees every edge of the profile, if its vertex centroid does"""
+    center = profile.mean(axis=0)
+    a = profile - center
+    b = np.roll(profile, -1, axis=0) - center
+    return center if np.all(a[:, 0] * b[:, 1] - a[:, 1] * b[:, 0] > 0) else None
+
+
+def _ear_clip(profile: np.ndarray) -> np.ndarray:
+    """Triangulate a simple counter-clockwise polygon by ear clipping"""
+    remaining = list(range(len(profile)))
+    triangles = []
+    guard = 0
+    while len(remaining) > 3 and guard < len(remaining):
+        n = len(remaining)
+        for k in range(n):
+            i, j, l = remaining[k - 1], remaining[k], remaining[(k + 1) % n]
+            p, q, r = profile[i], profile[j], profile[l]
+            if (q[0] - p[0]) * (r[1] - p[1]) - (q[1] - p[1]) * (r[0] - p[0]) <= 0:
+                continue
+            others = profile[[m for m in remaining if m not in (i, j, l)]]
+            d1 = (q[0] - p[0]) * (others[:, 1] - p[1]) - (q[1] - p[1]) * (others[:, 0] - p[0])
+            d2 = (r[0] - q[0]) * (others[:, 1] - q[1]) - (r[1] - q[1]) * (others[:, 0] - q[0])
+            d3 = (p[0] - r[0]) * (others[:, 1] - r[1]) - (p[1] - r[1]) * (others[:, 0] - r[0])
+            if np.any((d1 >= 0) & (d2 >= 0) & (d3 >= 0)):
+                continue
+            triangles.append([i, j, l])
+            remaining.pop(k)
+            guard = 0
+            break
+        else:
+            guard = len(remaining)
+    if len(remaining) > 3:
+        raise ValueError("Profile is not a simple polygon")
+    triangles.append(remaining)
+    return np.array(triangles, dtype=np.int64)
+
+
+def _cap(profile: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray], np.ndarray]:
+    """
+    Counter-clockwise profile, cap hub point and cap triangles.
+
+    Caps are a fan from the centroid when the profile is star-shaped about
+    it (every primitive in this module), in which case index ``len(profile)``
+    in the triangles is the hub; otherwise they are ear-clipped and the hub
+    is None.
+    """
+    profile = _clean(np.asarray(profile, dtype=np.float64))
+    if signed_area(profile) < 0:
+        profile = profile[::-1]
+    n = len(profile)
+    hub = _star_center(profile)
+    if hub is None:
+        return profile, None, _ear_clip(profile)
+    index = np.arange(n)
+    return profile, hub, np.column_stack([index, (index + 1) % n, np.full(n, n)])
+
+
+def _side_faces(rings: int, n: int) -> np.ndarray:
+    """Quads joining each ring of ``n`` points to the next, split into triangles"""
+    index = np.arange(n)
+    following = (index + 1) % n
+    base = (np.arange(rings - 1) * n)[:, None]
+    a, b = base + index, base + following
+    return np.vstack([np.column_stack([a.ravel(), b.ravel(), (b + n).ravel()]),
+                      np.column_stack([a.ravel(), (b + n).ravel(), (a + n).ravel()])])
+
+
+def extrude_profile(profile: np.ndarray, depth: float, center: Sequence[float] = (0.0, 0.0, 0.0)) -> trimesh.Trimesh:
+    """
+    Straight extrusion of a closed 2D profile into a watertight prism.
+
+    The prism spans ``depth`` in Z centred on ``center``, like
+    ``trimesh.creation.box``.
+    """
+    profile, hub, cap = _cap(profile)
+    ring = profile if hub is None else np.vstack([profile, hub[None]])
+    m = len(ring)
+
+    z = depth / 2
+    vertices = np.vstack([np.column_stack([ring, np.full(m, -z)]),
+                          np.column_stack([ring, np.full(m, z)])])
+    sides = _side_faces(2, len(profile))
+    sides = np.where(sides >= len(profile), sides + m - len(profile), sides)
+    faces = np.vstack([cap[:, ::-1], cap + m, sides])
+
+    return trimesh.Trimesh(vertices=vertices + np.asarray(center, dtype=np.float64), faces=faces, process=False)
+
+
+def round_corners(path: Sequence[Sequence[float]], bend_radius: float, segments: Optional[int] = None) -> np.ndarray:
+    """
+    3D polyline with every interior corner replaced by a tangent arc of ``bend_radius``.
+
+    Like ``filleted_polygon``, an arc never uses more than half of either
+    adjacent segment, so tight corners get a smaller radius. Arc segment
+    counts follow the tessellation policy unless ``segments`` is given.
+    """
+    path = np.asarray(path, dtype=np.float64)
+    path = path[np.r_[True, np.linalg.norm(np.diff(path, axis=0), axis=1) > MERGE_DISTANCE]]
+    if len(path) < 3:
+        return path
+
+    outline = [path[:1]]
+    for i in range(1, len(path) - 1):
+        incoming, outgoing = path[i] - path[i - 1], path[i + 1] - path[i]
+        d0 = incoming / np.linalg.norm(incoming)
+        d1 = outgoing / np.linalg.norm(outgoing)
+        turn = np.arccos(np.clip(d0 @ d1, -1.0, 1.0))
+        if turn < 1e-6 or turn > np.pi - 1e-6:
+            outline.append(path[i][None])
+            continue
+        tangent = min(bend_radius * np.tan(turn / 2),
+                      0.5 * np.linalg.norm(incoming), 0.5 * np.linalg.norm(outgoing))
+        radius = tangent / np.tan(turn / 2)
+        normal = d1 - (d1 @ d0) * d0
+        normal /= np.linalg.norm(normal)
+        count = max(int(np.ceil(turn / (2 * np.pi) * (segments or segments_for(radius)) - 1e-9)), 1)
+        phi = np.linspace(0.0, turn, count + 1)[:, None]
+        start = path[i] - d0 * tangent
+        outline.append(start + radius * (np.sin(phi) * d0 + (1 - np.cos(phi)) * normal))
+    outline.append(path[-1:])
+    points = np.vstack(outline)
+    return points[np.r_[True, np.linalg.norm(np.diff(points, axis=0), axis=1) > MERGE_DISTANCE]]
+
+
+def _transport_frames(directions: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Rotation-minimizing (u, v) frames for each segment direction, with u × v along the segment"""
+    d = directions[0]
+    helper = np.eye(3)[np.argmin(np.abs(d))]
+    u = np.cross(helper, d)
+    u /= np.linalg.norm(u)
+    us = [u]
+    for previous, current in zip(directions[:-1], directions[1:]):
+        # Rodrigues rotation taking the previous direction onto the current one
+        axis = np.cross(previous, current)
+        sin, cos = np.linalg.norm(axis), previous @ current
+        if sin > 1e-12:
+            k = axis / sin
+            u = u * cos + np.cross(k, u) * sin + k * (k @ u) * (1 - cos)
+        u = u - (u @ current) * current
+        us.append(u / np.linalg.norm(u))
+    us = np.array(us)
+    return us, np.cross(directions, us)
+
+
+def sweep_profile(profile: np.ndarray, path: Sequence[Sequence[float]]) -> trimesh.Trimesh:
+    """
+    Sweep a closed 2D profile along a 3D polyline into one watertight tube.
+
+    The profile is carried along the path on rotation-minimizing frames, so
+    it does not twist. At each interior vertex the cross-section is the
+    previous segment's profile projected onto the plane bisecting the two
+    segments, giving a clean mitre that both segments share; round the path
+    first with ``round_corners`` for smooth bends. The ends are capped.
+    """
+    path = np.asarray(path, dtype=np.float64)
+    path = path[np.r_[True, np.linalg.norm(np.diff(path, axis=0), axis=1) > MERGE_DISTANCE]]
+    if len(path) < 2:
+        raise ValueError("Sweep path needs at least two distinct points")
+
+    profile, hub, cap = _cap(profile)
+    n = len(profile)
+    directions = np.diff(path, axis=0)
+    directions /= np.linalg.norm(directions, axis=1)[:, None]
+    u, v = _transport_frames(directions)
+
+    # Each vertex uses the frame of the segment arriving at it (the first
+    # vertex that of the segment leaving it), projected along that segment
+    # onto the mitre plane
+    frame = np.r_[0, np.arange(len(directions))]
+    offsets = profile[None, :, :1] * u[frame][:, None] + profile[None, :, 1:] * v[frame][:, None]
+    mitre = np.vstack([directions[:1], directions[:-1] + directions[1:], directions[-1:]])
+    mitre /= np.linalg.norm(mitre, axis=1)[:, None]
+    along = directions[frame]
+    shift = np.einsum('kij,kj->ki', offsets, mitre) / np.einsum('kj,kj->k', along, mitre)[:, None]
+    rings = path[:, None] + offsets - shift[:, :, None] * along[:, None]
+
+    vertices = rings.reshape(-1, 3)
+    last = (len(path) - 1) * n
+    if hub is not None:
+        # End sections are square to the path, so the hub maps through the end frames like the ring points
+        hubs = path[[0, -1]] + hub[0] * u[[0, -1]] + hub[1] * v[[0, -1]]
+        vertices = np.vstack([vertices, hubs])
+        start_cap = np.where(cap == n, len(rings) * n, cap)
+        end_cap = np.where(cap == n, len(rings) * n + 1, cap + last)
+    else:
+        start_cap, end_cap = cap, cap + last
+    faces = np.vstack([start_cap[:, ::-1], end_cap, _side_faces(len(path), n)])
+    return trimesh.Trimesh(vertices=vertices, faces=faces, process=False)
+
+
+def tube(path: Sequence[Sequence[float]], radius: float, bend_radius: Optional[float] = None,
+         segments: Optional[int] = None) -> trimesh.Trimesh:
+    """
+    Round tube of ``radius`` along a polyline, e.g. a cable channel.
+
+    Without ``bend_radius`` the joints are mitred; with it every corner is
+    rounded. Bends tighter than the tube radius would fold the inner wall
+    over itself, so the bend radius is never less than ``radius``.
+    """
+    if bend_radius is not None:
+        path = round_corners(path, max(bend_radius, radius), segments)
+    return sweep_profile(circle(radius, segments), path)
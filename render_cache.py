@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+NucDeck Render Cache
+Content-addressed on-disk cache for OpenSCAD STL/PNG renders
+"""
+
+import hashlib
+import os
+import re
+import shutil
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# import("file.stl") with a literal path, or import(some_path_variable)
+IMPORT_LITERAL_RE = re.compile(r'import\s*\(\s*(?:file\s*=\s*)?"([^"]+)"')
+IMPORT_VARIABLE_RE = re.compile(r'import\s*\(\s*(?:file\s*=\s*)?([A-Za-z_]\w*)\s*[,)]')
+STRING_ASSIGNMENT_RE = re.compile(r'^\s*([A-Za-z_]\w*)\s*=\s*"([^"]*)"\s*;', re.MULTILINE)
+INCLUDE_RE = re.compile(r'^\s*(?:include|use)\s*<([^>]+)>', re.MULTILINE)
+
+
+def hash_file(path: Path, chunk_size: int = 1 << 20) -> str:
+    """Return the SHA-256 hex digest of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class RenderCache:
+    """
+    Size-bounded LRU cache of rendered artifacts keyed by render inputs.
+
+    Entries are plain files named ``<key><suffix>`` inside the cache directory.
+    Recency is tracked through the file mtime, so several processes can share
+    one cache directory without a central index.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 1 << 30):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._file_hashes: Dict[str, tuple] = {}
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _hash_dependency(self, path: Path) -> str:
+        """Hash a dependency, reusing the digest while size and mtime are unchanged"""
+        stat = path.stat()
+        cached = self._file_hashes.get(str(path))
+        if cached and cached[0] == (stat.st_size, stat.st_mtime_ns):
+            return cached[1]
+
+        digest = hash_file(path)
+        self._file_hashes[str(path)] = ((stat.st_size, stat.st_mtime_ns), digest)
+        return digest
+
+    def collect_dependencies(self, scad_source: str, base_dir: Path,
+                             _seen: Optional[set] = None) -> List[Path]:
+        """Find every STL import and include/use file referenced by a SCAD source"""
+        seen = _seen if _seen is not None else set()
+        string_vars = dict(STRING_ASSIGNMENT_RE.findall(scad_source))
+
+        references = IMPORT_LITERAL_RE.findall(scad_source)
+        for var_name in IMPORT_VARIABLE_RE.findall(scad_source):
+            if var_name in string_vars:
+                references.append(string_vars[var_name])
+
+        dependencies = []
+        for reference in references:
+            path = (base_dir / reference).resolve()
+            if path not in seen:
+                seen.add(path)
+                dependencies.append(path)
+
+        for reference in INCLUDE_RE.findall(scad_source):
+            path = (base_dir / reference).resolve()
+            if path in seen or not path.exists():
+                continue
+            seen.add(path)
+            dependencies.append(path)
+            nested_source = path.read_text(errors='replace')
+            dependencies.extend(self.collect_dependencies(nested_source, path.parent, seen))
+
+        return dependencies
+
+    def make_key(self, scad_source: str, base_dir: Path, openscad_version: str,
+                 options: Sequence[str]) -> str:
+        """
+        Build the cache key for a render.
+
+        The key covers the fully parameterized SCAD source, the content of every
+        imported/included file, the OpenSCAD version and the export options.
+        """
+        digest = hashlib.sha256()
+        digest.update(b'scad\0' + scad_source.encode('utf-8'))
+        digest.update(b'openscad\0' + openscad_version.encode('utf-8'))
+        digest.update(b'options\0' + '\0'.join(options).encode('utf-8'))
+
+        for path in sorted(self.collect_dependencies(scad_source, base_dir)):
+            content_hash = self._hash_dependency(path) if path.exists() else 'missing'
+            digest.update(f'dep\0{path}\0{content_hash}'.encode('utf-8'))
+
+        return digest.hexdigest()
+
+    def _entry_path(self, key: str, suffix: str) -> Path:
+        return self.cache_dir / f"{key}{suffix}"
+
+    def fetch(self, key: str, destination: str) -> bool:
+        """Copy a cached artifact to ``destination``; returns False on a miss"""
+        entry = self._entry_path(key, Path(destination).suffix.lower())
+
+        try:
+            shutil.copyfile(entry, destination)
+            os.utime(entry)  # Mark as most recently used
+        except FileNotFoundError:
+            self.misses += 1
+            return False
+
+        self.hits += 1
+        logger.info(f"Render cache hit: {Path(destination).name} ({key[:12]})")
+        return True
+
+    def store(self, key: str, source: str):
+        """Add a freshly rendered artifact to the cache and enforce the size bound"""
+        entry = self._entry_path(key, Path(source).suffix.lower())
+        temp_entry = entry.with_name(f".{entry.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+        shutil.copyfile(source, temp_entry)
+        os.replace(temp_entry, entry)
+        self.evict()
+
+    def _entries(self) -> List[Tuple[Path, os.stat_result]]:
+        entries = []
+        for path in self.cache_dir.iterdir():
+            if path.name.startswith('.') or not path.is_file():
+                continue
+            try:
+                entries.append((path, path.stat()))
+            except FileNotFoundError:
+                continue  # Evicted by another process
+        return entries
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in ``max_bytes``"""
+        entries = sorted(self._entries(), key=lambda entry: entry[1].st_mtime)
+        total_bytes = sum(stat.st_size for _, stat in entries)
+
+        for path, stat in entries:
+            if total_bytes <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+                self.evictions += 1
+            except FileNotFoundError:
+                pass
+            total_bytes -= stat.st_size
+
+    def clear(self):
+        """Remove every cached artifact"""
+        for path, _ in self._entries():
+            path.unlink(missing_ok=True)
+
+    def stats(self) -> Dict:
+        """Return hit/miss counters and current cache occupancy"""
+        entries = self._entries()
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'entries': len(entries),
+            'size_bytes': sum(stat.st_size for _, stat in entries),
+            'max_bytes': self.max_bytes,
+        }
@@ -0,0 +1,692 @@
+#!/usr/bin/env python3
+"""
+NucDeck SCAD Scene Reader
+Evaluates the placement subset of an OpenSCAD assembly into world-space component meshes
+"""
+
+import math
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import logging
+
+import numpy as np
+import trimesh
+
+from mesh_cache import load_mesh
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r'''
+    (?P<comment>//[^\n]*|/\*.*?\*/)
+  | (?P<include>\b(?:include|use)\s*<[^>]*>)
+  | (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)
+  | (?P<string>"(?:[^"\\]|\\.)*")
+  | (?P<name>\$?[A-Za-z_]\w*)
+  | (?P<op>==|!=|<=|>=|&&|\|\||[-+*/%<>!?:=()\[\]{},;#])
+  | (?P<space>\s+)
+''', re.VERBOSE | re.DOTALL)
+
+# OpenSCAD's defaults for curve subdivision ($fn unset)
+DEFAULT_FA = 12.0
+DEFAULT_FS = 2.0
+
+# Special variables seeded before any file assignment; $preview follows F5
+# so fitment mockups guarded by it are part of the scene
+SPECIAL_VARIABLES = {'$fn': 0, '$fa': DEFAULT_FA, '$fs': DEFAULT_FS, '$preview': True, '$t': 0}
+
+MATH_FUNCTIONS = {
+    'sin': lambda a: math.sin(math.radians(a)),
+    'cos': lambda a: math.cos(math.radians(a)),
+    'tan': lambda a: math.tan(math.radians(a)),
+    'asin': lambda x: math.degrees(math.asin(x)),
+    'acos': lambda x: math.degrees(math.acos(x)),
+    'atan': lambda x: math.degrees(math.atan(x)),
+    'atan2': lambda y, x: math.degrees(math.atan2(y, x)),
+    'sqrt': math.sqrt,
+    'abs': abs,
+    'floor': math.floor,
+    'ceil': math.ceil,
+    'round': round,
+    'pow': math.pow,
+    'exp': math.exp,
+    'ln': math.log,
+    'min': lambda *v: min(v[0]) if len(v) == 1 else min(v),
+    'max': lambda *v: max(v[0]) if len(v) == 1 else max(v),
+    'len': len,
+    'norm': lambda v: math.sqrt(sum(x * x for x in v)),
+    'str': lambda *v: ''.join(str(x) for x in v),
+}
+
+
+class ScadError(ValueError):
+    """Raised for SCAD source the scene reader cannot evaluate"""
+
+
+def tokenize(source: str) -> List[Tuple[str, str, int]]:
+    """(kind, text, line) tokens; comments are kept so statements can be labelled"""
+    tokens, line, position = [], 1, 0
+    while position < len(source):
+        match = TOKEN_RE.match(source, position)
+        if not match:
+            raise ScadError(f"line {line}: unexpected character {source[position]!r}")
+        kind, text = match.lastgroup, match.group()
+        if kind not in ('space', 'include'):
+            tokens.append((kind, text, line))
+        line += text.count('\n')
+        position = match.end()
+    tokens.append(('end', '', line))
+    return tokens
+
+
+# --- Parser -----------------------------------------------------------------
+#
+# Expressions parse to tuples: ('num', v), ('str', s), ('var', name),
+# ('vec', items), ('range', start, step, end), ('index', expr, i),
+# ('call', name, args), ('unary', op, expr), ('binary', op, a, b),
+# ('ternary', cond, a, b). Call arguments are (name or None, expr) pairs.
+#
+# Statements are dicts with a 'type' of assign, instance, if, for, block or
+# module, plus the line and the comment directly above them.
+
+class Parser:
+    def __init__(self, source: str):
+        self.tokens = tokenize(source)
+        self.position = 0
+        self.comment: Optional[str] = None
+        self.modules: Dict[str, Dict] = {}
+
+    def _skip_comments(self):
+        """Skip comments, remembering the last one that sits on its own line"""
+        while self.tokens[self.position][0] == 'comment':
+            text, line = self.tokens[self.position][1:]
+            # A comment trailing the previous statement describes that one
+            if self.position == 0 or self.tokens[self.position - 1][2] != line:
+                self.comment = text[2:].strip() if text.startswith('//') else text[2:-2].strip()
+            self.position += 1
+
+    def peek(self) -> Tuple[str, str, int]:
+        self._skip_comments()
+        return self.tokens[self.position]
+
+    def next(self) -> Tuple[str, str, int]:
+        token = self.peek()
+        self.position += 1
+        return token
+
+    def accept(self, text: str) -> bool:
+        if self.peek()[1] == text and self.peek()[0] != 'string':
+            self.position += 1
+            return True
+        return False
+
+    def expect(self, text: str):
+        kind, found, line = self.next()
+        if found != text or kind == 'string':
+            raise ScadError(f"line {line}: expected '{text}', found '{found or 'end of file'}'")
+
+    # Statements
+
+    def parse_file(self) -> List[Dict]:
+        statements = []
+        while self.peek()[0] != 'end':
+            statement = self.statement()
+            if statement:
+                statements.append(statement)
+        return statements
+
+    def statement(self) -> Optional[Dict]:
+        kind, text, line = self.peek()
+        comment, self.comment = self.comment, None
+
+        if text == ';':
+            self.next()
+            return None
+        if text == '{':
+            self.next()
+            body = []
+            while not self.accept('}'):
+                if self.peek()[0] == 'end':
+                    raise ScadError(f"line {line}: unclosed block")
+                child = self.statement()
+                if child:
+                    body.append(child)
+            return {'type': 'block', 'body': body, 'line': line, 'comment': comment}
+        if text == 'module':
+            self.next()
+            name = self.next()[1]
+            params = self.parameters()
+            self.modules[name] = {'params': params, 'body': self.statement()}
+            return None
+        if text == 'function':
+            self.next()
+            raise ScadError(f"line {line}: user functions are not supported")
+        if text == 'if':
+            self.next()
+            self.expect('(')
+            condition = self.expression()
+            self.expect(')')
+            then = self.statement()
+            otherwise = self.statement() if self.accept('else') else None
+            return {'type': 'if', 'condition': condition, 'then': then, 'else': otherwise,
+                    'line': line, 'comment': comment}
+        if text in ('for', 'intersection_for'):
+            self.next()
+            self.expect('(')
+            loops = []
+            while not self.accept(')'):
+                variable = self.next()[1]
+                self.expect('=')
+                loops.append((variable, self.expression()))
+                self.accept(',')
+            return {'type': 'for', 'loops': loops, 'body': self.statement(), 'line': line, 'comment': comment}
+        if text in '!#%*' and kind == 'op':
+            self.next()
+            child = self.statement()
+            # '*' disables a subtree and '%' draws it as a transparent background part
+            return None if text in '*%' else child
+        if kind == 'name' and self.tokens[self.position + 1][1] == '=':
+            self.next()
+            self.next()
+            value = self.expression()
+            self.expect(';')
+            return {'type': 'assign', 'name': text, 'value': value, 'line': line, 'comment': comment}
+        if kind == 'name':
+            self.next()
+            self.expect('(')
+            args = self.arguments()
+            child = self.statement()
+            return {'type': 'instance', 'name': text, 'args': args, 'child': child,
+                    'line': line, 'comment': comment}
+        raise ScadError(f"line {line}: unexpected '{text or 'end of file'}'")
+
+    def parameters(self) -> List[Tuple[str, Any]]:
+        self.expect('(')
+        params = []
+        while not self.accept(')'):
+            name = self.next()[1]
+            default = self.expression() if self.accept('=') else None
+            params.append((name, default))
+            self.accept(',')
+        return params
+
+    def arguments(self) -> List[Tuple[Optional[str], Any]]:
+        args = []
+        while not self.accept(')'):
+            name = None
+            if self.peek()[0] == 'name' and self.tokens[self.position + 1][1] == '=':
+                name = self.next()[1]
+                self.next()
+            args.append((name, self.expression()))
+            self.accept(',')
+        return args
+
+    # Expressions, lowest precedence first
+
+    def expression(self):
+        condition = self.binary(0)
+        if self.accept('?'):
+            then = self.expression()
+            self.expect(':')
+            return ('ternary', condition, then, self.expression())
+        return condition
+
+    PRECEDENCE = [('||',), ('&&',), ('==', '!='), ('<', '<=', '>', '>='), ('+', '-'), ('*', '/', '%')]
+
+    def binary(self, level: int):
+        if level == len(self.PRECEDENCE):
+            return self.unary()
+        left = self.binary(level + 1)
+        while self.peek()[0] == 'op' and self.peek()[1] in self.PRECEDENCE[level]:
+            op = self.next()[1]
+            left = ('binary', op, left, self.binary(level + 1))
+        return left
+
+    def unary(self):
+        if self.peek()[0] == 'op' and self.peek()[1] in ('-', '+', '!'):
+            return ('unary', self.next()[1], self.unary())
+        return self.postfix()
+
+    def postfix(self):
+        value = self.primary()
+        while self.accept('['):
+            value = ('index', value, self.expression())
+            self.expect(']')
+        return value
+
+    def primary(self):
+        kind, text, line = self.next()
+        if kind == 'number':
+            return ('num', float(text))
+        if kind == 'string':
+            return ('str', re.sub(r'\\(.)', r'\1', text[1:-1]))
+        if kind == 'name':
+            if text in ('true', 'false'):
+                return ('num', text == 'true')
+            if text == 'undef':
+                return ('num', None)
+            if self.accept('('):
+                return ('call', text, self.arguments())
+            return ('var', text)
+        if text == '(':
+            value = self.expression()
+            self.expect(')')
+            return value
+        if text == '[':
+            if self.accept(']'):
+                return ('vec', [])
+            first = self.expression()
+            if self.accept(':'):
+                second = self.expression()
+                if self.accept(':'):
+                    end = self.expression()
+                    self.expect(']')
+                    return ('range', first, second, end)
+                self.expect(']')
+                return ('range', first, ('num', 1.0), second)
+            items = [first]
+            while self.accept(','):
+                if self.peek()[1] == ']':
+                    break
+                items.append(self.expression())
+            self.expect(']')
+            return ('vec', items)
+        raise ScadError(f"line {line}: unexpected '{text or 'end of file'}' in expression")
+
+
+def evaluate(expr, scope: Dict[str, Any]):
+    """Value of a parsed expression; unknown variables are undef (None) as in OpenSCAD"""
+    kind = expr[0]
+    if kind in ('num', 'str'):
+        return expr[1]
+    if kind == 'var':
+        return scope.get(expr[1])
+    if kind == 'vec':
+        return [evaluate(item, scope) for item in expr[1]]
+    if kind == 'range':
+        start, step, end = (evaluate(e, scope) for e in expr[1:])
+        count = int(math.floor((end - start) / step + 1e-9)) + 1 if step else 0
+        return [start + step * i for i in range(max(count, 0))]
+    if kind == 'index':
+        value, index = evaluate(expr[1], scope), evaluate(expr[2], scope)
+        return value[int(index)] if value is not None and 0 <= int(index) < len(value) else None
+    if kind == 'ternary':
+        return evaluate(expr[2] if evaluate(expr[1], scope) else expr[3], scope)
+    if kind == 'unary':
+        value = evaluate(expr[2], scope)
+        if expr[1] == '!':
+            return not value
+        if isinstance(value, list):
+            return [-v for v in value] if expr[1] == '-' else value
+        return -value if expr[1] == '-' else value
+    if kind == 'binary':
+        op = expr[1]
+        if op == '&&':
+            return bool(evaluate(expr[2], scope)) and bool(evaluate(expr[3], scope))
+        if op == '||':
+            return bool(evaluate(expr[2], scope)) or bool(evaluate(expr[3], scope))
+        a, b = evaluate(expr[2], scope), evaluate(expr[3], scope)
+        if op in ('+', '-', '*', '/', '%') and (isinstance(a, list) or isinstance(b, list)):
+            return _vector_op(op, a, b)
+        return {
+            '+': lambda: a + b, '-': lambda: a - b, '*': lambda: a * b,
+            '/': lambda: a / b if b else math.inf, '%': lambda: math.fmod(a, b),
+            '==': lambda: a == b, '!=': lambda: a != b,
+            '<': lambda: a < b, '<=': lambda: a <= b, '>': lambda: a > b, '>=': lambda: a >= b,
+        }[op]()
+    if kind == 'call':
+        name = expr[1]
+        if name not in MATH_FUNCTIONS:
+            raise ScadError(f"unsupported function '{name}'")
+        return MATH_FUNCTIONS[name](*(evaluate(value, scope) for _, value in expr[2]))
+    raise ScadError(f"cannot evaluate {kind}")
+
+
+def _vector_op(op: str, a, b):
+    a = np.asarray(a, dtype=float)
+    b = np.asarray(b, dtype=float)
+    if op == '*' and a.ndim == 1 and b.ndim == 1:
+        return float(a @ b)
+    result = {'+': np.add, '-': np.subtract, '*': np.multiply, '/': np.divide, '%': np.fmod}[op](a, b)
+    return result.tolist()
+
+
+# --- Geometry ---------------------------------------------------------------
+
+def fragments(r: float, scope: Dict[str, Any]) -> int:
+    """Segments OpenSCAD uses for a circle of radius r under $fn/$fa/$fs"""
+    fn = scope.get('$fn') or 0
+    if r < 1e-6:
+        return 3
+    if fn > 0:
+        return max(int(fn), 3)
+    fa = scope.get('$fa') or DEFAULT_FA
+    fs = scope.get('$fs') or DEFAULT_FS
+    return int(math.ceil(max(min(360.0 / fa, r * 2 * math.pi / fs), 5)))
+
+
+def frustum(r1: float, r2: float, height: float, segments: int) -> trimesh.Trimesh:
+    """Closed cylinder/cone from z=0 to z=height, OpenSCAD vertex phase"""
+    angles = 2 * np.pi * np.arange(segments) / segments
+    ring = np.column_stack([np.cos(angles), np.sin(angles)])
+    rings, faces = [], []
+    for radius, z in ((r1, 0.0), (r2, height)):
+        if radius > 0:
+            rings.append(np.column_stack([ring * radius, np.full(segments, z)]))
+        else:
+            rings.append(np.array([[0.0, 0.0, z]]))
+
+    bottom, top = rings
+    vertices = np.vstack([bottom, top])
+    offset = len(bottom)
+    i = np.arange(segments)
+    j = (i + 1) % segments
+    if len(bottom) > 1 and len(top) > 1:
+        faces += [np.column_stack([i, j, offset + j]), np.column_stack([i, offset + j, offset + i])]
+    elif len(bottom) > 1:
+        faces.append(np.column_stack([i, j, np.full(segments, offset)]))
+    else:
+        faces.append(np.column_stack([np.zeros(segments, dtype=int), offset + j, offset + i]))
+
+    # Fan caps
+    if len(bottom) > 1:
+        faces.append(np.column_stack([np.zeros(segments - 2, dtype=int), np.arange(2, segments),
+                                      np.arange(1, segments - 1)]))
+    if len(top) > 1:
+        faces.append(offset + np.column_stack([np.zeros(segments - 2, dtype=int), np.arange(1, segments - 1),
+                                               np.arange(2, segments)]))
+    return trimesh.Trimesh(vertices=vertices, faces=np.vstack(faces), process=False)
+
+
+def _vector3(value, fill: float = 0.0) -> np.ndarray:
+    if not isinstance(value, list):
+        return np.full(3, float(value if value is not None else fill))
+    values = [float(v) for v in value[:3]]
+    return np.array(values + [fill] * (3 - len(values)))
+
+
+def _rotation(a, v) -> np.ndarray:
+    if isinstance(a, list):
+        x, y, z = _vector3(a)
+        matrix = np.eye(4)
+        for angle, axis in ((x, [1, 0, 0]), (y, [0, 1, 0]), (z, [0, 0, 1])):
+            matrix = trimesh.transformations.rotation_matrix(np.radians(angle), axis) @ matrix
+        return matrix
+    axis = _vector3(v) if v is not None else np.array([0.0, 0.0, 1.0])
+    if not np.any(axis):
+        return np.eye(4)
+    return trimesh.transformations.rotation_matrix(np.radians(a or 0.0), axis)
+
+
+def _transform(name: str, args: Dict[str, Any]) -> np.ndarray:
+    matrix = np.eye(4)
+    if name == 'translate':
+        matrix[:3, 3] = _vector3(args.get('v'))
+    elif name == 'rotate':
+        matrix = _rotation(args.get('a'), args.get('v'))
+    elif name == 'scale':
+        matrix[:3, :3] = np.diag(_vector3(args.get('v'), 1.0))
+    elif name == 'mirror':
+        normal = _vector3(args.get('v'))
+        if np.any(normal):
+            normal /= np.linalg.norm(normal)
+            matrix[:3, :3] -= 2 * np.outer(normal, normal)
+    elif name == 'multmatrix':
+        m = np.asarray(args.get('m'), dtype=float)
+        matrix[:m.shape[0], :m.shape[1]] = m
+    return matrix
+
+
+TRANSFORMS = ('translate', 'rotate', 'scale', 'mirror', 'multmatrix')
+PASS_THROUGH = ('color', 'render', 'group', 'union')
+CSG = ('difference', 'intersection', 'hull')
+PRIMITIVES = ('cube', 'cylinder', 'sphere', 'import')
+
+# Positional argument order of the built-in modules
+BUILTIN_PARAMS = {
+    'translate': ['v'], 'rotate': ['a', 'v'], 'scale': ['v'], 'mirror': ['v'], 'multmatrix': ['m'],
+    'color': ['c', 'alpha'], 'render': ['convexity'],
+    'cube': ['size', 'center'], 'cylinder': ['h', 'r1', 'r2', 'center'], 'sphere': ['r'],
+    'import': ['file', 'convexity'], 'children': ['index'],
+}
+
+
+class SceneBuilder:
+    """
+    Walks parsed SCAD statements and collects placed solids.
+
+    Every import or primitive becomes one part with its world transform
+    applied. Implicit unions (blocks, module calls, ``if``/``for``) keep
+    their parts separate so each can be checked against the others;
+    ``difference`` is applied to every part of its first child, and
+    ``intersection``/``hull`` produce one part. Parts are labelled by
+    their file name, the ``show_*`` toggle guarding them or the comment
+    above their statement, innermost first.
+    """
+
+    def __init__(self, modules: Dict[str, Dict], base_dir: Path, engine=None):
+        self.modules = modules
+        self.base_dir = base_dir
+        self.engine = engine
+        self.globals: Dict[str, Any] = {}
+
+    def _csg(self):
+        if self.engine is None:
+            from csg_engine import get_engine
+            self.engine = get_engine()
+        return self.engine
+
+    def run(self, statements: List[Dict], scope: Dict[str, Any]) -> List[Dict]:
+        self.globals = self._assign(statements, scope)
+        return self._statements(statements, self.globals, np.eye(4), [], None)
+
+    def _assign(self, statements: List[Dict], scope: Dict[str, Any]) -> Dict[str, Any]:
+        scope = dict(scope)
+        for statement in statements:
+            if statement['type'] == 'assign':
+                scope[statement['name']] = evaluate(statement['value'], scope)
+        return scope
+
+    def _statements(self, statements, scope, matrix, labels, children) -> List[Dict]:
+        scope = self._assign(statements, scope)
+        parts = []
+        for statement in statements:
+            if statement['type'] != 'assign':
+                parts += self._statement(statement, scope, matrix, labels, children)
+        return parts
+
+    def _bind(self, names: Sequence[str], args, scope) -> Dict[str, Any]:
+        bound = {}
+        for index, (name, expr) in enumerate(args):
+            key = name or (names[index] if index < len(names) else None)
+            if key:
+                bound[key] = evaluate(expr, scope)
+        return bound
+
+    def _child_statements(self, statement: Optional[Dict]) -> List[Dict]:
+        if statement is None:
+            return []
+        return statement['body'] if statement['type'] == 'block' else [statement]
+
+    def _statement(self, statement, scope, matrix, labels, children) -> List[Dict]:
+        kind = statement['type']
+        label = statement['comment']
+
+        if kind == 'block':
+            return self._statements(statement['body'], scope, matrix, labels + [label], children)
+
+        if kind == 'if':
+            condition = statement['condition']
+            if condition[0] == 'var' and condition[1].startswith('show_'):
+                label = condition[1][len('show_'):]
+            branch = statement['then'] if evaluate(condition, scope) else statement['else']
+            if branch is None:
+                return []
+            return self._statement(branch, scope, matrix, labels + [label], children)
+
+        if kind == 'for':
+            parts = []
+            iterations = [{}]
+            for variable, expr in statement['loops']:
+                iterations = [dict(i, **{variable: value}) for i in iterations
+                              for value in (evaluate(expr, dict(scope, **i)) or [])]
+            for bound in iterations:
+                parts += self._statements(self._child_statements(statement['body']), dict(scope, **bound),
+                                          matrix, labels + [label], children)
+            return parts
+
+        name = statement['name']
+        labels = labels + [label]
+        args = self._bind(BUILTIN_PARAMS.get(name, []), statement['args'], scope)
+        # $-variables set as arguments are visible to the whole subtree
+        scope = dict(scope, **{k: v for k, v in args.items() if k.startswith('$')})
+        child = self._child_statements(statement['child'])
+
+        if name in TRANSFORMS:
+            return self._statements(child, scope, matrix @ _transform(name, args), labels, children)
+        if name in PASS_THROUGH:
+            parts = self._statements(child, scope, matrix, labels, children)
+            if name == 'color':
+                for part in parts:
+                    part.setdefault('color', args.get('c'))
+            return parts
+        if name in CSG:
+            return self._boolean(name, child, scope, matrix, labels, children, statement['line'])
+        if name in PRIMITIVES:
+            return self._primitive(name, args, scope, matrix, labels, statement['line'])
+        if name == 'children':
+            if children is None:
+                return []
+            caller_statements, caller_scope, caller_labels = children
+            index = args.get('index')
+            selected = caller_statements if index is None else caller_statements[int(index):int(index) + 1]
+            return self._statements(selected, caller_scope, matrix, caller_labels, None)
+        if name in self.modules:
+            module = self.modules[name]
+            call_scope = dict(self.globals, **{k: v for k, v in scope.items() if k.startswith('$')})
+            for param, default in module['params']:
+                if default is not None:
+                    call_scope[param] = evaluate(default, call_scope)
+            call_scope.update(self._bind([param for param, _ in module['params']], statement['args'], scope))
+            return self._statements(self._child_statements(module['body']), call_scope, matrix, labels,
+                                    (child, scope, labels))
+
+        logger.warning(f"line {statement['line']}: '{name}' is not supported, skipped")
+        return []
+
+    def _label(self, labels: List[Optional[str]], fallback: str) -> str:
+        for label in reversed(labels):
+            if label:
+                return label
+        return fallback
+
+    def _primitive(self, name, args, scope, matrix, labels, line) -> List[Dict]:
+        if name == 'import':
+            path = (self.base_dir / str(args.get('file'))).resolve()
+            if not path.exists():
+                logger.warning(f"line {line}: import file not found: {path}")
+                return []
+            mesh = load_mesh(path).copy()
+            label, source = path.stem, str(path)
+        elif name == 'cube':
+            size = _vector3(args.get('size', 1.0), 1.0)
+            mesh = trimesh.creation.box(extents=size)
+            if not args.get('center'):
+                mesh.apply_translation(size / 2)
+            label, source = self._label(labels, f"cube@{line}"), 'cube'
+        elif name == 'cylinder':
+            h = float(args.get('h', 1.0))
+            r = args['d'] / 2 if args.get('d') is not None else args.get('r', 1.0)
+            r1 = args['d1'] / 2 if args.get('d1') is not None else args.get('r1', r)
+            r2 = args['d2'] / 2 if args.get('d2') is not None else args.get('r2', r)
+            r1, r2 = float(r1 if r1 is not None else r), float(r2 if r2 is not None else r)
+            mesh = frustum(r1, r2, h, fragments(max(r1, r2), scope))
+            if args.get('center'):
+                mesh.apply_translation([0, 0, -h / 2])
+            label, source = self._label(labels, f"cylinder@{line}"), 'cylinder'
+        else:
+            r = float(args['d'] / 2 if args.get('d') is not None else args.get('r', 1.0))
+            segments = fragments(r, scope)
+            mesh = trimesh.creation.uv_sphere(radius=r, count=[max((segments + 1) // 2, 2), segments])
+            label, source = self._label(labels, f"sphere@{line}"), 'sphere'
+
+        mesh.apply_transform(matrix)
+        return [{'name': label, 'mesh': mesh, 'source': source, 'line': line}]
+
+    def _boolean(self, name, child, scope, matrix, labels, children, line) -> List[Dict]:
+        groups = [self._statement(statement, scope, matrix, labels, children)
+                  for statement in child if statement['type'] != 'assign']
+        groups = [group for group in groups if group]
+        if not groups:
+            return []
+        label = self._label(labels, f"{name}@{line}")
+
+        if name == 'hull':
+            points = np.vstack([part['mesh'].vertices for group in groups for part in group])
+            return [{'name': label, 'mesh': trimesh.convex.convex_hull(points), 'source': name, 'line': line}]
+
+        if name == 'intersection':
+            meshes = [trimesh.util.concatenate([part['mesh'] for part in group]) for group in groups]
+            result = self._csg().intersection(meshes) if len(meshes) > 1 else meshes[0]
+            return [{'name': label, 'mesh': result, 'source': name, 'line': line}]
+
+        # (A ∪ B) − T = (A − T) ∪ (B − T), so every base part stays its own part
+        base, tools = groups[0], [part['mesh'] for group in groups[1:] for part in group]
+        results = []
+        for part in base:
+            lower, upper = part['mesh'].bounds
+            touching = [tool for tool in tools
+                        if np.all(tool.bounds[0] <= upper) and np.all(tool.bounds[1] >= lower)]
+            mesh = part['mesh']
+            if touching:
+                try:
+                    mesh = self._csg().difference(mesh, touching)
+                except Exception as e:
+                    logger.warning(f"line {line}: difference failed for {part['name']} ({e}), using it uncut")
+            results.append(dict(part, mesh=mesh, name=label if len(base) == 1 and tools else part['name']))
+        return results
+
+
+def parse_overrides(overrides: Sequence[str]) -> Dict[str, Any]:
+    """Evaluate -D style NAME=VALUE overrides with the SCAD expression syntax"""
+    values = {}
+    for override in overrides or []:
+        name, _, text = override.partition('=')
+        if not text:
+            raise ScadError(f"Override must be NAME=VALUE: {override}")
+        parser = Parser(text)
+        values[name.strip()] = evaluate(parser.expression(), {})
+    return values
+
+
+def read_scene(scad_file, overrides: Optional[Dict[str, Any]] = None, engine=None) -> List[Dict]:
+    """
+    Components placed by a SCAD assembly, as world-space meshes.
+
+    ``overrides`` replace top-level assignments like ``openscad -D``.
+    Returns dicts with a unique ``name``, the ``mesh``, its ``source`` (file
+    path or primitive kind), the SCAD ``line`` and ``color`` when set.
+    """
+    scad_file = Path(scad_file)
+    parser = Parser(scad_file.read_text())
+    statements = parser.parse_file()
+
+    if overrides:
+        for statement in statements:
+            if statement['type'] == 'assign' and statement['name'] in overrides:
+                statement['value'] = ('num', overrides[statement['name']])
+        missing = set(overrides) - {s['name'] for s in statements if s['type'] == 'assign'}
+        if missing:
+            logger.warning(f"Overrides not declared in {scad_file.name}: {', '.join(sorted(missing))}")
+
+    builder = SceneBuilder(parser.modules, scad_file.parent, engine)
+    parts = builder.run(statements, dict(SPECIAL_VARIABLES, **{k: v for k, v in (overrides or {}).items()
+                                                                if k.startswith('$')}))
+
+    seen: Dict[str, int] = {}
+    for part in parts:
+        seen[part['name']] = seen.get(part['name'], 0) + 1
+        if seen[part['name']] > 1:
+            part['name'] = f"{part['name']} #{seen[part['name']]}"
+        part.setdefault('color', None)
+    return parts
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+NucDeck Multi-Slice Circle Detection
+Batched planar sections, loop extraction and cylinder merging across slices
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+import logging
+
+import numpy as np
+import trimesh
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from scipy.spatial import cKDTree
+
+from hole_loops import chain_loops, fit_circles_2d
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SPACING = 0.5
+
+# Slice heights are nudged off the spacing lattice by this fraction of the
+# spacing so planes never pass exactly through grid-aligned CAD vertices
+HEIGHT_JITTER = 1.7e-5
+
+
+def slice_heights(mesh: trimesh.Trimesh, spacing: float = DEFAULT_SPACING,
+                  z_range: Optional[Sequence[float]] = None) -> np.ndarray:
+    """Evenly spaced Z heights across the mesh (or ``z_range``), offset half a step from the ends"""
+    low, high = mesh.bounds[:, 2]
+    if z_range is not None:
+        low, high = max(low, z_range[0]), min(high, z_range[1])
+    count = max(int(np.floor((high - low) / spacing)), 1)
+    return low + (np.arange(count) + 0.5 + HEIGHT_JITTER) * spacing
+
+
+def section_segments(mesh: trimesh.Trimesh, heights: np.ndarray):
+    """
+    Cut every face with every Z plane in one pass.
+
+    Each (face, plane) pair whose Z span brackets the plane contributes one
+    segment between the two face edges it crosses. Segment ends are keyed by
+    (plane, mesh edge), so neighbouring faces share keys exactly, and each
+    segment is oriented from the face normal so closed sections chain into
+    consistently directed loops. Returns the start/end keys, start/end XY
+    points and the plane index of every segment.
+    """
+    heights = np.asarray(heights, dtype=np.float64)
+    triangles = mesh.triangles
+    z = triangles[:, :, 2]
+    spacing = heights[1] - heights[0] if len(heights) > 1 else 1.0
+
+    # Planes crossing each face, as a contiguous index range
+    first = np.clip(np.ceil((z.min(axis=1) - heights[0]) / spacing), 0, len(heights)).astype(np.int64)
+    last = np.clip(np.floor((z.max(axis=1) - heights[0]) / spacing), -1, len(heights) - 1).astype(np.int64)
+    counts = np.maximum(last - first + 1, 0)
+
+    face = np.repeat(np.arange(len(triangles)), counts)
+    plane = first[face] + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    h = heights[plane]
+
+    # Edges (0,1), (1,2), (2,0) in the same order as mesh.faces_unique_edges
+    start_z = z[face]
+    end_z = start_z[:, [1, 2, 0]]
+    crosses = (start_z - h[:, None]) * (end_z - h[:, None]) < 0
+    pair = crosses.sum(axis=1) == 2
+    face, plane, h, crosses = face[pair], plane[pair], h[pair], crosses[pair]
+
+    row, edge = np.nonzero(crosses)
+    edge = edge.reshape(-1, 2)
+    rows = row.reshape(-1, 2)[:, 0]
+
+    corners = triangles[face]
+    points = []
+    for k in range(2):
+        e = edge[:, k]
+        a = corners[rows, e]
+        b = corners[rows, (e + 1) % 3]
+        t = (h - a[:, 2]) / (b[:, 2] - a[:, 2])
+        points.append(a[:, :2] + t[:, None] * (b[:, :2] - a[:, :2]))
+    start, end = points
+
+    unique_edges = mesh.faces_unique_edges[face]
+    n_edges = len(mesh.edges_unique)
+    start_key = plane * n_edges + unique_edges[rows, edge[:, 0]]
+    end_key = plane * n_edges + unique_edges[rows, edge[:, 1]]
+
+    # Walk each section with the material on the same side
+    normals = mesh.face_normals[face]
+    direction = np.stack([normals[:, 1], -normals[:, 0]], axis=1)
+    flip = np.einsum('ij,ij->i', end - start, direction) < 0
+    start_key, end_key = np.where(flip, end_key, start_key), np.where(flip, start_key, end_key)
+    start, end = np.where(flip[:, None], end, start), np.where(flip[:, None], start, end)
+
+    return start_key, end_key, start, end, plane
+
+
+def section_loops(mesh: trimesh.Trimesh, heights: np.ndarray) -> Tuple[List[np.ndarray], np.ndarray]:
+    """Closed XY loops of every slice, with the plane index of each loop"""
+    start_key, end_key, start, _, plane = section_segments(mesh, heights)
+    if len(start_key) == 0:
+        return [], np.zeros(0, dtype=np.int64)
+
+    # Each key starts exactly one segment on a closed section, so a loop of
+    # keys maps straight back to the segment start points
+    order = np.argsort(start_key)
+    loops = chain_loops(np.stack([start_key, end_key], axis=1))
+    segments = [order[np.searchsorted(start_key[order], loop)] for loop in loops]
+    return [start[s] for s in segments], np.array([plane[s[0]] for s in segments], dtype=np.int64)
+
+
+def merge_slices(centers: np.ndarray, radii: np.ndarray, residuals: np.ndarray, z: np.ndarray,
+                 planes: np.ndarray, point_counts: np.ndarray, tolerance: float) -> List[Dict]:
+    """
+    Merge per-slice circles into cylinders.
+
+    Circles on consecutive slice planes (``planes`` holds each circle's
+    plane index) whose centres and radii agree within ``tolerance`` are
+    linked, and linked groups become one feature spanning their lowest and
+    highest slice. Coaxial holes with solid material between them stay
+    separate features.
+    """
+    if len(radii) == 0:
+        return []
+
+    tree = cKDTree(np.column_stack([centers, radii]))
+    pairs = tree.query_pairs(tolerance, output_type='ndarray')
+    pairs = pairs[np.abs(planes[pairs[:, 0]] - planes[pairs[:, 1]]) == 1]
+    graph = coo_matrix((np.ones(len(pairs)), (pairs[:, 0], pairs[:, 1])), shape=(len(radii),) * 2)
+    count, labels = connected_components(graph, directed=False)
+
+    features = []
+    for label in range(count):
+        members = np.flatnonzero(labels == label)
+        bottom, top = float(z[members].min()), float(z[members].max())
+        radius = float(radii[members].mean())
+        spread = float(radii[members].std())
+        residual = float(residuals[members].mean())
+        features.append({
+            'center': [*centers[members].mean(axis=0).tolist(), (bottom + top) / 2],
+            'radius': radius,
+            'radius_std': max(residual, spread),
+            'z_bottom': bottom,
+            'z_top': top,
+            'slices': len(members),
+            'point_count': int(point_counts[members].sum()),
+            'circularity': 1.0 - max(residual, spread) / radius if radius > 0 else 0.0,
+        })
+
+    features.sort(key=lambda feature: (feature['center'][0], feature['center'][1]))
+    return features
+
+
+def detect_cylinders(mesh: trimesh.Trimesh, min_radius: float = 0.0, max_radius: float = np.inf,
+                     spacing: float = DEFAULT_SPACING, z_range: Optional[Sequence[float]] = None,
+                     max_residual_ratio: float = 0.05, min_points: int = 8,
+                     tolerance: float = 0.5) -> List[Dict]:
+    """
+    Find vertical cylindrical holes and posts by slicing the mesh along Z.
+
+    All slices are cut in one batch, every closed loop of every slice is
+    circle-fitted at once, and loops that fit within ``max_residual_ratio``
+    of their radius are merged across slices into features with a bottom and
+    top Z.
+    """
+    heights = slice_heights(mesh, spacing, z_range)
+    loops, planes = section_loops(mesh, heights)
+    loops_kept = [i for i, loop in enumerate(loops) if len(loop) >= min_points]
+    if not loops_kept:
+        return []
+
+    centers, radii, residuals = fit_circles_2d([loops[i] for i in loops_kept])
+    accepted = ((radii >= min_radius) & (radii <= max_radius)
+                & (residuals <= max_residual_ratio * np.maximum(radii, 1e-12)))
+    logger.debug(f"{len(heights)} slices, {len(loops)} loops, {int(accepted.sum())} circular")
+
+    loop_planes = planes[loops_kept]
+    point_counts = np.array([len(loops[i]) for i in loops_kept])
+    return merge_slices(centers[accepted], radii[accepted], residuals[accepted], heights[loop_planes][accepted],
+                        loop_planes[accepted], point_counts[accepted], tolerance)
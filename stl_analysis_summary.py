@@ -3,114 +3,156 @@ STL Analysis Summary for NucDeck Component Placement
 Based on trimesh analysis of Housing Front.STL and Back Cover 7th Gen Intel NUC.STL
 """
 
-print("NUCDECK STL ANALYSIS SUMMARY")
-print("=" * 50)
-
-print("\n1. SHELL DIMENSIONS:")
-print("Front Cover:")
-print("  • Width (X): 294.0 mm")
-print("  • Depth (Y): 19.0 mm") 
-print("  • Height (Z): 115.0 mm")
-print("  • Geometric Center: (147.0, 9.5, 57.5) mm")
-
-print("\nBack Cover:")
-print("  • Width (X): 137.0 mm")
-print("  • Depth (Y): 19.0 mm")
-print("  • Height (Z): 113.0 mm") 
-print("  • Geometric Center: (70.5, 9.5, 56.6) mm")
-
-print("\nCombined Assembly Envelope:")
-print("  • Total: 294.0 × 38.0 × 115.0 mm")
-print("  • Front cover extends significantly wider (grip areas)")
-
-print("\n2. INTERNAL COMPLEXITY:")
-print("• Both parts have major internal cavities (volume ratios < 0.2)")
-print("• Front cover: 66,237 mm³ internal volume")
-print("• Back cover: 39,198 mm³ internal volume")
-print("• Existing mounting features detected at multiple Z-levels")
-
-print("\n3. COMPONENT PLACEMENT ANALYSIS:")
-
-# Component requirements
-components = {
-    'Samsung S20': [152, 70, 9],
-    'Battery': [90, 60, 12],
-    'Joystick': [32, 32, 18]
-}
-
-print(f"\nPhone Placement (Samsung S20: {components['Samsung S20']} mm):")
-front_center_x = 147.0
-front_width = 294.0
-phone_width = components['Samsung S20'][0]
-
-if phone_width + 4 <= front_width:  # 2mm clearance each side
-    print(f"  ✓ Fits in front cover width")
-    print(f"  • Suggested center position: X={front_center_x:.1f} mm")
-    print(f"  • Phone area: X={front_center_x-phone_width/2:.1f} to {front_center_x+phone_width/2:.1f} mm")
-else:
-    print(f"  ⚠ Tight fit - may need design modification")
-
-print(f"\nGrip Areas & Joystick Placement:")
-grip_width = (front_width - phone_width - 4) / 2  # Available space each side
-joystick_diameter = components['Joystick'][0]
-
-print(f"  • Available grip width each side: {grip_width:.1f} mm")
-if grip_width >= joystick_diameter:
-    print(f"  ✓ Joysticks fit comfortably")
+import os
+import sys
+
+from analysis import compute
+from mesh_cache import load_mesh
+
+HOUSING_DIR = "/workspaces/scad/Housing - STL"
+FRONT_FILE = os.path.join(HOUSING_DIR, "Housing Front.STL")
+BACK_FILE = os.path.join(HOUSING_DIR, "Back Cover 7th Gen Intel NUC.STL")
+
+SUMMARY_METRICS = ['properties', 'dimensions', 'geometric_center', 'volume_ratio',
+                   'face_orientation', 'planar_patches', 'z_levels']
+
+
+def summarize(filepath):
+    """Shared analysis metrics for one housing part"""
+    return compute(load_mesh(filepath), SUMMARY_METRICS)
+
+
+def main():
+    for path in (FRONT_FILE, BACK_FILE):
+        if not os.path.exists(path):
+            print(f"Error: {path} not found")
+            sys.exit(1)
+    
+    front = summarize(FRONT_FILE)
+    back = summarize(BACK_FILE)
+    front_dims, back_dims = front['dimensions'], back['dimensions']
+    front_center, back_center = front['geometric_center'], back['geometric_center']
+    
+    print("NUCDECK STL ANALYSIS SUMMARY")
+    print("=" * 50)
+
+    print("\n1. SHELL DIMENSIONS:")
+    for label, dims, center in (("Front Cover", front_dims, front_center), ("Back Cover", back_dims, back_center)):
+        print(f"{label}:" if label == "Front Cover" else f"\n{label}:")
+        print(f"  • Width (X): {dims[0]:.1f} mm")
+        print(f"  • Depth (Y): {dims[1]:.1f} mm")
+        print(f"  • Height (Z): {dims[2]:.1f} mm")
+        print(f"  • Geometric Center: ({center[0]:.1f}, {center[1]:.1f}, {center[2]:.1f}) mm")
+
+    print("\nCombined Assembly Envelope:")
+    print(f"  • Total: {max(front_dims[0], back_dims[0]):.1f} × {front_dims[1] + back_dims[1]:.1f} × "
+          f"{max(front_dims[2], back_dims[2]):.1f} mm")
+    print("  • Front cover extends significantly wider (grip areas)")
+
+    print("\n2. INTERNAL COMPLEXITY:")
+    print(f"• Volume/convex hull ratios: front {front['volume_ratio']:.2f}, back {back['volume_ratio']:.2f}")
+    print(f"• Front cover: {front['properties']['volume']:,.0f} mm³ solid material")
+    print(f"• Back cover: {back['properties']['volume']:,.0f} mm³ solid material")
+    print("• Existing mounting features detected at multiple Z-levels")
+
+    print("\n3. COMPONENT PLACEMENT ANALYSIS:")
+    
+    # Outcome of each placement check, for the recommendations below
+    fits, concerns = [], []
+
+    # Component requirements
+    components = {
+        'Samsung S20': [152, 70, 9],
+        'Battery': [90, 60, 12],
+        'Joystick': [32, 32, 18]
+    }
+
+    print(f"\nPhone Placement (Samsung S20: {components['Samsung S20']} mm):")
+    front_center_x = front_center[0]
+    front_width = front_dims[0]
+    phone_width = components['Samsung S20'][0]
+
+    if phone_width + 4 <= front_width:  # 2mm clearance each side
+        print(f"  ✓ Fits in front cover width")
+        print(f"  • Suggested center position: X={front_center_x:.1f} mm")
+        print(f"  • Phone area: X={front_center_x-phone_width/2:.1f} to {front_center_x+phone_width/2:.1f} mm")
+        fits.append("Phone cutout in front cover center")
+    else:
+        print(f"  ⚠ Tight fit - may need design modification")
+        concerns.append(f"Phone width ({phone_width} mm + 4 mm clearance) vs front cover width {front_width:.1f} mm")
+
+    print(f"\nGrip Areas & Joystick Placement:")
+    grip_width = (front_width - phone_width - 4) / 2  # Available space each side
+    joystick_diameter = components['Joystick'][0]
+
     left_joystick_x = front_center_x - (phone_width/2 + grip_width/2)
     right_joystick_x = front_center_x + (phone_width/2 + grip_width/2)
-    print(f"  • Left joystick center: X={left_joystick_x:.1f} mm")
-    print(f"  • Right joystick center: X={right_joystick_x:.1f} mm")
-else:
-    print(f"  ⚠ Joysticks may be cramped")
-
-print(f"\nBattery Placement ({components['Battery']} mm):")
-back_width = 137.0
-battery_width = components['Battery'][0]
-
-if battery_width + 4 <= back_width:
-    print(f"  ✓ Fits in back cover width")
-    print(f"  • Suggested center: X={70.5:.1f} mm (back cover center)")
-else:
-    print(f"  ⚠ Battery may not fit - check internal cavity")
-
-print("\n4. INTERNAL FEATURES DETECTED:")
-print("Front Cover:")
-print("  • 67 large flat areas (>100mm²) - potential mounting surfaces")
-print("  • Major detail at Z=115mm (top), Z=5mm (base), Z=0mm (bottom)")
-print("  • 593 upward-facing surfaces, 680 downward recesses")
-
-print("\nBack Cover:")
-print("  • 48 large flat areas - fewer but substantial mounting options")
-print("  • Major detail at Z=5.1mm, Z=7.1mm, Z=111.1mm")
-print("  • Large vertical faces suggest internal wall structures")
-
-print("\n5. DESIGN RECOMMENDATIONS:")
-print("✓ CONFIRMED FITS:")
-print("  • Phone cutout in front cover center")
-print("  • Joysticks in grip areas")
-print("  • Battery compartment in back cover")
-
-print("\n⚠ NEEDS VERIFICATION:")
-print("  • Internal cavity depths (only 19mm total depth per part)")
-print("  • Mounting hole locations for electronics")
-print("  • Cable routing paths")
-
-print("\n📐 SUGGESTED CUTOUT POSITIONS:")
-print("Front Cover Cutouts:")
-print(f"  • Phone pocket: Center at (147, 9.5) mm, size 154×72×10 mm")
-print(f"  • Left joystick: Center at ({left_joystick_x:.1f}, 15) mm, ⌀32 mm")
-print(f"  • Right joystick: Center at ({right_joystick_x:.1f}, 15) mm, ⌀32 mm")
-print(f"  • Button areas: Around phone pocket edges")
-
-print("\nBack Cover Pockets:")
-print(f"  • Battery bay: Center at (70.5, 9.5) mm, size 92×62×13 mm")
-print(f"  • Electronics area: Remaining space around battery")
-print(f"  • Ventilation: Near electronics (avoid water ingress)")
-
-print("\n6. NEXT STEPS:")
-print("1. Load STL files in CAD software for detailed cutout design")
-print("2. Verify internal cavity depths match component requirements")
-print("3. Check for existing mounting bosses/features to preserve")
-print("4. Plan cable routing between front and back covers")
-print("5. Add clearance for assembly tolerances")
+
+    print(f"  • Available grip width each side: {grip_width:.1f} mm")
+    if grip_width >= joystick_diameter:
+        print(f"  ✓ Joysticks fit comfortably")
+        print(f"  • Left joystick center: X={left_joystick_x:.1f} mm")
+        print(f"  • Right joystick center: X={right_joystick_x:.1f} mm")
+        fits.append("Joysticks in grip areas")
+    else:
+        print(f"  ⚠ Joysticks may be cramped")
+        concerns.append(f"Joystick ⌀{joystick_diameter} mm vs {grip_width:.1f} mm grip width")
+
+    print(f"\nBattery Placement ({components['Battery']} mm):")
+    back_width = back_dims[0]
+    battery_width = components['Battery'][0]
+
+    if battery_width + 4 <= back_width:
+        print(f"  ✓ Fits in back cover width")
+        print(f"  • Suggested center: X={back_center[0]:.1f} mm (back cover center)")
+        fits.append("Battery compartment in back cover")
+    else:
+        print(f"  ⚠ Battery may not fit - check internal cavity")
+        concerns.append(f"Battery width ({battery_width} mm + 4 mm clearance) vs back cover width {back_width:.1f} mm")
+
+    print("\n4. INTERNAL FEATURES DETECTED:")
+    for label, part in (("Front Cover", front), ("Back Cover", back)):
+        orientation = part['face_orientation']
+        levels = ", ".join(f"Z={level['z']:.1f}mm" for level in part['z_levels']['top'][:3])
+        print(f"{label}:" if label == "Front Cover" else f"\n{label}:")
+        print(f"  • {len(part['planar_patches'])} large flat areas (>100mm²) - potential mounting surfaces")
+        print(f"  • Major detail at {levels}")
+        print(f"  • {orientation['up']['large_faces']} upward-facing surfaces, "
+              f"{orientation['down']['large_faces']} downward recesses")
+
+    print("\n5. DESIGN RECOMMENDATIONS:")
+    if fits:
+        print("✓ CONFIRMED FITS:")
+        for item in fits:
+            print(f"  • {item}")
+        print()
+
+    print("⚠ NEEDS VERIFICATION:")
+    for item in concerns:
+        print(f"  • {item}")
+    print(f"  • Internal cavity depths (front {front_dims[2]:.1f} mm, back {back_dims[2]:.1f} mm total height)")
+    print("  • Mounting hole locations for electronics")
+    print("  • Cable routing paths")
+
+    print("\n📐 SUGGESTED CUTOUT POSITIONS:")
+    print("Front Cover Cutouts:")
+    print(f"  • Phone pocket: Center at ({front_center[0]:.1f}, {front_center[1]:.1f}) mm, size 154×72×10 mm")
+    print(f"  • Left joystick: Center at ({left_joystick_x:.1f}, 15) mm, ⌀32 mm")
+    print(f"  • Right joystick: Center at ({right_joystick_x:.1f}, 15) mm, ⌀32 mm")
+    print(f"  • Button areas: Around phone pocket edges")
+
+    print("\nBack Cover Pockets:")
+    print(f"  • Battery bay: Center at ({back_center[0]:.1f}, {back_center[1]:.1f}) mm, size 92×62×13 mm")
+    print(f"  • Electronics area: Remaining space around battery")
+    print(f"  • Ventilation: Near electronics (avoid water ingress)")
+
+    print("\n6. NEXT STEPS:")
+    print("1. Load STL files in CAD software for detailed cutout design")
+    print("2. Verify internal cavity depths match component requirements")
+    print("3. Check for existing mounting bosses/features to preserve")
+    print("4. Plan cable routing between front and back covers")
+    print("5. Add clearance for assembly tolerances")
+
+
+if __name__ == "__main__":
+    main()
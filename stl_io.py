@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+NucDeck STL I/O
+Binary STL conversion and zero-copy memory-mapped triangle access
+"""
+
+import os
+import re
+import struct
+from pathlib import Path
+from typing import Union
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Binary STL layout: 80-byte header, uint32 triangle count, then one
+# 50-byte record per triangle
+STL_HEADER_SIZE = 84
+STL_RECORD = np.dtype(
+    [("normal", "<f4", (3,)), ("vertices", "<f4", (3, 3)), ("attributes", "<u2")]
+)
+
+# Sidecar suffix for converted files; lower-case so ``glob("*.STL")`` in the
+# model library never picks them up as source models
+BINARY_SUFFIX = ".bin.stl"
+
+VERTEX_RE = re.compile(rb"vertex\s+(\S+)\s+(\S+)\s+(\S+)")
+
+PathLike = Union[str, Path]
+
+
+def is_binary_stl(path: PathLike) -> bool:
+    """Check whether a file is a binary STL (its size matches the declared triangle count)"""
+    size = os.path.getsize(path)
+    if size < STL_HEADER_SIZE:
+        return False
+    with open(path, 'rb') as f:
+        f.seek(80)
+        count = struct.unpack('<I', f.read(4))[0]
+    return size == STL_HEADER_SIZE + count * STL_RECORD.itemsize
+
+
+def is_binary_sidecar(path: PathLike) -> bool:
+    """Check whether a path is a converted sidecar rather than a source model"""
+    return str(path).lower().endswith(BINARY_SUFFIX)
+
+
+def binary_path(source: PathLike) -> Path:
+    """Return the path of the binary sidecar for an STL file"""
+    source = Path(source)
+    return source.with_name(source.stem + BINARY_SUFFIX)
+
+
+def parse_ascii_stl(path: PathLike) -> np.ndarray:
+    """Parse an ASCII STL into an (n, 3, 3) float32 array of triangles"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    coords = VERTEX_RE.findall(data)
+    return np.array(coords, dtype=np.float32).reshape(-1, 3, 3)
+
+
+def write_binary_stl(path: PathLike, triangles: np.ndarray, name: str = ""):
+    """Write triangles as a binary STL, computing unit face normals"""
+    triangles = np.asarray(triangles, dtype=np.float32)
+    normals = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+    lengths = np.linalg.norm(normals, axis=1)
+    normals /= np.where(lengths > 0, lengths, 1.0)[:, None]
+
+    records = np.zeros(len(triangles), dtype=STL_RECORD)
+    records['normal'] = normals
+    records['vertices'] = triangles
+
+    header = f"binary STL: {name}".encode('ascii', 'replace')[:80].ljust(80, b' ')
+
+    # Write under a temporary name so readers never map a partial file
+    path = Path(path)
+    temp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(temp_path, 'wb') as f:
+        f.write(header)
+        f.write(struct.pack('<I', len(records)))
+        records.tofile(f)
+    os.replace(temp_path, path)
+
+
+def ensure_binary(source: PathLike) -> Path:
+    """
+    Return a binary STL path for ``source``, converting it if needed.
+
+    Binary sources are returned as-is. ASCII sources get a ``.bin.stl``
+    sidecar next to them, rebuilt whenever the source is newer.
+    """
+    source = Path(source)
+    if is_binary_stl(source):
+        return source
+
+    target = binary_path(source)
+    if target.exists() and target.stat().st_mtime >= source.stat().st_mtime:
+        return target
+
+    triangles = parse_ascii_stl(source)
+    write_binary_stl(target, triangles, source.stem)
+    logger.info(f"Converted {source.name} to binary ({len(triangles)} triangles, "
+                f"{source.stat().st_size / 1e6:.1f} MB -> {target.stat().st_size / 1e6:.1f} MB)")
+    return target
+
+
+def mmap_stl(path: PathLike) -> np.ndarray:
+    """
+    Memory-map a binary STL as a structured array of ``STL_RECORD``.
+
+    ``records['vertices']`` is an (n, 3, 3) float32 view and
+    ``records['normal']`` an (n, 3) view; neither copies the file.
+    """
+    if not is_binary_stl(path):
+        raise ValueError(f"{path} is not a binary STL")
+
+    count = (os.path.getsize(path) - STL_HEADER_SIZE) // STL_RECORD.itemsize
+    if count == 0:
+        return np.zeros(0, dtype=STL_RECORD)
+    return np.memmap(path, dtype=STL_RECORD, mode='r', offset=STL_HEADER_SIZE, shape=(count,))
+
+
+def load_triangles(path: PathLike) -> np.ndarray:
+    """Load any STL as a zero-copy (n, 3, 3) float32 triangle array, converting ASCII once"""
+    return mmap_stl(ensure_binary(path))['vertices']
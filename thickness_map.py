@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+NucDeck Wall Thickness Map
+Batched inward ray casting for per-face wall thickness and thin-wall regions
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+import logging
+
+import numpy as np
+import trimesh
+
+logger = logging.getLogger(__name__)
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+# Ray search starts this long (mm) and grows by RANGE_GROWTH each pass for
+# the rays that have not hit anything yet
+START_RANGE = 4.0
+RANGE_GROWTH = 4.0
+
+# Hits closer than this (mm) come from sliver faces next to the ray's own
+# face, not from the opposite wall
+MIN_HIT_DISTANCE = 1e-3
+
+# Upper bound on ray/triangle pairs tested at once, to keep memory flat
+MAX_PAIRS = 4_000_000
+
+# Below this many rays a process pool costs more than it saves
+MIN_RAYS_PER_WORKER = 20_000
+
+_worker_mesh: Optional[trimesh.Trimesh] = None
+
+
+def _init_worker(vertices: np.ndarray, faces: np.ndarray):
+    global _worker_mesh
+    _worker_mesh = trimesh.Trimesh(vertices=vertices, faces=faces, process=False)
+
+
+def _cast_chunk(args) -> np.ndarray:
+    return cast_inward(_worker_mesh, *args)
+
+
+def expand_boxes(lower: np.ndarray, upper: np.ndarray, dims: np.ndarray):
+    """Flattened grid-cell keys covered by integer boxes, with the owning box index"""
+    sizes = upper - lower + 1
+    counts = sizes.prod(axis=1)
+    owner = np.repeat(np.arange(len(lower)), counts)
+    offset = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+
+    sx, sy = sizes[owner, 0], sizes[owner, 1]
+    ix = lower[owner, 0] + offset % sx
+    iy = lower[owner, 1] + (offset // sx) % sy
+    iz = lower[owner, 2] + offset // (sx * sy)
+    return (ix * dims[1] + iy) * dims[2] + iz, owner
+
+
+def triangle_planes(triangles: np.ndarray):
+    """
+    Per-triangle supporting plane and inward edge planes.
+
+    A point on the triangle's plane is inside when it is on the positive side
+    of all three edge planes, so the per-pair hit test needs only dot products.
+    """
+    v0, v1, v2 = triangles[:, 0], triangles[:, 1], triangles[:, 2]
+    normals = np.cross(v1 - v0, v2 - v0)
+    edges = []
+    for a, b in ((v0, v1), (v1, v2), (v2, v0)):
+        edge_normal = np.cross(normals, b - a)
+        edges.append((edge_normal, np.einsum('ij,ij->i', edge_normal, a)))
+    return normals, np.einsum('ij,ij->i', normals, v0), edges
+
+
+def _grid_first_hits(triangles, planes, origins, directions, source_faces, max_distance):
+    """
+    First hit within ``max_distance`` for every ray, via a uniform grid.
+
+    Triangles and ray segments are binned into cells a quarter of the search
+    range wide by their bounding boxes, and every (ray, triangle) pair that
+    shares a cell is tested in bounded-size vectorized batches: distance to
+    the triangle's plane first, then the three edge planes on the survivors.
+    """
+    normals, offsets, edges = planes
+    cell = max_distance / 4
+    ends = origins + directions * max_distance
+    tri_lo, tri_hi = triangles.min(axis=1), triangles.max(axis=1)
+    seg_lo, seg_hi = np.minimum(origins, ends), np.maximum(origins, ends)
+
+    base = np.minimum(tri_lo.min(axis=0), seg_lo.min(axis=0))
+    top = np.maximum(tri_hi.max(axis=0), seg_hi.max(axis=0))
+    dims = np.floor((top - base) / cell).astype(np.int64) + 1
+
+    def cells(points):
+        return np.floor((points - base) / cell).astype(np.int64)
+
+    tri_keys, tri_ids = expand_boxes(cells(tri_lo), cells(tri_hi), dims)
+    order = np.argsort(tri_keys, kind='stable')
+    tri_keys, tri_ids = tri_keys[order], tri_ids[order]
+
+    ray_keys, ray_ids = expand_boxes(cells(seg_lo), cells(seg_hi), dims)
+    first = np.searchsorted(tri_keys, ray_keys, side='left')
+    counts = np.searchsorted(tri_keys, ray_keys, side='right') - first
+
+    best = np.full(len(origins), np.inf)
+    cumulative = np.cumsum(counts)
+    start = 0
+    while start < len(ray_keys):
+        base_count = cumulative[start - 1] if start else 0
+        stop = max(int(np.searchsorted(cumulative, base_count + MAX_PAIRS, side='right')), start + 1)
+        batch_counts = counts[start:stop]
+        total = int(batch_counts.sum())
+        start, batch_start = stop, start
+        if total == 0:
+            continue
+
+        ray = np.repeat(ray_ids[batch_start:stop], batch_counts)
+        offset = np.arange(total) - np.repeat(np.cumsum(batch_counts) - batch_counts, batch_counts)
+        tri = tri_ids[np.repeat(first[batch_start:stop], batch_counts) + offset]
+
+        keep = tri != source_faces[ray]
+        ray, tri = ray[keep], tri[keep]
+
+        # Ray/plane distance, then keep only hits inside the search range
+        normal = normals[tri]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = ((offsets[tri] - np.einsum('ij,ij->i', origins[ray], normal))
+                 / np.einsum('ij,ij->i', directions[ray], normal))
+        keep = (t > MIN_HIT_DISTANCE) & (t <= max_distance)
+        ray, tri, t = ray[keep], tri[keep], t[keep]
+
+        # Inside test against each edge plane, shrinking the batch as we go
+        points = origins[ray] + directions[ray] * t[:, None]
+        for edge_normal, edge_offset in edges:
+            keep = np.einsum('ij,ij->i', edge_normal[tri], points) >= edge_offset[tri]
+            ray, tri, t, points = ray[keep], tri[keep], t[keep], points[keep]
+
+        np.minimum.at(best, ray, t)
+
+    best[np.isinf(best)] = np.nan
+    return best
+
+
+def cast_inward(mesh: trimesh.Trimesh, points: np.ndarray, directions: np.ndarray,
+                source_faces: np.ndarray) -> np.ndarray:
+    """
+    Distance from each point to the first surface hit along its direction (NaN on a miss).
+
+    Rays are resolved in passes of growing range, so the many thin walls are
+    found with small, cheap candidate sets; the few rays still unresolved at
+    a quarter of the part's diagonal go to trimesh's exact ray query.
+    """
+    triangles = mesh.triangles
+    planes = triangle_planes(triangles)
+    distances = np.full(len(points), np.nan)
+    pending = np.arange(len(points))
+    max_range = np.linalg.norm(mesh.extents) / 4
+
+    search_range = START_RANGE
+    while len(pending) and search_range < max_range:
+        hits = _grid_first_hits(triangles, planes, points[pending], directions[pending],
+                                source_faces[pending], search_range)
+        found = np.isfinite(hits)
+        distances[pending[found]] = hits[found]
+        pending = pending[~found]
+        search_range *= RANGE_GROWTH
+
+    if len(pending):
+        index_tri, index_ray, locations = mesh.ray.intersects_id(
+            ray_origins=points[pending] + directions[pending] * MIN_HIT_DISTANCE,
+            ray_directions=directions[pending], multiple_hits=False, return_locations=True)
+        distances[pending[index_ray]] = np.linalg.norm(locations - points[pending[index_ray]], axis=1)
+
+    return distances
+
+
+def sample_points(mesh: trimesh.Trimesh, samples: Optional[int] = None, seed: int = 0):
+    """
+    Surface points and their faces: one centroid per face by default,
+    otherwise ``samples`` area-weighted random points
+    """
+    if samples is None:
+        return mesh.triangles_center, np.arange(len(mesh.faces))
+    return trimesh.sample.sample_surface(mesh, samples, seed=seed)[:2]
+
+
+def find_thin_regions(mesh: trimesh.Trimesh, face_thickness: np.ndarray, min_wall: float) -> List[Dict]:
+    """Group faces thinner than ``min_wall`` into edge-connected regions, largest first"""
+    thin = np.flatnonzero(face_thickness < min_wall)
+    if len(thin) == 0:
+        return []
+
+    is_thin = np.zeros(len(mesh.faces), dtype=bool)
+    is_thin[thin] = True
+    adjacency = mesh.face_adjacency
+    edges = adjacency[is_thin[adjacency[:, 0]] & is_thin[adjacency[:, 1]]]
+    components = trimesh.graph.connected_components(edges, nodes=thin, min_len=1)
+
+    areas = mesh.area_faces
+    centers = mesh.triangles_center
+    regions = []
+    for faces in components:
+        faces = np.asarray(faces)
+        area = areas[faces].sum()
+        weights = areas[faces] / area if area > 0 else None
+        regions.append({
+            'faces': len(faces),
+            'area': float(area),
+            'centroid': np.average(centers[faces], axis=0, weights=weights).tolist(),
+            'min_thickness': float(face_thickness[faces].min()),
+            'mean_thickness': float(np.average(face_thickness[faces], weights=weights)),
+        })
+
+    regions.sort(key=lambda region: region['area'], reverse=True)
+    return regions
+
+
+def thickness_map(mesh: trimesh.Trimesh, samples: Optional[int] = None, min_wall: float = 1.2,
+                  workers: Optional[int] = None, seed: int = 0) -> Dict:
+    """
+    Measure wall thickness across a whole part.
+
+    Each sample casts one ray along the inverted face normal; the distance
+    to the first hit is the local wall thickness. Rays are intersected in
+    vectorized batches (see ``cast_inward``), split across ``workers``
+    processes when there are enough of them. Per-face thickness is the
+    minimum over that face's samples.
+    """
+    points, face_index = sample_points(mesh, samples, seed)
+    directions = -mesh.face_normals[face_index]
+
+    workers = workers or 1
+    workers = min(workers, max(1, len(points) // MIN_RAYS_PER_WORKER))
+    if workers > 1:
+        chunks = list(zip(np.array_split(points, workers * 4),
+                          np.array_split(directions, workers * 4),
+                          np.array_split(face_index, workers * 4)))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(mesh.vertices.view(np.ndarray), mesh.faces.view(np.ndarray))) as pool:
+            thickness = np.concatenate(list(pool.map(_cast_chunk, chunks)))
+    else:
+        thickness = cast_inward(mesh, points, directions, face_index)
+
+    face_thickness = np.full(len(mesh.faces), np.inf)
+    hit = np.isfinite(thickness)
+    np.minimum.at(face_thickness, face_index[hit], thickness[hit])
+    face_thickness[np.isinf(face_thickness)] = np.nan
+
+    measured = thickness[hit]
+    return {
+        'samples': len(points),
+        'coverage': float(hit.mean()) if len(points) else 0.0,
+        'thickness': thickness,
+        'points': points,
+        'face_index': face_index,
+        'face_thickness': face_thickness,
+        'min': float(measured.min()) if len(measured) else None,
+        'mean': float(measured.mean()) if len(measured) else None,
+        'percentiles': {p: float(v) for p, v in zip(PERCENTILES, np.percentile(measured, PERCENTILES))}
+        if len(measured) else {},
+        'min_wall': min_wall,
+        'thin_regions': find_thin_regions(mesh, face_thickness, min_wall),
+    }
+
+
+def print_thickness_summary(result: Dict, max_regions: int = 5):
+    """Print percentiles and the largest thin-wall regions"""
+    if not result['percentiles']:
+        print("Wall thickness: no ray hits (open or inverted mesh?)")
+        return
+
+    percentiles = ", ".join(f"p{p}={v:.2f}" for p, v in result['percentiles'].items())
+    print(f"Wall thickness ({result['samples']:,} rays, {result['coverage']:.0%} hit): "
+          f"min={result['min']:.2f} mm, mean={result['mean']:.2f} mm")
+    print(f"  Percentiles (mm): {percentiles}")
+
+    regions = result['thin_regions']
+    print(f"  Thin-wall regions (< {result['min_wall']} mm): {len(regions)}")
+    for region in regions[:max_regions]:
+        x, y, z = region['centroid']
+        print(f"    {region['area']:8.1f} mm² at ({x:.1f}, {y:.1f}, {z:.1f}), "
+              f"min {region['min_thickness']:.2f} mm, {region['faces']} faces")
+
+
+def main():
+    import argparse
+    import json
+    import time
+
+    from mesh_cache import load_mesh
+
+    parser = argparse.ArgumentParser(description="NucDeck wall thickness map")
+    parser.add_argument("stl_file", help="STL file to analyze")
+    parser.add_argument("--samples", type=int, help="Random surface samples (default: one per face)")
+    parser.add_argument("--min-wall", type=float, default=1.2, help="Thin-wall threshold in mm (default: 1.2)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Ray-casting processes")
+    parser.add_argument("--output", type=str, help="Write per-face thickness and regions as JSON")
+
+    args = parser.parse_args()
+
+    mesh = load_mesh(args.stl_file)
+    start = time.perf_counter()
+    result = thickness_map(mesh, args.samples, args.min_wall, args.workers)
+    print(f"{os.path.basename(args.stl_file)}: {len(mesh.faces):,} faces, "
+          f"mapped in {time.perf_counter() - start:.2f}s")
+    print_thickness_summary(result)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'file': args.stl_file,
+                'min_wall': args.min_wall,
+                'percentiles': result['percentiles'],
+                'face_thickness': [None if np.isnan(t) else round(float(t), 4) for t in result['face_thickness']],
+                'thin_regions': result['thin_regions'],
+            }, f, indent=2)
+        print(f"Thickness map saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
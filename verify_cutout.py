@@ -4,17 +4,19 @@ Verification Script for Modified Front Cover
 Analyzes the cutout to ensure it meets specifications
 """
 
-import trimesh
 import numpy as np
 import os
 
+from mesh_cache import load_mesh
+from mesh_diff import diff_meshes, export_diff_ply, print_diff_summary
+
 def verify_cutout_dimensions(mesh_file, expected_center, expected_width, expected_height):
     """
     Verify that the cutout meets the specified dimensions
     """
     print(f"Verifying cutout in: {os.path.basename(mesh_file)}")
     
-    mesh = trimesh.load(mesh_file)
+    mesh = load_mesh(mesh_file)
     
     # Get mesh bounds
     bounds = mesh.bounds
@@ -90,7 +92,7 @@ def create_cutout_analysis_report():
     # Analyze original file
     if os.path.exists(original_file):
         print(f"\n--- Original Front Cover ---")
-        original_mesh = trimesh.load(original_file)
+        original_mesh = load_mesh(original_file)
         print(f"  Vertices: {len(original_mesh.vertices):,}")
         print(f"  Faces: {len(original_mesh.faces):,}")
         print(f"  Volume: {original_mesh.volume:,.0f} mm³")
@@ -100,7 +102,7 @@ def create_cutout_analysis_report():
     for version, filepath in [("V1", modified_file_v1), ("V2", modified_file_v2)]:
         if os.path.exists(filepath):
             print(f"\n--- Modified Front Cover {version} ---")
-            modified_mesh = trimesh.load(filepath)
+            modified_mesh = load_mesh(filepath)
             
             print(f"  File: {os.path.basename(filepath)}")
             print(f"  File size: {os.path.getsize(filepath):,} bytes")
@@ -122,6 +124,13 @@ def create_cutout_analysis_report():
                     print(f"  ✓ Cutout appears effective")
                 else:
                     print(f"  ⚠ Minimal material removed - cutout may be ineffective")
+                
+                # Where the material changed, not just how much
+                diff = diff_meshes(original_mesh, modified_mesh)
+                print_diff_summary(diff)
+                diff_file = os.path.splitext(filepath)[0] + "_diff.ply"
+                export_diff_ply(modified_mesh, diff['vertex_distance'], diff_file)
+                print(f"  Distance-coloured diff: {os.path.basename(diff_file)}")
             
             # Verify cutout dimensions
             cutout_valid = verify_cutout_dimensions(
@@ -136,7 +145,7 @@ def create_cutout_analysis_report():
     # Analyze template file
     if os.path.exists(template_file):
         print(f"\n--- Cutout Template ---")
-        template_mesh = trimesh.load(template_file)
+        template_mesh = load_mesh(template_file)
         print(f"  File: {os.path.basename(template_file)}")
         print(f"  Dimensions: {template_mesh.bounds[1] - template_mesh.bounds[0]}")
         print(f"  Volume: {template_mesh.volume:,.0f} mm³")
@@ -158,7 +167,7 @@ def create_cutout_analysis_report():
         print(f"✓ Cutout should accommodate Samsung S20 with 0.5mm tolerance")
         
         # Load the best version for final checks
-        best_mesh = trimesh.load(best_file)
+        best_mesh = load_mesh(best_file)
         if best_mesh.is_watertight:
             print(f"✓ Mesh is watertight - suitable for 3D printing")
         else:
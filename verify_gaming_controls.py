@@ -4,7 +4,6 @@ Gaming Control Verification Script for Modified NucDeck Front Cover
 Verifies presence and dimensions of gaming control cutouts in the S20-modified front shell
 """
 
-import trimesh
 import numpy as np
 import json
 import os
@@ -12,6 +11,9 @@ from scipy.spatial.distance import cdist
 from sklearn.cluster import DBSCAN
 import matplotlib.pyplot as plt
 
+from hole_loops import detect_circular_loops
+from mesh_cache import load_mesh as load_cached_mesh
+
 def load_mesh(filepath):
     """Load and validate the mesh file"""
     if not os.path.exists(filepath):
@@ -19,7 +21,7 @@ def load_mesh(filepath):
         return None
     
     try:
-        mesh = trimesh.load(filepath)
+        mesh = load_cached_mesh(filepath)
         print(f"Loaded mesh: {len(mesh.vertices)} vertices, {len(mesh.faces)} faces")
         print(f"Watertight: {mesh.is_watertight}")
         print(f"Bounds: {mesh.bounds}")
@@ -31,98 +33,30 @@ def load_mesh(filepath):
 def detect_circular_holes(mesh, min_radius=5, max_radius=20, samples=1000):
     """
     Detect circular holes in the mesh by analyzing boundary loops
+    
+    Boundary edges are found from vectorized edge/face incidence counts,
+    chained into ordered loops, and every loop is circle-fitted in one batch.
+    ``samples`` is kept for compatibility and no longer used.
     """
     holes = []
     
     try:
-        # Sample points on the mesh surface
-        surface_points = mesh.sample(samples)
-        
-        # Find boundary edges (edges that belong to only one face)
-        edges = mesh.edges_unique
-        edge_face_count = np.zeros(len(edges))
-        
-        for i, edge in enumerate(edges):
-            # Count how many faces contain this edge
-            faces_with_edge = []
-            for j, face in enumerate(mesh.faces):
-                if edge[0] in face and edge[1] in face:
-                    faces_with_edge.append(j)
-            edge_face_count[i] = len(faces_with_edge)
-        
-        # Boundary edges have count == 1
-        boundary_edges = edges[edge_face_count == 1]
-        
-        if len(boundary_edges) > 0:
-            # Cluster boundary points to find separate holes
-            boundary_points = mesh.vertices[boundary_edges.flatten()]
+        for hole in detect_circular_loops(mesh.vertices, mesh.faces, min_radius, max_radius):
+            center = hole['center']
+            holes.append({
+                'center': center,
+                'radius': hole['radius'],
+                'points': hole['points'],
+                'type': 'circular'
+            })
             
-            if len(boundary_points) > 3:
-                # Use DBSCAN to cluster boundary points
-                clustering = DBSCAN(eps=5.0, min_samples=3).fit(boundary_points)
-                labels = clustering.labels_
-                
-                # Analyze each cluster
-                for label in set(labels):
-                    if label == -1:  # Skip noise
-                        continue
-                    
-                    cluster_points = boundary_points[labels == label]
-                    if len(cluster_points) < 4:
-                        continue
-                    
-                    # Fit circle to cluster points (project to XY plane)
-                    xy_points = cluster_points[:, :2]
-                    center, radius = fit_circle_2d(xy_points)
-                    
-                    if min_radius <= radius <= max_radius:
-                        # Get Z coordinate (average of cluster points)
-                        z_coord = np.mean(cluster_points[:, 2])
-                        
-                        holes.append({
-                            'center': [center[0], center[1], z_coord],
-                            'radius': radius,
-                            'points': cluster_points,
-                            'type': 'circular'
-                        })
-                        
-                        print(f"Found circular hole: center=({center[0]:.1f}, {center[1]:.1f}, {z_coord:.1f}), radius={radius:.1f}mm")
+            print(f"Found circular hole: center=({center[0]:.1f}, {center[1]:.1f}, {center[2]:.1f}), radius={hole['radius']:.1f}mm")
     
     except Exception as e:
         print(f"Error in hole detection: {e}")
     
     return holes
 
-def fit_circle_2d(points):
-    """
-    Fit a circle to 2D points using least squares
-    Returns center (x, y) and radius
-    """
-    if len(points) < 3:
-        return [0, 0], 0
-    
-    try:
-        # Method: Fit circle using algebraic approach
-        x = points[:, 0]
-        y = points[:, 1]
-        
-        # Set up the system of equations
-        A = np.column_stack([2*x, 2*y, np.ones(len(x))])
-        b = x**2 + y**2
-        
-        # Solve for circle parameters
-        params = np.linalg.lstsq(A, b, rcond=None)[0]
-        center_x, center_y, c = params
-        
-        # Calculate radius
-        radius = np.sqrt(center_x**2 + center_y**2 + c)
-        
-        return [center_x, center_y], radius
-    
-    except Exception as e:
-        print(f"Error fitting circle: {e}")
-        return [0, 0], 0
-
 def detect_rectangular_features(mesh):
     """
     Detect rectangular cutouts by analyzing mesh geometry
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+NucDeck Voxel Occupancy Grid
+Scanline voxelization of closed meshes with cached grids and numpy volume queries
+"""
+
+import hashlib
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+import logging
+
+import numpy as np
+import trimesh
+from scipy import ndimage
+
+from mesh_cache import DEFAULT_CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+# Bump when the voxelization rule or the stored arrays change
+VOXEL_CACHE_VERSION = 1
+
+DEFAULT_PITCH = 0.5
+
+# Column centres are nudged off the voxel lattice by this fraction of the
+# pitch so they never land exactly on the grid-aligned edges of CAD meshes
+COLUMN_JITTER = (1.3e-6, 2.9e-6)
+
+# Upper bound on column/triangle pairs tested at once, to keep memory flat
+MAX_PAIRS = 4_000_000
+
+
+def mesh_key(mesh: trimesh.Trimesh) -> str:
+    """Content hash of a mesh's vertices and faces"""
+    digest = hashlib.sha256()
+    digest.update(np.ascontiguousarray(mesh.vertices, dtype=np.float64).tobytes())
+    digest.update(np.ascontiguousarray(mesh.faces, dtype=np.int64).tobytes())
+    return digest.hexdigest()
+
+
+def column_crossings(triangles: np.ndarray, origin: np.ndarray, pitch: float, shape):
+    """
+    Every crossing of a +Z column through a triangle.
+
+    Triangles are scan-converted a row of column centres at a time: each
+    (triangle, row) pair yields the X span where the row crosses the
+    triangle, and only the columns in that span (plus one either side) get
+    the exact 2D barycentric test, so long thin triangles cost no more than
+    their area. Work is done in bounded-size vectorized batches. Returns the
+    flattened column index and crossing height of every hit.
+    """
+    nx, ny = shape[0], shape[1]
+    jitter = np.array(COLUMN_JITTER) * pitch
+    xy = triangles[:, :, :2] - (origin[:2] + jitter)
+
+    # Column i is centred at (i + 0.5) * pitch
+    lower = np.clip(np.ceil(xy.min(axis=1) / pitch - 0.5), 0, [nx, ny]).astype(np.int64)
+    upper = np.clip(np.floor(xy.max(axis=1) / pitch - 0.5), -1, [nx - 1, ny - 1]).astype(np.int64)
+    rows = np.maximum(upper[:, 1] - lower[:, 1] + 1, 0)
+
+    a, b, c = xy[:, 0], xy[:, 1], xy[:, 2]
+    det = (b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) - (c[:, 0] - a[:, 0]) * (b[:, 1] - a[:, 1])
+    rows[(np.abs(det) < 1e-12) | (upper[:, 0] < lower[:, 0])] = 0
+
+    columns, heights = [], []
+    cumulative = np.cumsum(rows * np.maximum(upper[:, 0] - lower[:, 0] + 1, 0))
+    start = 0
+    while start < len(triangles):
+        base = cumulative[start - 1] if start else 0
+        stop = max(int(np.searchsorted(cumulative, base + MAX_PAIRS, side='right')), start + 1)
+        batch = rows[start:stop]
+        tri = np.repeat(np.arange(start, stop), batch)
+        start = stop
+        if len(tri) == 0:
+            continue
+
+        # X span of each row inside its triangle, from the edges it crosses
+        iy = lower[tri, 1] + np.arange(len(tri)) - np.repeat(np.cumsum(batch) - batch, batch)
+        py = (iy + 0.5) * pitch
+        span_lo = np.full(len(tri), np.inf)
+        span_hi = np.full(len(tri), -np.inf)
+        for p, q in ((a, b), (b, c), (c, a)):
+            py0, py1 = p[tri, 1], q[tri, 1]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                t = (py - py0) / (py1 - py0)
+            crosses = (t >= 0) & (t <= 1)
+            x = np.where(crosses, p[tri, 0] + t * (q[tri, 0] - p[tri, 0]), np.nan)
+            span_lo = np.fmin(span_lo, x)
+            span_hi = np.fmax(span_hi, x)
+
+        first = np.maximum(np.ceil(span_lo / pitch - 0.5) - 1, lower[tri, 0])
+        last = np.minimum(np.floor(span_hi / pitch - 0.5) + 1, upper[tri, 0])
+        valid = np.isfinite(first) & np.isfinite(last)
+        width = np.where(valid, np.maximum(last - first + 1, 0), 0).astype(np.int64)
+        first = np.where(valid, first, 0).astype(np.int64)
+
+        total = int(width.sum())
+        if total == 0:
+            continue
+        pair = np.repeat(np.arange(len(tri)), width)
+        ix = first[pair] + np.arange(total) - np.repeat(np.cumsum(width) - width, width)
+        iy, tri = iy[pair], tri[pair]
+        px = (ix + 0.5) * pitch
+        py = (iy + 0.5) * pitch
+
+        # Barycentric weights of the column centre in the projected triangle
+        ax, ay = a[tri, 0], a[tri, 1]
+        w1 = ((px - ax) * (c[tri, 1] - ay) - (c[tri, 0] - ax) * (py - ay)) / det[tri]
+        w2 = ((b[tri, 0] - ax) * (py - ay) - (px - ax) * (b[tri, 1] - ay)) / det[tri]
+        w0 = 1.0 - w1 - w2
+        inside = (w0 >= 0) & (w1 >= 0) & (w2 >= 0)
+
+        z = triangles[tri, :, 2]
+        height = w0 * z[:, 0] + w1 * z[:, 1] + w2 * z[:, 2]
+        columns.append((ix * ny + iy)[inside])
+        heights.append(height[inside])
+
+    if not columns:
+        return np.zeros(0, dtype=np.int64), np.zeros(0)
+    return np.concatenate(columns), np.concatenate(heights)
+
+
+def lattice(bounds: np.ndarray, pitch: float):
+    """Grid origin and shape covering ``bounds`` with one voxel of margin"""
+    origin = np.asarray(bounds[0], dtype=np.float64) - pitch
+    shape = tuple(int(n) for n in np.ceil((np.asarray(bounds[1]) + pitch - origin) / pitch))
+    return origin, shape
+
+
+def voxelize(mesh: trimesh.Trimesh, pitch: float = DEFAULT_PITCH, origin: Optional[np.ndarray] = None,
+             shape: Optional[tuple] = None) -> 'OccupancyGrid':
+    """
+    Solid occupancy of a closed mesh, sampled at voxel centres.
+
+    One column of voxels is cast along +Z through every (x, y) cell and all
+    surface crossings are found in a single vectorized pass. A voxel is solid
+    when an odd number of crossings lie below its centre; that parity is a
+    cumulative sum along Z, so the whole grid fills without a Python loop.
+    Columns with an odd crossing count (open meshes) are left empty. Pass
+    ``origin`` and ``shape`` (see ``lattice``) to sample several meshes on
+    one shared grid; by default the grid fits this mesh.
+    """
+    if origin is None or shape is None:
+        origin, shape = lattice(mesh.bounds, pitch)
+    origin = np.asarray(origin, dtype=np.float64)
+    nx, ny, nz = shape
+
+    columns, heights = column_crossings(mesh.triangles, origin, pitch, shape)
+
+    # Index of the first voxel centre above each crossing
+    level = np.clip(np.ceil((heights - origin[2]) / pitch - 0.5), 0, nz).astype(np.int64)
+    steps = np.zeros((nx * ny, nz + 1), dtype=np.int32)
+    np.add.at(steps, (columns, level), 1)
+
+    parity = np.cumsum(steps[:, :nz], axis=1) & 1
+    crossings = steps.sum(axis=1)
+    open_columns = (crossings & 1).astype(bool)
+    if open_columns.any():
+        logger.warning(f"{int(open_columns.sum())} voxel columns cross the surface an odd number "
+                       f"of times (mesh not closed); leaving them empty")
+        parity[open_columns] = 0
+
+    return OccupancyGrid(parity.astype(bool).reshape(shape), origin, pitch)
+
+
+class OccupancyGrid:
+    """
+    Boolean solid grid with its placement, plus volume queries.
+
+    ``solid[i, j, k]`` covers the voxel centred at
+    ``origin + (i + 0.5, j + 0.5, k + 0.5) * pitch``. The grid has at least
+    one empty voxel of margin on every side, so empty space touching the
+    border is outside the part.
+    """
+
+    def __init__(self, solid: np.ndarray, origin: np.ndarray, pitch: float):
+        self.solid = solid
+        self.origin = np.asarray(origin, dtype=np.float64)
+        self.pitch = float(pitch)
+
+    @property
+    def shape(self):
+        return self.solid.shape
+
+    @property
+    def voxel_volume(self) -> float:
+        return self.pitch ** 3
+
+    def centers(self, indices: np.ndarray) -> np.ndarray:
+        """World coordinates of voxel centres for an (n, 3) index array"""
+        return self.origin + (np.asarray(indices) + 0.5) * self.pitch
+
+    def contains(self, points: np.ndarray) -> np.ndarray:
+        """Whether each point falls in a solid voxel (points off the grid are outside)"""
+        index = np.floor((np.asarray(points, dtype=np.float64) - self.origin) / self.pitch).astype(np.int64)
+        valid = np.all((index >= 0) & (index < self.shape), axis=1)
+        result = np.zeros(len(index), dtype=bool)
+        result[valid] = self.solid[tuple(index[valid].T)]
+        return result
+
+    def internal_volume(self) -> float:
+        """Material volume in mm³"""
+        return float(self.solid.sum()) * self.voxel_volume
+
+    def outside(self) -> np.ndarray:
+        """Empty voxels connected to the grid border"""
+        labels, _ = ndimage.label(~self.solid)
+        border = np.unique(np.concatenate([
+            labels[[0, -1], :, :].ravel(), labels[:, [0, -1], :].ravel(), labels[:, :, [0, -1]].ravel()]))
+        return np.isin(labels, border[border > 0])
+
+    def enclosed_cavities(self) -> np.ndarray:
+        """Empty voxels sealed inside material, unreachable from outside"""
+        return ~self.solid & ~self.outside()
+
+    def pockets(self, min_axes: int = 2) -> np.ndarray:
+        """
+        Open recesses: outside voxels walled in by material on both sides
+        along at least ``min_axes`` of the three axes.
+        """
+        bounded = np.zeros(self.shape, dtype=np.int8)
+        for axis in range(3):
+            before = np.maximum.accumulate(self.solid, axis=axis)
+            after = np.flip(np.maximum.accumulate(np.flip(self.solid, axis), axis=axis), axis)
+            bounded += before & after
+        return self.outside() & (bounded >= min_axes)
+
+    def regions(self, mask: np.ndarray, min_voxels: int = 1, values: Optional[np.ndarray] = None) -> List[Dict]:
+        """
+        Face-connected components of ``mask`` with volume, bounds and centroid, largest first.
+
+        With ``values`` (one number per voxel), each region also reports the
+        largest value over its voxels as ``max_value``.
+        """
+        labels, count = ndimage.label(mask)
+        if count == 0:
+            return []
+
+        sizes = np.bincount(labels.ravel(), minlength=count + 1)
+        slices = ndimage.find_objects(labels)
+        centroids = ndimage.center_of_mass(mask, labels, range(1, count + 1))
+        if values is not None:
+            maxima = ndimage.maximum(values, labels, range(1, count + 1))
+
+        regions = []
+        for label, (box, centroid) in enumerate(zip(slices, centroids), start=1):
+            if sizes[label] < min_voxels:
+                continue
+            lower = self.origin + np.array([s.start for s in box]) * self.pitch
+            upper = self.origin + np.array([s.stop for s in box]) * self.pitch
+            regions.append({
+                'voxels': int(sizes[label]),
+                'volume': float(sizes[label] * self.voxel_volume),
+                'bounds': [lower.tolist(), upper.tolist()],
+                'dimensions': (upper - lower).tolist(),
+                'centroid': self.centers(centroid).tolist(),
+            })
+            if values is not None:
+                regions[-1]['max_value'] = float(maxima[label - 1])
+
+        regions.sort(key=lambda region: region['voxels'], reverse=True)
+        return regions
+
+
+class VoxelCache:
+    """
+    Occupancy grids keyed by mesh content and pitch.
+
+    Grids are kept in memory for the life of the process and stored bit-packed
+    as .npz beside the mesh cache, so re-analysing an unchanged part at the
+    same pitch skips voxelization entirely.
+    """
+
+    def __init__(self, cache_dir: Union[str, Path] = DEFAULT_CACHE_DIR, max_memory_entries: int = 8):
+        self.cache_dir = Path(cache_dir)
+        self.max_memory_entries = max_memory_entries
+        self._memory = OrderedDict()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _entry_path(self, key: str, pitch: float) -> Path:
+        return self.cache_dir / f"{key}-voxels-p{pitch:g}-v{VOXEL_CACHE_VERSION}.npz"
+
+    def _save(self, grid: OccupancyGrid, entry: Path):
+        temp_entry = entry.with_name(f".{entry.stem}.{os.getpid()}.tmp.npz")
+        np.savez_compressed(temp_entry, packed=np.packbits(grid.solid, axis=None),
+                            shape=np.array(grid.shape), origin=grid.origin, pitch=grid.pitch)
+        os.replace(temp_entry, entry)
+
+    def _restore(self, entry: Path) -> OccupancyGrid:
+        with np.load(entry) as data:
+            shape = tuple(int(n) for n in data['shape'])
+            solid = np.unpackbits(data['packed'], count=int(np.prod(shape))).astype(bool).reshape(shape)
+            return OccupancyGrid(solid, data['origin'], float(data['pitch']))
+
+    def get(self, mesh: trimesh.Trimesh, pitch: float = DEFAULT_PITCH) -> OccupancyGrid:
+        """Occupancy grid for ``mesh`` at ``pitch``, voxelizing only on a cache miss"""
+        key = (mesh_key(mesh), float(pitch))
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return self._memory[key]
+
+        entry = self._entry_path(*key)
+        grid = None
+        if entry.exists():
+            try:
+                grid = self._restore(entry)
+            except (OSError, KeyError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable voxel cache entry {entry.name}: {e}")
+
+        if grid is None:
+            grid = voxelize(mesh, pitch)
+            self._save(grid, entry)
+
+        self._memory[key] = grid
+        if len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+        return grid
+
+
+_default_cache: Optional[VoxelCache] = None
+
+
+def occupancy_grid(mesh: trimesh.Trimesh, pitch: float = DEFAULT_PITCH) -> OccupancyGrid:
+    """Occupancy grid through the shared default cache"""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = VoxelCache()
+    return _default_cache.get(mesh, pitch)
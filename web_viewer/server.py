@@ -4,22 +4,227 @@ Simple HTTP server for the NucDeck STL viewer
 Serves the web interface and provides API endpoints for CAD automation
 """
 
+import email.utils
 import http.server
-import socketserver
+import hashlib
 import json
 import os
+import sys
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import threading
 import webbrowser
-from urllib.parse import urlparse, parse_qs
+from urllib.parse import urlparse, parse_qs, unquote
+
+WORKSPACE_PATH = '/workspaces/scad'
+OUTPUT_DIR = Path(WORKSPACE_PATH) / 'output'
+WEB_OUTPUT_DIR = OUTPUT_DIR / 'web'
+
+
+class RenderJobQueue:
+    """
+    Background render queue for /api/regenerate.
+
+    Jobs run on a small thread pool (each render is an OpenSCAD subprocess, so
+    threads are enough). Requests whose parameters match a job that is still
+    queued or running are attached to that job instead of starting a new one.
+    Rendered STLs are kept as a size-bounded LRU like the render cache: the
+    least recently written files go once their total passes max_output_bytes.
+    """
+
+    def __init__(self, max_workers=None, max_finished=200, max_output_bytes=512 << 20):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_finished = max_finished
+        self.max_output_bytes = max_output_bytes
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='render')
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()
+        self._in_flight = {}
+        self._local = threading.local()
+
+    @staticmethod
+    def params_key(cad_params):
+        """Stable digest of a parameter set, used for coalescing and output naming"""
+        canonical = json.dumps(cad_params, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def _automator(self):
+        # One automator per worker thread; render methods record last_error on the instance
+        if not hasattr(self._local, 'automator'):
+            if WORKSPACE_PATH not in sys.path:
+                sys.path.append(WORKSPACE_PATH)
+            from cad_automator import NucDeckCADAutomator
+            self._local.automator = NucDeckCADAutomator(WORKSPACE_PATH)
+        return self._local.automator
+
+    def submit(self, cad_params, parameters=None):
+        """Queue a render, or join the in-flight job for the same parameters"""
+        key = self.params_key(cad_params)
+
+        with self._lock:
+            job_id = self._in_flight.get(key)
+            if job_id is not None:
+                job = self._jobs[job_id]
+                job['requests'] += 1
+                return dict(job), True
+
+            job = {
+                'id': uuid.uuid4().hex,
+                'status': 'queued',
+                'params_key': key,
+                'parameters': parameters or {},
+                'cad_params': cad_params,
+                'requests': 1,
+                'created_at': time.time(),
+                'started_at': None,
+                'finished_at': None,
+                'output_file': None,
+                'output_url': None,
+                'error': None,
+            }
+            self._jobs[job['id']] = job
+            self._in_flight[key] = job['id']
+            self._prune()
+
+        self._executor.submit(self._run, job['id'])
+        return dict(job), False
+
+    def get(self, job_id):
+        """Return a snapshot of a job, or None if it is unknown or expired"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def _prune(self):
+        # Forget the oldest finished jobs; queued/running ones are always kept
+        finished = [job_id for job_id, job in self._jobs.items() if job['status'] in ('done', 'failed')]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            job = self._jobs[job_id]
+            job.update(fields)
+            if fields.get('status') in ('done', 'failed'):
+                self._in_flight.pop(job['params_key'], None)
+
+    def _run(self, job_id):
+        with self._lock:
+            job = dict(self._jobs[job_id])
+        self._update(job_id, status='running', started_at=time.time())
+
+        # Each parameter set gets its own file, written under a temporary name
+        # so viewers never load a half-written STL
+        output_stl = WEB_OUTPUT_DIR / f"nucdeck_web_{job['params_key'][:16]}.stl"
+        temp_stl = WEB_OUTPUT_DIR / f".{job_id}.stl"
+
+        try:
+            WEB_OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+            automator = self._automator()
+            success = automator.render_stl(str(automator.main_scad_file), str(temp_stl), job['cad_params'])
+
+            if success:
+                os.replace(temp_stl, output_stl)
+                self._evict_outputs(keep=output_stl)
+                self._update(job_id, status='done', finished_at=time.time(),
+                             output_file=str(output_stl),
+                             output_url='/' + str(output_stl.relative_to(WORKSPACE_PATH)))
+            else:
+                self._update(job_id, status='failed', finished_at=time.time(),
+                             error=automator.last_error or 'Failed to regenerate model')
+        except Exception as e:
+            self._update(job_id, status='failed', finished_at=time.time(), error=str(e))
+        finally:
+            temp_stl.unlink(missing_ok=True)
+
+    def _evict_outputs(self, keep):
+        # Oldest first; the file just written always survives
+        entries = []
+        for path in WEB_OUTPUT_DIR.glob('nucdeck_web_*.stl'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_output_bytes:
+                break
+            if path == keep:
+                continue
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def parse_byte_range(range_header, file_size):
+    """
+    Parse a single ``bytes=`` range into an inclusive (start, end) pair.
+
+    Returns None when the header should be ignored (malformed or multi-range,
+    which are answered with the whole file) and raises ValueError when the
+    range cannot be satisfied.
+    """
+    unit, _, spec = range_header.partition('=')
+    if unit.strip().lower() != 'bytes' or ',' in spec:
+        return None
+
+    first, sep, last = spec.strip().partition('-')
+    if not sep or not (first.isdigit() or last.isdigit()):
+        return None
+    if first and last and not (first.isdigit() and last.isdigit()):
+        return None
+
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0 or file_size == 0:
+            raise ValueError('unsatisfiable range')
+        return max(0, file_size - length), file_size - 1
+
+    start = int(first)
+    end = min(int(last), file_size - 1) if last else file_size - 1
+    if start >= file_size or end < start:
+        raise ValueError('unsatisfiable range')
+    return start, end
+
 
 class NucDeckHTTPHandler(http.server.SimpleHTTPRequestHandler):
+    # Keep-alive lets the viewer fetch several STLs over one connection
+    protocol_version = 'HTTP/1.1'
+    job_queue = None  # RenderJobQueue, set by start_server()
+
     def __init__(self, *args, **kwargs):
         # Set the directory to serve files from
         super().__init__(*args, directory="/workspaces/scad/web_viewer", **kwargs)
     
+    def read_body(self):
+        """
+        Read the whole request body so a kept-alive connection stays in sync.
+
+        Bodies without a usable Content-Length cannot be skipped reliably, so
+        the connection is closed after the response instead.
+        """
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            length = -1
+        if length < 0 or (length == 0 and 'chunked' in self.headers.get('Transfer-Encoding', '').lower()):
+            self.close_connection = True
+            return b''
+        return self.rfile.read(length)
+
     def do_POST(self):
         """Handle POST requests for API endpoints"""
+        # Every endpoint gets the body read up front, even ones that ignore it
+        self.request_body = self.read_body()
         if self.path == '/api/regenerate':
             self.handle_regenerate_request()
         elif self.path == '/api/upload':
@@ -27,20 +232,20 @@ class NucDeckHTTPHandler(http.server.SimpleHTTPRequestHandler):
         else:
             self.send_error(404, "API endpoint not found")
     
+    def send_json(self, status_code, payload):
+        """Send a JSON response with CORS headers"""
+        body = json.dumps(payload).encode()
+        self.send_response(status_code)
+        self.send_header('Content-type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(body)
+
     def handle_regenerate_request(self):
-        """Handle model regeneration requests"""
+        """Queue a model regeneration and return the job id immediately"""
         try:
-            content_length = int(self.headers['Content-Length'])
-            post_data = self.rfile.read(content_length)
-            parameters = json.loads(post_data.decode('utf-8'))
-            
-            # Import and use the CAD automation system
-            import sys
-            sys.path.append('/workspaces/scad')
-            from cad_automator import NucDeckCADAutomator
-            
-            # Create automator instance and apply parameters
-            automator = NucDeckCADAutomator()
+            parameters = json.loads(self.request_body.decode('utf-8'))
             
             # Convert web parameters to CAD parameters
             cad_params = {}
@@ -53,27 +258,18 @@ class NucDeckHTTPHandler(http.server.SimpleHTTPRequestHandler):
             if 'gripOffset' in parameters:
                 cad_params['grip_offset'] = parameters['gripOffset']
             
-            # Generate STL with new parameters
-            output_stl = "/workspaces/scad/output/nucdeck_web_generated.stl"
-            success = automator.render_stl(
-                str(automator.main_scad_file), 
-                output_stl, 
-                cad_params
-            )
+            job, coalesced = self.job_queue.submit(cad_params, parameters)
             
             response = {
-                "status": "success" if success else "error",
-                "message": "Model regenerated successfully" if success else "Failed to regenerate model",
+                "status": job['status'],
+                "message": "Joined in-flight render" if coalesced else "Render queued",
+                "job_id": job['id'],
+                "status_url": f"/api/jobs/{job['id']}",
+                "coalesced": coalesced,
                 "parameters": parameters,
-                "output_file": output_stl if success else None,
                 "cad_params": cad_params
             }
-            
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            self.wfile.write(json.dumps(response).encode())
+            self.send_json(202, response)
             
         except Exception as e:
             error_response = {
@@ -81,57 +277,154 @@ class NucDeckHTTPHandler(http.server.SimpleHTTPRequestHandler):
                 "message": f"Error processing request: {str(e)}",
                 "parameters": parameters if 'parameters' in locals() else {}
             }
-            self.send_response(500)
-            self.send_header('Content-type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            self.wfile.write(json.dumps(error_response).encode())
+            self.send_json(500, error_response)
+    
+    def handle_job_status(self, job_id):
+        """Report the status of a queued render job"""
+        job = self.job_queue.get(job_id)
+        if job is None:
+            self.send_json(404, {"status": "error", "message": f"Unknown job: {job_id}"})
+            return
+        
+        now = time.time()
+        job['queue_time'] = (job['started_at'] or now) - job['created_at']
+        job['render_time'] = (job['finished_at'] or now) - job['started_at'] if job['started_at'] else None
+        self.send_json(200, job)
     
     def handle_file_upload(self):
         """Handle STL file uploads"""
         # Implementation for file upload handling
-        self.send_response(200)
-        self.send_header('Content-type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.end_headers()
         response = {"status": "success", "message": "File upload handled"}
-        self.wfile.write(json.dumps(response).encode())
+        self.send_json(200, response)
     
     def do_OPTIONS(self):
         """Handle CORS preflight requests"""
         self.send_response(200)
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type, Range, If-None-Match')
+        self.send_header('Content-Length', '0')
         self.end_headers()
     
     def do_GET(self):
         """Handle GET requests with custom routing"""
-        if self.path.startswith('/output/'):
-            # Serve files from the output directory
-            file_path = '/workspaces/scad' + self.path
-            if os.path.exists(file_path):
-                self.send_response(200)
-                if self.path.endswith('.stl'):
-                    self.send_header('Content-type', 'application/octet-stream')
-                    self.send_header('Content-Disposition', f'attachment; filename="{os.path.basename(file_path)}"')
-                else:
-                    self.send_header('Content-type', 'application/octet-stream')
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.end_headers()
-                with open(file_path, 'rb') as f:
-                    self.wfile.write(f.read())
-            else:
-                self.send_error(404, "File not found")
+        path = urlparse(self.path).path
+        if path.startswith('/api/jobs/'):
+            self.handle_job_status(path[len('/api/jobs/'):])
+        elif path.startswith('/output/'):
+            self.serve_output_file(path)
         else:
             # Use default handler for other requests
             super().do_GET()
+    
+    def do_HEAD(self):
+        """Handle HEAD requests, mirroring GET headers for output files"""
+        path = urlparse(self.path).path
+        if path.startswith('/output/'):
+            self.serve_output_file(path, send_body=False)
+        else:
+            super().do_HEAD()
+    
+    def serve_output_file(self, url_path, send_body=True):
+        """
+        Stream a file from the output directory.
+
+        The body goes out with socket.sendfile (zero-copy where the OS supports
+        it), so large STLs never pass through Python memory. Supports single
+        byte ranges and conditional requests via ETag and Last-Modified.
+        """
+        file_path = (OUTPUT_DIR / unquote(url_path[len("/output/"):])).resolve()
+        if not file_path.is_relative_to(OUTPUT_DIR.resolve()) or not file_path.is_file():
+            self.send_error(404, "File not found")
+            return
+        
+        try:
+            f = open(file_path, 'rb')
+        except OSError:
+            self.send_error(404, "File not found")
+            return
+        
+        with f:
+            stat = os.fstat(f.fileno())
+            size = stat.st_size
+            etag = f'"{stat.st_mtime_ns:x}-{size:x}"'
+            last_modified = email.utils.formatdate(stat.st_mtime, usegmt=True)
+            
+            if self.is_not_modified(etag, stat.st_mtime):
+                self.send_response(304)
+                self.send_file_headers(file_path, etag, last_modified)
+                self.end_headers()
+                return
+            
+            # A range only applies if If-Range (when sent) still matches this version
+            byte_range = None
+            range_header = self.headers.get('Range')
+            if_range = self.headers.get('If-Range')
+            if range_header and (not if_range or if_range.strip() in (etag, last_modified)):
+                try:
+                    byte_range = parse_byte_range(range_header, size)
+                except ValueError:
+                    self.send_response(416)
+                    self.send_header('Content-Range', f'bytes */{size}')
+                    self.send_header('Content-Length', '0')
+                    self.send_header('Access-Control-Allow-Origin', '*')
+                    self.end_headers()
+                    return
+            
+            if byte_range:
+                start, end = byte_range
+                self.send_response(206)
+                self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+            else:
+                start, end = 0, size - 1
+                self.send_response(200)
+            
+            length = end - start + 1
+            self.send_file_headers(file_path, etag, last_modified)
+            self.send_header('Content-Length', str(length))
+            self.end_headers()
+            
+            if send_body and length > 0:
+                self.wfile.flush()
+                self.connection.sendfile(f, start, length)
+    
+    def is_not_modified(self, etag, mtime):
+        """Evaluate If-None-Match, falling back to If-Modified-Since"""
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match:
+            tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+            return '*' in tags or etag in tags
+        
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_modified_since:
+            try:
+                since = email.utils.parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return int(mtime) <= since
+        return False
+    
+    def send_file_headers(self, file_path, etag, last_modified):
+        """Headers shared by full, partial and not-modified output responses"""
+        self.send_header('Content-type', 'application/octet-stream')
+        if file_path.suffix == '.stl':
+            self.send_header('Content-Disposition', f'attachment; filename="{file_path.name}"')
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', last_modified)
+        # Files are regenerated in place, so always revalidate (cheap with the ETag)
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Expose-Headers', 'ETag, Content-Range, Content-Length')
 
-def start_server(port=8000):
+def start_server(port=8000, workers=None):
     """Start the HTTP server"""
+    NucDeckHTTPHandler.job_queue = RenderJobQueue(max_workers=workers)
     try:
-        with socketserver.TCPServer(("", port), NucDeckHTTPHandler) as httpd:
+        # One thread per connection, so slow downloads don't block other viewers
+        with http.server.ThreadingHTTPServer(("", port), NucDeckHTTPHandler) as httpd:
             print(f"🚀 NucDeck STL Viewer server starting on port {port}")
+            print(f"🔧 Render workers: {NucDeckHTTPHandler.job_queue.max_workers}")
             print(f"🌐 Open your browser to: http://localhost:{port}")
             print("📁 Serving files from: /workspaces/scad/web_viewer")
             print("⚡ Press Ctrl+C to stop the server")
@@ -153,11 +446,14 @@ def start_server(port=8000):
             print(f"   You can specify a different port: python server.py --port 8081")
         else:
             print(f"❌ Error starting server: {e}")
+    finally:
+        NucDeckHTTPHandler.job_queue.shutdown()
 
 if __name__ == "__main__":
     import argparse
     parser = argparse.ArgumentParser(description='NucDeck STL Viewer Server')
     parser.add_argument('--port', type=int, default=8000, help='Port to serve on (default: 8000)')
+    parser.add_argument('--workers', type=int, default=None, help='Concurrent render jobs (default: CPU count)')
     args = parser.parse_args()
     
-    start_server(args.port)
+    start_server(args.port, args.workers)